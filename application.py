@@ -1,176 +1,635 @@
-import cv2
+import argparse
 import logging
-import numpy as np
-import collections
+import sys
 import traceback
-import os
+from pathlib import Path
 
 from utils.logging_util import initialize_logging
-from utils.points_utils import get_points
+from utils.metrics_util import metrics
 
-from src.steps.FrameExtractor import FrameExtractor
-from src.steps.Synchronizer import Synchronizer
-from src.steps.ViewTransformer import ViewTransformer
-from src.steps.PlayerTracker import PlayerTracker
-from src.steps.FeatureExtractor import FeatureExtractor
-from src.steps.CrossViewMatcher import CrossViewMatcher
-
-from src.IDManager import GlobalIdentityManager
-
-from src.components.FrameExtractionStrategies import FfmpegcvCPUStrategy
-from src.components.ModelStrategies import UltralyticsYoloModel, TorchReIDModel
+from src.config import settings
 
 
+"""
+Command line entry point of the application.
 
-from src.config import settings
+Subcommands only import what they need, so lightweight steps (sync, calibrate) start
+without loading torch, torchreid or ultralytics.
 
+    python application.py sync
+    python application.py calibrate
+    python application.py extract   -> writes settings.FEATURES_CACHE_PATH
+    python application.py match     -> writes settings.MATCHES_CACHE_PATH
+    python application.py render    -> writes settings.OUTPUT_PATH
+    python application.py evaluate  -> writes settings.EVALUATION_PATH
+    python application.py sweep     -> writes settings.SWEEP_PATH
+    python application.py run       -> full pipeline (default)
+    python application.py live      -> full pipeline on live sources
+"""
 
 """Intializing logging """
 initialize_logging()
 logger = logging.getLogger(__name__)
 
-def draw_unified_view(matched_pairs, unmatched1, unmatched2, id_manager, background_img):
-    """Draws all players on a single top-down map with their global IDs."""
-    if background_img is None or background_img.size == 0:
-        raise ValueError("Background image is empty or None.")
-    
-    vis_img = background_img.copy()
-
-    for p1, p2 in matched_pairs:
-        gid = id_manager.register(p1, p2)
-        coords = (p1['features']['field_coords'] + p2['features']['field_coords']) / 2
-        coords = tuple(coords.astype(int))
-        cv2.circle(vis_img, coords, 10, (0, 255, 0), -1)
-        cv2.putText(vis_img, str(gid), (coords[0]-5, coords[1]-15), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-    for p in unmatched1 + unmatched2:
-        gid = id_manager.get_global_id(p['view'], p['track_id'])
-        coords = p['features']['field_coords']
-        cv2.circle(vis_img, tuple(coords.astype(int)), 8, (0, 0, 255), -1)
-        cv2.putText(vis_img, str(gid), tuple((coords + np.array([-5, -15])).astype(int)), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-
-    return vis_img
-
-    return vis_img
-def main():
-    """Entry point of the application"""
 
-    logger.info(f"\n\n\n\n")
-    logger.info("-------------------------Starting application------------------------------------")
-
-
-    """
-    Defining Homography points
-    These points were acquired using 'points_utils.py' for both videos.
-    """
-    logger.info("Defining Homography points using points_utils.py' for both videos.")
-    broadcast_points = np.float32([
+"""
+Homography points
+These points were acquired using 'points_utils.py' for both videos.
+"""
+BROADCAST_POINTS = [
     [135, 555], [375, 572], [403, 491], [581, 505],
     [404, 491], [658, 427], [630, 506], [774, 433],
     [838, 739], [950, 696], [1069, 654], [1179, 617],
     [62, 709], [340, 731], [857, 591], [626, 574],
     [247, 659], [473, 606], [245, 521], [469, 478],
     [398, 677], [297, 669], [531, 615], [623, 623]
-    ])
+]
 
-    tacticam_points = np.float32([
+TACTICAM_POINTS = [
     [110, 232], [230, 244], [230, 144], [322, 149],
     [287, 512], [343, 451], [381, 410], [424, 362],
     [142, 312], [276, 324], [255, 233], [371, 239],
     [41, 413], [31, 349], [129, 285], [137, 343],
     [6, 469], [165, 486], [242, 299], [374, 313],
     [24, 407], [82, 413], [124, 339], [178, 344]
-    ])
-
-
+]
 
-    width, height = 1920, 1080
-    destination_points = np.float32([
+DESTINATION_POINTS = [
     [94, 237], [93, 63], [306, 237], [304, 63],
     [307, 577], [307, 510], [307, 446], [307, 397],
     [94, 596], [163, 596], [94, 382], [163, 382],
     [94, 735], [306, 735], [94, 238], [306, 238],
     [94, 382], [164, 382], [94, 238], [164, 238],
     [94, 595], [165, 595], [94, 735], [165, 735]
-    ])
-    
+]
+
+WIDTH, HEIGHT = 1920, 1080
 
-    logger.info("Initializing all modules")
-    transformer_1 :ViewTransformer = ViewTransformer(broadcast_points, tacticam_points, (width, height))
-    player_tracker = PlayerTracker(UltralyticsYoloModel)
-    feature_extractor = FeatureExtractor(TorchReIDModel,UltralyticsYoloModel)
+
+def build_synchronizer(strategy=None):
+    """Creates the frame extractors for both videos (ffmpegcv unless `strategy` is given) and the synchronizer."""
+    from src.steps.FrameExtractor import FrameExtractor
+    from src.steps.Synchronizer import Synchronizer
+    from src.components.FrameExtractionStrategies import FfmpegcvCPUStrategy
 
     logger.info("---Initializing Extractors ---")
+    extractor_1 = FrameExtractor(settings.BROADCAST_VIDEO_PATH, strategy or FfmpegcvCPUStrategy)
+    extractor_2 = FrameExtractor(settings.TACTICAM_VIDEO_PATH, strategy or FfmpegcvCPUStrategy)
+    return Synchronizer(extractor_1=extractor_1,extractor_2=extractor_2)
+
+
+def build_transformer():
+    import numpy as np
+    from src.steps.ViewTransformer import ViewTransformer
+
+    logger.info("Defining Homography points using points_utils.py' for both videos.")
+    return ViewTransformer(np.float32(BROADCAST_POINTS), np.float32(TACTICAM_POINTS), (WIDTH, HEIGHT))
 
-    extractor_1 = FrameExtractor(settings.BROADCAST_VIDEO_PATH, FfmpegcvCPUStrategy)
-    extractor_2 = FrameExtractor(settings.TACTICAM_VIDEO_PATH, FfmpegcvCPUStrategy)
 
+def load_field_map():
+    import cv2
+
+    field_map = cv2.imread("field.jpg")
+    return cv2.resize(field_map, (WIDTH, HEIGHT))
+
+
+def sync_command(args):
+    """Computes the temporal offset between both videos."""
     logger.info("--- Running Synchronization  ---")
-    synchronizer = Synchronizer(extractor_1=extractor_1,extractor_2=extractor_2)
+    synchronizer = build_synchronizer()
+    synchronizer.sync()
+    logger.info(
+        f"Calculated Offset: {synchronizer.offset_frames} frames, Confidence: {synchronizer.confidence:.4f} "
+    )
+    return synchronizer
+
+
+def calibrate_command(args):
+    """Opens the interactive point selection used to define the homography points."""
+    from utils.points_utils import get_points
+
+    get_points()
+
+
+def calibrate_reid_command(args):
+    """
+    Caches Re-ID calibration crops from the first synchronized frames, with the float Re-ID model,
+    then builds the --precision model on them and reports whether its matching quality holds.
+    """
+    from src.steps.PlayerTracker import PlayerTracker
+    from src.steps.FeatureExtractor import FeatureExtractor
+    from src.components.ModelStrategies import UltralyticsYoloModel, TorchReIDModel, QuantizedTorchReIDModel
+    from utils.quantization_utils import collect_calibration_crops, save_calibration_crops
+
+    if args.precision == "fp16":
+        "The pipeline runs the Re-ID model on CPU, where QuantizedTorchReIDModel refuses fp16."
+        logger.error("fp16 Re-ID needs a CUDA device, the Re-ID model runs on CPU. Use int8_static or fp32.")
+        raise ValueError("fp16 Re-ID precision is not supported on CPU.")
+
+    synchronizer = sync_command(args)
+    calibration_cache = collect_calibration_crops(
+        synchronizer, PlayerTracker(UltralyticsYoloModel), FeatureExtractor(TorchReIDModel, UltralyticsYoloModel),
+        build_transformer(), max_frames=args.calibration_frames, fps=args.fps,
+    )
+    if len(calibration_cache["crops"]) == 0:
+        logger.error("No player crop was found, the calibration cache was not written.")
+        raise RuntimeError("No player crop was found in the calibrated frames.")
+    save_calibration_crops(args.calibration_crops, calibration_cache)
+
+    if args.precision != "fp32":
+        reid_model = QuantizedTorchReIDModel(precision=args.precision, calibration_crops_path=args.calibration_crops)
+        logger.info(f"Re-Id {args.precision} quality report : {reid_model.quality_report}")
+        return reid_model.quality_report
+
+
+def extract_command(args, synchronizer=None):
+    """
+    PHASE 1 : runs tracking and feature extraction on all synchronized frames
+    and stores the per-frame player data.
+
+    Frames are processed in chunks of --chunk-seconds. Every completed chunk is checkpointed,
+    so an interrupted run resumes from the last completed chunk. Track IDs are reconciled
+    across chunks by the stitcher before the features cache is written.
+    """
+    import uuid
+    import contextlib
+    import numpy as np
+
+    from src.steps.PlayerTracker import PlayerTracker
+    from src.steps.FeatureExtractor import FeatureExtractor
+    from src.steps.ChunkStitcher import ChunkStitcher
+    from src.steps.SegmentProcessor import extract_frame_players
+    from src.steps.ViewWorkerPool import ViewWorkerPool
+    from src.components.FrameExtractionStrategies import FfmpegPipeStrategy
+    from src.components.ModelStrategies import UltralyticsYoloModel, QuantizedTorchReIDModel
+    from src.components.ModelRegistry import model_registry
+    from utils.checkpoint_utils import CheckpointStore, file_digest, value_digest
+    from utils.feature_cache import save_cache
+
+    logger.info("Initializing all modules")
+    transformer_1 = build_transformer()
+    if args.parallel <= 1 and not args.shared_frames:
+        model_registry.warmup(UltralyticsYoloModel, QuantizedTorchReIDModel)
+
+    chunk_frames = max(1, int(args.chunk_seconds * args.fps))
+    store = CheckpointStore(args.checkpoints)
+    manifest = store.open({
+        "broadcast_video": str(settings.BROADCAST_VIDEO_PATH),
+        "tacticam_video": str(settings.TACTICAM_VIDEO_PATH),
+        "fps": args.fps,
+        "chunk_frames": chunk_frames,
+        "parallel_segments": args.parallel > 1,
+        "overlap_frames": int(args.overlap_seconds * args.fps) if args.parallel > 1 else 0,
+        "yolo_weights": file_digest(settings.PRETRAINED_YOLO_MODEL),
+        "reid_model": settings.TORCHREID_MODEL_NAME,
+        "reid_precision": settings.REID_PRECISION,
+        "homography": value_digest([BROADCAST_POINTS, TACTICAM_POINTS, [WIDTH, HEIGHT]]),
+    }, resume=args.resume)
+
+    if synchronizer is None and manifest["sync"] is not None:
+        synchronizer = build_synchronizer()
+        synchronizer.offset_frames, synchronizer.confidence = manifest["sync"]["offset_frames"], manifest["sync"]["confidence"]
+        logger.info(f"Reusing checkpointed offset: {synchronizer.offset_frames} frames")
+    elif synchronizer is None:
+        synchronizer = sync_command(args)
+    store.save_sync(synchronizer.offset_frames, synchronizer.confidence)
+
+    if args.parallel > 1:
+        return extract_parallel(args, synchronizer, store, chunk_frames)
+
+    logger.info("--- PHASE 1 : Extracting data from all frames ---")
+    chunk_index = store.next_chunk()
+    session = uuid.uuid4().hex
+    stack = contextlib.ExitStack()
+
+    if args.shared_frames:
+        """
+        The views are tracked in worker processes, the frames only go through shared memory.
+        ffmpeg pipes are read straight into the shared slots, with the offset already found.
+        """
+        pipe_synchronizer = build_synchronizer(FfmpegPipeStrategy)
+        pipe_synchronizer.offset_frames, pipe_synchronizer.confidence = synchronizer.offset_frames, synchronizer.confidence
+        transformer_points = (np.float32(BROADCAST_POINTS), np.float32(TACTICAM_POINTS), (WIDTH, HEIGHT))
+        pool = stack.enter_context(ViewWorkerPool(pipe_synchronizer, transformer_points))
+        player_stream = pool.extract(args.fps, start=chunk_index * chunk_frames)
+    else:
+        player_tracker = PlayerTracker(UltralyticsYoloModel)
+        feature_extractor = FeatureExtractor(QuantizedTorchReIDModel,UltralyticsYoloModel)
+        model_registry.report()
+        player_stream = (
+            extract_frame_players(player_tracker, feature_extractor, transformer_1, frame1, frame2)
+            for frame1, frame2 in synchronizer.get_synchronized_frames(fps=args.fps, start=chunk_index * chunk_frames)
+        )
+
+    def save_chunk(chunk_data):
+        store.save_chunk(chunk_index, {
+            "index": chunk_index, "session": session, "start_frame": chunk_index * chunk_frames, "frames": chunk_data,
+        })
+
+    chunk_data = []
+    with stack:
+        for frame_players in player_stream:
+            chunk_data.append(frame_players)
+            metrics.increment("frames")
+            metrics.maybe_report()
+
+            if len(chunk_data) == chunk_frames:
+                save_chunk(chunk_data)
+                chunk_index += 1
+                chunk_data = []
+
+    if chunk_data:
+        save_chunk(chunk_data)
 
-    matcher = CrossViewMatcher(settings.FEATURE_WEIGHTS, max_cost_threshold=0.75)
+    logger.info("--- PHASE 1: Data extraction Completed.")
+    metrics.report()
+    frames = ChunkStitcher().stitch(store.iter_chunks())
+    save_cache(args.features, frames)
+    return frames
+
+
+def extract_parallel(args, synchronizer, store, segment_frames):
+    """
+    PHASE 1 over --parallel worker processes : the synchronized timeline is split into segments
+    of --chunk-seconds overlapping by --overlap-seconds, every worker seeks to its own segment, and
+    the segments are merged on their overlaps.
+    """
+    import numpy as np
+
+    from src.steps.ChunkStitcher import ChunkStitcher
+    from src.steps.SegmentProcessor import plan_segments, extract_segments_parallel
+    from utils.feature_cache import save_cache
+
+    total_frames = synchronizer.count_synchronized_frames(args.fps)
+    segments = plan_segments(total_frames, segment_frames, int(args.overlap_seconds * args.fps))
+    logger.info(f"--- PHASE 1 : Extracting {total_frames} frames in {len(segments)} segments ---")
+
+    transformer_points = (np.float32(BROADCAST_POINTS), np.float32(TACTICAM_POINTS), (WIDTH, HEIGHT))
+    extract_segments_parallel(segments, store, args.fps, synchronizer.offset_frames, synchronizer.confidence,
+                              transformer_points, args.parallel)
+
+    logger.info("--- PHASE 1: Data extraction Completed.")
+    frames = ChunkStitcher().merge_overlapping(store.iter_chunks())
+    metrics.increment("frames", len(frames))
+    metrics.report()
+    save_cache(args.features, frames)
+    return frames
+
+
+def match_command(args, frames=None):
+    """Matches the players of both views frame by frame."""
+    from src.steps.CrossViewMatcher import CrossViewMatcher
+    from src.components.AssignmentSolvers import build_assignment_solver
+    from src.steps.TeamClassifier import TeamClassifier
+    from src.steps.TemporalSmoother import CostSmoother, TrackSmoother
+    from utils.feature_cache import load_cache, save_cache
+
+    if frames is None:
+        frames = load_cache(args.features)
+
+    logger.info("\n\nPHASE 2: Matching players...")
+    track_smoother = TrackSmoother() if args.smoothing else None
+    cost_smoother = CostSmoother(track_smoother) if args.smoothing else None
+    matcher = CrossViewMatcher(settings.FEATURE_WEIGHTS, max_cost_threshold=args.max_cost, cost_smoother=cost_smoother,
+                               solver=build_assignment_solver(args.solver))
+    team_classifier = TeamClassifier() if args.team_filter else None
+    frame_matches = []
+    for frame_index, frame_data in enumerate(frames):
+        if track_smoother is not None:
+            track_smoother.update(frame_index, frame_data)
+            cost_smoother.next_frame(frame_index)
+        if team_classifier is not None:
+            team_classifier.assign(frame_data)
+        players_1 = [p for p in frame_data if p["view"] == "broadcast"]
+        players_2 = [p for p in frame_data if p["view"] == "tacticam"]
+        frame_matches.append(matcher.match_players_with_costs(players_1, players_2))
+        metrics.maybe_report()
+
+    metrics.report()
+    save_cache(args.matches, frame_matches)
+    return frame_matches
+
+
+def open_output_writers(args, stack, frame_size) -> list:
+    """Opens the --writer outputs in `stack` (a contextlib.ExitStack)."""
+    from src.steps.OutputWriter import OutputWriter
+    from src.components.OutputWriterStrategies import (
+        FfmpegPipeWriterStrategy, OpenCVVideoWriterStrategy, TrajectoryWriterStrategy, ParquetTrajectoryWriterStrategy
+    )
+
+    output_writers = {
+        "ffmpeg": (FfmpegPipeWriterStrategy, args.output),
+        "opencv": (OpenCVVideoWriterStrategy, args.output),
+        "trajectory": (TrajectoryWriterStrategy, args.trajectories),
+        "parquet": (ParquetTrajectoryWriterStrategy, args.trajectories),
+    }
+
+    writers = []
+    for name in dict.fromkeys(args.writer):
+        strategy, output_path = output_writers[name]
+        writers.append(stack.enter_context(OutputWriter(output_path, strategy, args.fps, frame_size)))
+    return writers
+
+
+def render_command(args, frame_matches=None):
+    """
+    Assigns global IDs, draws the matched players on the field map and writes the outputs.
+
+    In 'headless' mode frames are written straight to the writers without any window or wait.
+    In 'preview' mode a live window is shown as well, throttled to --preview-fps.
+    When only data writers are selected (e.g. trajectory) nothing is rendered at all.
+    """
+    import contextlib
+
+    from src.IDManager import GlobalIdentityManager
+    from src.steps.Visualizer import LivePreview, UnifiedViewRenderer
+    from utils.feature_cache import load_cache
+
+    if frame_matches is None:
+        frame_matches = load_cache(args.matches)
+
+    logger.info(f"Visualizing results in {args.render_mode} mode with writers {args.writer}...")
+    output_resolution = (args.render_width, args.render_height) if args.render_width and args.render_height else None
+    renderer = UnifiedViewRenderer(load_field_map(), (WIDTH, HEIGHT), output_resolution)
+    id_manager = GlobalIdentityManager()
+    preview = LivePreview(target_fps=args.preview_fps) if args.render_mode == "preview" else None
+
+    with contextlib.ExitStack() as stack:
+        writers = open_output_writers(args, stack, renderer.output_resolution)
+        needs_frames = preview is not None or any(writer.needs_frames for writer in writers)
+
+        try:
+            for frame_index, (matched, match_costs, unmatched1, unmatched2) in enumerate(frame_matches):
+                records = id_manager.assign(matched, unmatched1, unmatched2, match_costs)
+                vis_frame = renderer.render_records(records) if needs_frames else None
+                for writer in writers:
+                    writer.write(frame_index, vis_frame, records)
+                metrics.maybe_report()
+                if preview is not None and not preview.show(vis_frame):
+                    break
+        finally:
+            if preview is not None:
+                preview.close()
+            metrics.report()
+
+    logger.info(f"Unified visualization saved to: {[str(writer.output_path) for writer in writers]}")
+
+
+def evaluate_command(args):
+    """
+    Scores matching and global IDs against the ground-truth annotations from the features cache,
+    for the current settings or for a grid over the costed feature weights x max_cost_threshold.
+    """
+    from src.steps.Sweeper import grid_search_space, sweep_features, log_results, run_sweep
+    from utils.feature_cache import load_cache
+
+    thresholds = args.thresholds or [args.max_cost]
+    if args.grid_step:
+        "Only CrossViewMatcher.COSTED_FEATURES reach the cost matrix, a grid dimension on pose would be wasted."
+        configs = grid_search_space(sweep_features(load_cache(args.features)), args.grid_step, thresholds)
+    else:
+        configs = [(settings.FEATURE_WEIGHTS, threshold) for threshold in thresholds]
+
+    results = run_sweep(args.features, configs, args.annotations, args.workers, args.evaluation_output)
+    log_results(results)
+    return results
+
+
+def sweep_command(args):
+    """
+    Sweeps the weights of the costed features x max_cost_threshold over a grid or a random search
+    space on the features cache. Configurations are ranked by matching F1 against the annotations.
+    """
+    from src.steps.Sweeper import grid_search_space, random_search_space, sweep_features, log_results, run_sweep
+    from utils.feature_cache import load_cache
+
+    if not args.annotations.exists():
+        logger.error(f"No annotations at {args.annotations}, configurations can't be ranked without ground truth.")
+        raise FileNotFoundError(f"Annotation file {args.annotations} does not exist.")
+
+    features = sweep_features(load_cache(args.features))
+    if args.search == "grid":
+        configs = grid_search_space(features, args.grid_step or 0.1, args.thresholds or [args.max_cost])
+    else:
+        configs = random_search_space(features, args.samples, tuple(args.threshold_range), args.seed)
+
+    logger.info(f"Sweeping {len(configs)} {args.search} configurations")
+    results = run_sweep(args.features, configs, args.annotations, args.workers, args.sweep_output)
+    log_results(results)
+    return results
+
+
+def live_command(args):
+    """
+    Runs the whole pipeline on two live sources (rtsp://, udp://, pipe: or files played at native speed).
+
+    Frames are paired by capture time, with --live-offset seconds between the sources instead of a
+    read-ahead synchronization, the leading source buffering its lead. Latency counts from the later
+    capture of a pair : pairs older than --latency-budget when processing starts are dropped, and the
+    capture-to-output latency of every frame is reported as 'live.capture_to_output'.
+    """
+    import time
+    import contextlib
+
+    from src.IDManager import GlobalIdentityManager
+    from src.steps.FrameExtractor import FrameExtractor
+    from src.steps.Synchronizer import Synchronizer
+    from src.steps.PlayerTracker import PlayerTracker
+    from src.steps.FeatureExtractor import FeatureExtractor
+    from src.steps.CrossViewMatcher import CrossViewMatcher
+    from src.components.AssignmentSolvers import build_assignment_solver
+    from src.steps.TeamClassifier import TeamClassifier
+    from src.steps.TemporalSmoother import CostSmoother, TrackSmoother
+    from src.steps.SegmentProcessor import extract_frame_players
+    from src.steps.Visualizer import LivePreview, UnifiedViewRenderer
+    from src.components.FrameExtractionStrategies import LiveStreamStrategy
+    from src.components.ModelStrategies import UltralyticsYoloModel, QuantizedTorchReIDModel
+
+    frame_size = tuple(args.live_frame_size) if args.live_frame_size else None
+    synchronizer = Synchronizer(
+        FrameExtractor(args.broadcast_source, LiveStreamStrategy, frame_size=frame_size),
+        FrameExtractor(args.tacticam_source, LiveStreamStrategy, frame_size=frame_size),
+    )
+    transformer = build_transformer()
+    player_tracker = PlayerTracker(UltralyticsYoloModel)
+    feature_extractor = FeatureExtractor(QuantizedTorchReIDModel, UltralyticsYoloModel)
+    track_smoother = TrackSmoother() if args.smoothing else None
+    cost_smoother = CostSmoother(track_smoother) if args.smoothing else None
+    matcher = CrossViewMatcher(settings.FEATURE_WEIGHTS, max_cost_threshold=args.max_cost, cost_smoother=cost_smoother,
+                               solver=build_assignment_solver(args.solver))
+    team_classifier = TeamClassifier() if args.team_filter else None
     id_manager = GlobalIdentityManager()
-    
 
+    output_resolution = (args.render_width, args.render_height) if args.render_width and args.render_height else None
+    renderer = UnifiedViewRenderer(load_field_map(), (WIDTH, HEIGHT), output_resolution)
+    preview = LivePreview(target_fps=args.preview_fps) if args.render_mode == "preview" else None
+
+    logger.info(f"--- LIVE : {args.broadcast_source} + {args.tacticam_source}, latency budget {args.latency_budget}s ---")
+    with contextlib.ExitStack() as stack:
+        writers = open_output_writers(args, stack, renderer.output_resolution)
+        needs_frames = preview is not None or any(writer.needs_frames for writer in writers)
+        frame_index = 0
+
+        try:
+            for captured_at, frame1, frame2 in synchronizer.get_live_frames(args.fps, offset_sec=args.live_offset):
+                if time.time() - captured_at > args.latency_budget:
+                    metrics.increment("live.stale_dropped")
+                    continue
+
+                frame_data = extract_frame_players(player_tracker, feature_extractor, transformer, frame1, frame2)
+                if track_smoother is not None:
+                    track_smoother.update(frame_index, frame_data)
+                    cost_smoother.next_frame(frame_index)
+                if team_classifier is not None:
+                    team_classifier.assign(frame_data)
+                players_1 = [p for p in frame_data if p["view"] == "broadcast"]
+                players_2 = [p for p in frame_data if p["view"] == "tacticam"]
+
+                matched, match_costs, unmatched1, unmatched2 = matcher.match_players_with_costs(players_1, players_2)
+                records = id_manager.assign(matched, unmatched1, unmatched2, match_costs)
+                for record in records:
+                    record["timestamp"] = captured_at
+                vis_frame = renderer.render_records(records) if needs_frames else None
+                for writer in writers:
+                    writer.write(frame_index, vis_frame, records)
+
+                latency = time.time() - captured_at
+                metrics.observe("live.capture_to_output", latency)
+                if latency > args.latency_budget:
+                    metrics.increment("live.over_budget")
+                metrics.increment("frames")
+                metrics.maybe_report()
+                frame_index += 1
+
+                if preview is not None and not preview.show(vis_frame):
+                    break
+        except KeyboardInterrupt:
+            logger.info("Live ingestion stopped.")
+        finally:
+            if preview is not None:
+                preview.close()
+            metrics.report()
+
+
+def run_command(args):
+    """Runs the full pipeline : sync -> extract -> match -> render."""
     try:
-        synchronizer.sync()
-        field_map = cv2.imread("field.jpg")
-        field_map = cv2.resize(field_map, (width, height))
-        logger.info(
-            f"Calculated Offset: {synchronizer.offset_frames} frames, Confidence: {synchronizer.confidence:.4f} "
-        )
+        synchronizer = sync_command(args)
     except Exception as e:
         logger.error(f"Could not perform synchronization: {e}")
         logger.error(traceback.format_exc())
         return
-    
-    logger.info("--- PHASE 1 : Extracting data from all frames ---")
+
     try:
-        all_player_data_by_frame = collections.defaultdict(list)
-        frame_index = 0
-        for frame1, frame2 in synchronizer.get_synchronized_frames(fps=10):
-
-            tracked_players_v1 = player_tracker.track_players(frame1)
-            for box, track_id, conf in tracked_players_v1:
-                features = feature_extractor.extract_features(frame1,box,transformer_1)
-                all_player_data_by_frame[frame_index].append({"view": "broadcast", "track_id": track_id, "features": features})   
-
-            tracked_players_v2 = player_tracker.track_players(frame2)
-            for box, track_id, conf in tracked_players_v2:
-                features = feature_extractor.extract_features(frame2,box,transformer_1)
-                all_player_data_by_frame[frame_index].append({"view": "tacticam", "track_id": track_id, "features": features})
-
-            frame_index += 1
-
-        logger.info("--- PHASE 1: Data extraction Completed.")
-
-        logger.info("\n\nPHASE 2: Matching players and visualizing results...")
-        result_saver = cv2.VideoWriter_fourcc(*'mp4v')
-        result_video = cv2.VideoWriter(str(settings.OUTPUT_PATH), result_saver, 10, (field_map.shape[1], field_map.shape[0]))
-        for i in range(frame_index):
-            frame_data = all_player_data_by_frame[i]
-            players_1 = [p for p in frame_data if p["view"] == "broadcast"]
-            players_2 = [p for p in frame_data if p["view"] == "tacticam"]
-
-            matched, unmatched1, unmatched2 = matcher.match_players_in_frame(players_1, players_2)
-
-            vis_frame = draw_unified_view(matched, unmatched1, unmatched2, id_manager, field_map)
-            cv2.imshow("Unified Top-Down View", vis_frame)
-            result_video.write(vis_frame)
-            if cv2.waitKey(1000) & 0xFF == ord('q'): 
-                break
-            
+        frames = extract_command(args, synchronizer=synchronizer)
+        frame_matches = match_command(args, frames=frames)
+        render_command(args, frame_matches=frame_matches)
         logger.info("Execution Completed.")
     except Exception as e:
         logger.error(f"An error occurred during synchronized streaming: {e}")
         logger.error(traceback.format_exc())
-    finally:
-        result_video.release()
-        logger.info(f"Unified visualization saved to: {settings.OUTPUT_PATH}")
-        cv2.destroyAllWindows()    
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Cross-Camera Player Mapping pipeline")
+    subparsers = parser.add_subparsers(dest="command")
+
+    commands = {
+        "sync": (sync_command, "Compute the offset between both videos"),
+        "calibrate": (calibrate_command, "Select homography points interactively"),
+        "calibrate-reid": (calibrate_reid_command, "Cache Re-ID calibration crops and check a reduced precision"),
+        "extract": (extract_command, "Track players and extract features (PHASE 1)"),
+        "match": (match_command, "Match players across views from extracted features"),
+        "render": (render_command, "Render the unified top-down view from matches"),
+        "evaluate": (evaluate_command, "Score matching against ground-truth annotations"),
+        "sweep": (sweep_command, "Sweep matcher weights and thresholds on cached features"),
+        "run": (run_command, "Run the full pipeline"),
+        "live": (live_command, "Run the pipeline on live sources with a latency budget"),
+    }
+    for name, (handler, help_text) in commands.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.set_defaults(handler=handler)
+        subparser.add_argument("--fps", type=int, default=10, help="Processing and output frame rate")
+        subparser.add_argument("--features", type=Path, default=settings.FEATURES_CACHE_PATH, help="Extracted features cache")
+        subparser.add_argument("--matches", type=Path, default=settings.MATCHES_CACHE_PATH, help="Per-frame matches cache")
+        subparser.add_argument("--output", type=Path, default=settings.OUTPUT_PATH, help="Output video path")
+        subparser.add_argument("--max-cost", type=float, default=0.75, help="Maximum matching cost")
+        subparser.add_argument("--solver", choices=("auto", "hungarian", "sparse", "greedy"), default=settings.ASSIGNMENT_SOLVER,
+                               help="Assignment solver of the cross view matching")
+        subparser.add_argument("--checkpoints", type=Path, default=settings.CHECKPOINT_PATH, help="Extraction checkpoint directory")
+        subparser.add_argument("--chunk-seconds", type=float, default=settings.CHUNK_SECONDS, help="Seconds of synchronized frames per checkpointed chunk")
+        subparser.add_argument("--resume", action=argparse.BooleanOptionalAction, default=True,
+                               help="Resume extraction from the last completed chunk of the checkpoint directory")
+        subparser.add_argument("--parallel", type=int, default=settings.EXTRACT_WORKERS,
+                               help="Worker processes extracting overlapping segments of the match in parallel")
+        subparser.add_argument("--overlap-seconds", type=float, default=settings.SEGMENT_OVERLAP_SECONDS,
+                               help="Overlap between parallel segments, used to merge their track IDs")
+        subparser.add_argument("--shared-frames", action=argparse.BooleanOptionalAction, default=settings.SHARED_FRAMES,
+                               help="Track each view in a worker process fed with frames through shared memory")
+        subparser.add_argument("--team-filter", action=argparse.BooleanOptionalAction, default=settings.TEAM_FILTER,
+                               help="Cluster players into teams and only match players of the same team")
+        subparser.add_argument("--smoothing", action=argparse.BooleanOptionalAction, default=settings.SMOOTHING,
+                               help="Kalman filter field coordinates per track and smooth matching costs over time")
+        subparser.add_argument("--writer", action="append", choices=("ffmpeg", "opencv", "trajectory", "parquet"),
+                               help=f"Output writer, can be repeated (default: {settings.OUTPUT_WRITER})")
+        subparser.add_argument("--trajectories", type=Path, default=settings.TRAJECTORY_PATH, help="Trajectory output directory")
+        subparser.add_argument("--render-mode", choices=("headless", "preview"), default=settings.RENDER_MODE,
+                               help="headless: no window and no waits, preview: also show a throttled live window")
+        subparser.add_argument("--render-width", type=int, default=settings.RENDER_WIDTH, help="Output video width (defaults to the field width)")
+        subparser.add_argument("--render-height", type=int, default=settings.RENDER_HEIGHT, help="Output video height (defaults to the field height)")
+        subparser.add_argument("--preview-fps", type=float, default=settings.PREVIEW_FPS, help="Target fps of the live preview")
+
+    for name in ("evaluate", "sweep"):
+        subparser = subparsers.choices[name]
+        subparser.add_argument("--annotations", type=Path, default=settings.ANNOTATIONS_PATH, help="Ground-truth correspondences CSV")
+        subparser.add_argument("--grid-step", type=float, default=None, help="Evaluate every FEATURE_WEIGHTS combination on this step")
+        subparser.add_argument("--thresholds", type=float, nargs="+", default=None, help="max_cost_threshold values to evaluate")
+        subparser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to the CPU count)")
+
+    evaluate_parser = subparsers.choices["evaluate"]
+    evaluate_parser.add_argument("--evaluation-output", type=Path, default=settings.EVALUATION_PATH, help="Evaluation results JSON")
+
+    live_parser = subparsers.choices["live"]
+    live_parser.add_argument("--broadcast-source", default=settings.LIVE_BROADCAST_SOURCE, help="Broadcast stream URL, pipe: or file")
+    live_parser.add_argument("--tacticam-source", default=settings.LIVE_TACTICAM_SOURCE, help="Tacticam stream URL, pipe: or file")
+    live_parser.add_argument("--live-offset", type=float, default=settings.LIVE_OFFSET_SEC, help="Seconds the tacticam stream lags the broadcast stream")
+    live_parser.add_argument("--live-frame-size", type=int, nargs=2, default=settings.LIVE_FRAME_SIZE, metavar=("WIDTH", "HEIGHT"),
+                             help="Scale the live frames to this size, required for pipe: sources")
+    live_parser.add_argument("--latency-budget", type=float, default=settings.LIVE_LATENCY_BUDGET_SEC, help="Maximum capture-to-output latency in seconds")
+
+    calibrate_reid_parser = subparsers.choices["calibrate-reid"]
+    calibrate_reid_parser.add_argument("--calibration-crops", type=Path, default=settings.REID_CALIBRATION_CROPS, help="Calibration crops cache")
+    calibrate_reid_parser.add_argument("--calibration-frames", type=int, default=50, help="Synchronized frames to collect crops from")
+    calibrate_reid_parser.add_argument("--precision", choices=("fp32", "fp16", "int8_static"), default=settings.REID_PRECISION,
+                                       help="Reduced precision to check against the float model on the crops")
+
+    sweep_parser = subparsers.choices["sweep"]
+    sweep_parser.add_argument("--search", choices=("grid", "random"), default="grid", help="Search space of the sweep")
+    sweep_parser.add_argument("--samples", type=int, default=100, help="Number of random configurations")
+    sweep_parser.add_argument("--threshold-range", type=float, nargs=2, default=(0.4, 0.9), help="Random max_cost_threshold range")
+    sweep_parser.add_argument("--seed", type=int, default=0, help="Seed of the random search")
+    sweep_parser.add_argument("--sweep-output", type=Path, default=settings.SWEEP_PATH, help="Sweep results JSON")
+
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the application"""
+
+    logger.info(f"\n\n\n\n")
+    logger.info("-------------------------Starting application------------------------------------")
+
+    parser = build_parser()
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0].startswith("-") and argv[0] not in ("-h", "--help"):
+        argv = ["run"] + argv
+
+    args = parser.parse_args(argv)
+    args.writer = args.writer or [settings.OUTPUT_WRITER]
+
+    return args.handler(args)
 
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
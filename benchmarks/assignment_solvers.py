@@ -0,0 +1,126 @@
+"""
+Assignment solver benchmark.
+
+Times every solver of src/components/AssignmentSolvers.py on synthetic cross view cost
+matrices and measures how often its matches agree with the exact dense Hungarian solver, per
+detection count and scenario :
+
+- confident : clear matches, every true pair is much cheaper than the other candidates.
+- ambiguous : noisy costs, many candidates below the threshold.
+- teams     : ambiguous costs with three teams, cross team pairs at TEAM_MISMATCH_COST.
+
+'legacy' is the previous behavior (dense Hungarian on the raw costs, threshold applied after).
+
+    python -m benchmarks.assignment_solvers
+    python -m benchmarks.assignment_solvers --detections 10 50 200 --repeat 50 --json solvers.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+MAX_COST = 0.75
+TEAM_MISMATCH_COST = 1e6
+
+SCENARIOS = {
+    "confident": {"true_cost": (0.05, 0.25), "other_cost": (0.6, 1.5), "teams": 1},
+    "ambiguous": {"true_cost": (0.1, 0.6), "other_cost": (0.3, 1.2), "teams": 1},
+    "teams": {"true_cost": (0.1, 0.6), "other_cost": (0.3, 1.2), "teams": 3},
+}
+
+
+def synthetic_cost_matrix(detections :int, scenario :dict, rng :np.random.Generator) -> np.ndarray:
+    """Costs between the players seen by both views, each player being visible in a view with 90% probability."""
+    visible_1 = np.flatnonzero(rng.random(detections) > 0.1)
+    visible_2 = np.flatnonzero(rng.random(detections) > 0.1)
+    teams = rng.integers(scenario["teams"], size=detections)
+
+    costs = rng.uniform(*scenario["other_cost"], size=(detections, detections))
+    costs[np.diag_indices(detections)] = rng.uniform(*scenario["true_cost"], size=detections)
+    costs[teams[:, None] != teams[None, :]] = TEAM_MISMATCH_COST
+    return costs[np.ix_(visible_1, visible_2)]
+
+
+def legacy_solve(cost_matrix :np.ndarray, max_cost :float):
+    from scipy.optimize import linear_sum_assignment
+
+    rows, cols = linear_sum_assignment(cost_matrix)
+    keep = cost_matrix[rows, cols] < max_cost
+    return rows[keep], cols[keep]
+
+
+def agreement(pairs :set, reference :set) -> float:
+    """Shared matches over the matches of the larger of both assignments, 1.0 when both are empty."""
+    return len(pairs & reference) / max(len(pairs), len(reference), 1)
+
+
+def run(detection_counts :list, repeat :int, seed :int) -> dict:
+    from src.components.AssignmentSolvers import ASSIGNMENT_SOLVERS
+
+    solvers = {name: solver().solve for name, solver in ASSIGNMENT_SOLVERS.items()}
+    solvers["legacy"] = legacy_solve
+    reference = solvers["hungarian"]
+
+    results = {}
+    for scenario_name, scenario in SCENARIOS.items():
+        for detections in detection_counts:
+            rng = np.random.default_rng(seed + detections)
+            matrices = [synthetic_cost_matrix(detections, scenario, rng) for _ in range(repeat)]
+            references = [set(zip(*map(np.ndarray.tolist, reference(matrix, MAX_COST)))) for matrix in matrices]
+
+            for name, solve in solvers.items():
+                timings, agreements, objective_gaps = [], [], []
+                for matrix, expected in zip(matrices, references):
+                    start = time.perf_counter()
+                    rows, cols = solve(matrix, MAX_COST)
+                    timings.append(time.perf_counter() - start)
+
+                    agreements.append(agreement(set(zip(rows.tolist(), cols.tolist())), expected))
+                    "Objective of the thresholded problem, 0 for no match at all (lower is better)."
+                    objective = float(np.sum(matrix[rows, cols] - MAX_COST))
+                    expected_objective = float(sum(matrix[r, c] - MAX_COST for r, c in expected))
+                    objective_gaps.append(objective - expected_objective)
+
+                results[f"{scenario_name}/{detections}/{name}"] = {
+                    "scenario": scenario_name,
+                    "detections": detections,
+                    "solver": name,
+                    "median_us": float(np.median(timings) * 1e6),
+                    "p95_us": float(np.percentile(timings, 95) * 1e6),
+                    "agreement": float(np.mean(agreements)),
+                    "mean_objective_gap": float(np.mean(objective_gaps)),
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detections", type=int, nargs="+", default=[5, 10, 22, 50, 100, 200], help="Players per view")
+    parser.add_argument("--repeat", type=int, default=20, help="Cost matrices per scenario and detection count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.detections, args.repeat, args.seed)
+    print(f"{'scenario':10s} {'players':>7s} {'solver':10s} {'median (us)':>12s} {'p95 (us)':>10s} {'agreement':>10s} {'objective gap':>14s}")
+    for stats in results.values():
+        print(
+            f"{stats['scenario']:10s} {stats['detections']:7d} {stats['solver']:10s} {stats['median_us']:12.1f} "
+            f"{stats['p95_us']:10.1f} {stats['agreement']:10.3f} {stats['mean_objective_gap']:14.4f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
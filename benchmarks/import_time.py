@@ -0,0 +1,72 @@
+"""
+Import-time benchmark.
+
+Measures, in fresh interpreters, how long it takes to import each pipeline module and
+to start the CLI, so regressions in lazy loading show up as numbers.
+
+    python -m benchmarks.import_time [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    "src.config": "import src.config",
+    "src.steps.Synchronizer": "import src.steps.Synchronizer",
+    "src.steps.CrossViewMatcher": "import src.steps.CrossViewMatcher",
+    "src.steps.FeatureExtractor": "import src.steps.FeatureExtractor",
+    "src.steps.PlayerTracker": "import src.steps.PlayerTracker",
+    "src.components.ModelStrategies": "import src.components.ModelStrategies",
+    "application": "import application",
+    "cli --help": "import application; application.build_parser().format_help()",
+    "heavy: torch + torchreid + ultralytics": "import torch, torchreid, ultralytics",
+}
+
+
+def measure(statement :str, repeat :int) -> list:
+    """Returns wall times in seconds of running `statement` in a fresh interpreter."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", statement], cwd=ROOT, capture_output=True)
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            return []
+        timings.append(elapsed)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path, default=None, help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    baseline = measure("pass", args.repeat)
+    interpreter_startup = statistics.median(baseline)
+
+    results = {}
+    print(f"{'target':45s} {'median (ms)':>12s} {'min (ms)':>10s}")
+    for name, statement in TARGETS.items():
+        timings = measure(statement, args.repeat)
+        if not timings:
+            print(f"{name:45s} {'failed':>12s}")
+            continue
+        median = (statistics.median(timings) - interpreter_startup) * 1000
+        minimum = (min(timings) - interpreter_startup) * 1000
+        results[name] = {"median_ms": median, "min_ms": minimum}
+        print(f"{name:45s} {median:12.1f} {minimum:10.1f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Reproducible end-to-end benchmark suite on synthetic two-camera footage.
+
+Each stage (sync, extraction, tracking stub, features, matching, rendering) and the full
+pipeline runs in a fresh process, so peak resident memory is measured per stage.
+Results are compared against benchmarks/baseline.json. Runs on CPU only, without network.
+
+The baseline holds the stage results and the environment they were recorded on. It must be
+recorded on the reference CPU machine : comparing on another environment is only indicative,
+and a stage without baseline is reported with a warning, not as a regression.
+
+    python -m benchmarks.run_benchmarks                     # run and compare against the baseline
+    python -m benchmarks.run_benchmarks --update-baseline   # store the current results as baseline
+    python -m benchmarks.run_benchmarks --stages matching rendering
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_FIXTURE_DIR = Path(__file__).resolve().parent / ".fixtures"
+PIPELINE_FPS = 10
+
+logger = logging.getLogger("benchmarks")
+
+
+def _build_transformers(fixture :dict) -> dict:
+    from src.steps.ViewTransformer import ViewTransformer
+
+    return {
+        view: ViewTransformer(np.float32(corners), np.float32(fixture["field_corners"]), tuple(fixture["field_size"]))
+        for view, corners in fixture["image_corners"].items()
+    }
+
+
+def _decode_frames(video_path :str, limit :int | None = None) -> list:
+    from src.steps.FrameExtractor import FrameExtractor
+    from src.components.FrameExtractionStrategies import FfmpegcvCPUStrategy
+
+    frames = []
+    with FrameExtractor(Path(video_path), FfmpegcvCPUStrategy) as extractor:
+        for frame in extractor.extract(frames_per_second=PIPELINE_FPS):
+            frames.append(frame)
+            if limit is not None and len(frames) >= limit:
+                break
+    return frames
+
+
+def _synthetic_players(fixture :dict, positions :np.ndarray, rng :np.random.Generator) -> list:
+    """Per-frame player data for both views built from the ground truth, with noise."""
+    num_players = fixture["num_players"]
+    identities = rng.normal(size=(num_players, 512))
+    team_histograms = {team: rng.random(48) for team in set(fixture["teams"])}
+
+    frames = []
+    for frame_positions in positions:
+        frame_data = []
+        for view, track_offset in (("broadcast", 0), ("tacticam", 100)):
+            visible = rng.random(num_players) > 0.1
+            for player in np.flatnonzero(visible):
+                frame_data.append({
+                    "view": view,
+                    "track_id": int(player + track_offset),
+                    "features": {
+                        "appearance": identities[player] + rng.normal(scale=0.3, size=512),
+                        "color_hist": team_histograms[fixture["teams"][player]] + rng.normal(scale=0.02, size=48).clip(0),
+                        "field_coords": frame_positions[player] + rng.normal(scale=3.0, size=2),
+                        "pose": np.zeros(34),
+                    },
+                })
+        frames.append(frame_data)
+    return frames
+
+
+def bench_sync(fixture :dict) -> dict:
+    from src.steps.FrameExtractor import FrameExtractor
+    from src.steps.Synchronizer import Synchronizer
+    from src.components.FrameExtractionStrategies import FfmpegcvCPUStrategy
+
+    synchronizer = Synchronizer(
+        FrameExtractor(Path(fixture["videos"]["broadcast"]), FfmpegcvCPUStrategy),
+        FrameExtractor(Path(fixture["videos"]["tacticam"]), FfmpegcvCPUStrategy),
+    )
+    start = time.perf_counter()
+    synchronizer.sync()
+    elapsed = time.perf_counter() - start
+
+    expected = int(round(fixture["offset_sec"] * PIPELINE_FPS))
+    return {
+        "latencies": [elapsed],
+        "extra": {"offset_frames": synchronizer.offset_frames, "expected_offset_frames": expected,
+                  "offset_error": abs(synchronizer.offset_frames - expected), "confidence": synchronizer.confidence},
+    }
+
+
+def bench_extraction(fixture :dict) -> dict:
+    from src.steps.FrameExtractor import FrameExtractor
+    from src.components.FrameExtractionStrategies import FfmpegcvCPUStrategy
+
+    latencies = []
+    with FrameExtractor(Path(fixture["videos"]["broadcast"]), FfmpegcvCPUStrategy) as extractor:
+        start = time.perf_counter()
+        for _ in extractor.extract(frames_per_second=PIPELINE_FPS):
+            now = time.perf_counter()
+            latencies.append(now - start)
+            start = now
+    return {"latencies": latencies}
+
+
+def bench_tracking(fixture :dict) -> dict:
+    from benchmarks.stubs import BlobTrackerStub
+
+    frames = _decode_frames(fixture["videos"]["broadcast"])
+    tracker = BlobTrackerStub()
+    latencies, detections = [], 0
+    for frame in frames:
+        start = time.perf_counter()
+        detections += len(tracker.track_players(frame))
+        latencies.append(time.perf_counter() - start)
+    return {"latencies": latencies, "extra": {"detections_per_frame": detections / max(len(frames), 1)}}
+
+
+def bench_features(fixture :dict) -> dict:
+    from benchmarks.stubs import BlobTrackerStub, NoPoseModelStub, offline_reid_model
+    from src.steps.FeatureExtractor import FeatureExtractor
+
+    frames = _decode_frames(fixture["videos"]["broadcast"], limit=30)
+    transformer = _build_transformers(fixture)["broadcast"]
+    tracker = BlobTrackerStub()
+    feature_extractor = FeatureExtractor(offline_reid_model(), NoPoseModelStub())
+
+    latencies = []
+    for frame in frames:
+        for box, track_id, conf in tracker.track_players(frame):
+            start = time.perf_counter()
+            feature_extractor.extract_features(frame, box, transformer)
+            latencies.append(time.perf_counter() - start)
+    return {"latencies": latencies, "extra": {"unit": "player"}}
+
+
+def bench_matching(fixture :dict) -> dict:
+    from benchmarks.synthetic import ground_truth_positions
+    from src.config import settings
+    from src.steps.CrossViewMatcher import CrossViewMatcher
+
+    rng = np.random.default_rng(fixture["seed"])
+    frames = _synthetic_players(fixture, ground_truth_positions(fixture, PIPELINE_FPS), rng)
+    matcher = CrossViewMatcher(settings.FEATURE_WEIGHTS, max_cost_threshold=0.75)
+
+    latencies, correct, total = [], 0, 0
+    for frame_data in frames:
+        players_1 = [p for p in frame_data if p["view"] == "broadcast"]
+        players_2 = [p for p in frame_data if p["view"] == "tacticam"]
+        start = time.perf_counter()
+        matched, _, _ = matcher.match_players_in_frame(players_1, players_2)
+        latencies.append(time.perf_counter() - start)
+        correct += sum(p1["track_id"] + 100 == p2["track_id"] for p1, p2 in matched)
+        total += len(matched)
+    return {"latencies": latencies, "extra": {"match_precision": correct / max(total, 1)}}
+
+
+def bench_rendering(fixture :dict) -> dict:
+    from benchmarks.synthetic import draw_pitch, ground_truth_positions
+    from src.steps.Visualizer import UnifiedViewRenderer
+
+    renderer = UnifiedViewRenderer(draw_pitch(), tuple(fixture["field_size"]))
+    latencies = []
+    for frame_positions in ground_truth_positions(fixture, PIPELINE_FPS):
+        records = [
+            {"global_id": 1000 + i, "field_coords": position, "matched": i % 3 != 0}
+            for i, position in enumerate(frame_positions)
+        ]
+        start = time.perf_counter()
+        renderer.render_records(records)
+        latencies.append(time.perf_counter() - start)
+    return {"latencies": latencies}
+
+
+def bench_pipeline(fixture :dict) -> dict:
+    import tempfile
+
+    from benchmarks.stubs import BlobTrackerStub, NoPoseModelStub, offline_reid_model
+    from benchmarks.synthetic import draw_pitch
+    from src.config import settings
+    from src.IDManager import GlobalIdentityManager
+    from src.steps.CrossViewMatcher import CrossViewMatcher
+    from src.steps.FeatureExtractor import FeatureExtractor
+    from src.steps.FrameExtractor import FrameExtractor
+    from src.steps.OutputWriter import OutputWriter
+    from src.steps.Synchronizer import Synchronizer
+    from src.steps.Visualizer import UnifiedViewRenderer
+    from src.components.FrameExtractionStrategies import FfmpegcvCPUStrategy
+    from src.components.OutputWriterStrategies import OpenCVVideoWriterStrategy
+
+    transformers = _build_transformers(fixture)
+    trackers = {"broadcast": BlobTrackerStub(), "tacticam": BlobTrackerStub()}
+    feature_extractor = FeatureExtractor(offline_reid_model(), NoPoseModelStub())
+    matcher = CrossViewMatcher(settings.FEATURE_WEIGHTS, max_cost_threshold=0.75)
+    id_manager = GlobalIdentityManager()
+    renderer = UnifiedViewRenderer(draw_pitch(), tuple(fixture["field_size"]))
+    synchronizer = Synchronizer(
+        FrameExtractor(Path(fixture["videos"]["broadcast"]), FfmpegcvCPUStrategy),
+        FrameExtractor(Path(fixture["videos"]["tacticam"]), FfmpegcvCPUStrategy),
+    )
+
+    wall_start = time.perf_counter()
+    synchronizer.sync()
+    latencies = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        with OutputWriter(Path(output_dir) / "out.mp4", OpenCVVideoWriterStrategy, PIPELINE_FPS, renderer.output_resolution) as writer:
+            start = time.perf_counter()
+            for frame_index, (frame1, frame2) in enumerate(synchronizer.get_synchronized_frames(fps=PIPELINE_FPS)):
+                players = {"broadcast": [], "tacticam": []}
+                for view, frame in (("broadcast", frame1), ("tacticam", frame2)):
+                    tracked = trackers[view].track_players(frame)
+                    features = feature_extractor.extract_frame_features(frame, [box for box, _, _ in tracked], transformers[view])
+                    for (box, track_id, conf), player_features in zip(tracked, features):
+                        players[view].append({"view": view, "track_id": track_id, "features": player_features})
+
+                matched, costs, unmatched1, unmatched2 = matcher.match_players_with_costs(players["broadcast"], players["tacticam"])
+                records = id_manager.assign(matched, unmatched1, unmatched2, costs)
+                writer.write(frame_index, renderer.render_records(records), records)
+
+                now = time.perf_counter()
+                latencies.append(now - start)
+                start = now
+
+    return {"latencies": latencies, "extra": {"wall_sec_including_sync": time.perf_counter() - wall_start}}
+
+
+STAGES = {
+    "sync": bench_sync,
+    "extraction": bench_extraction,
+    "tracking": bench_tracking,
+    "features": bench_features,
+    "matching": bench_matching,
+    "rendering": bench_rendering,
+    "pipeline": bench_pipeline,
+}
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_stage(name :str, fixture :dict) -> dict:
+    """Runs one stage in the current (fresh) process and summarizes it."""
+    logging.disable(logging.WARNING)
+    result = STAGES[name](fixture)
+    latencies = np.asarray(result["latencies"], dtype=np.float64)
+    total = float(latencies.sum())
+    return {
+        "items": int(latencies.size),
+        "throughput_per_sec": latencies.size / total if total > 0 else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies.size else 0.0,
+        "p95_ms": float(np.percentile(latencies, 95) * 1000) if latencies.size else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        **result.get("extra", {}),
+    }
+
+
+def environment() -> dict:
+    """Description of the machine the benchmarks run on, stored with the baseline."""
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "system": platform.system(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(results :dict, baseline :dict, tolerance :float) -> list:
+    """Returns the list of regressions beyond `tolerance` (relative) against the baseline."""
+    regressions = []
+    for stage, current in results.items():
+        if "error" in current:
+            continue
+        reference = baseline["stages"].get(stage)
+        if reference is None:
+            logger.warning(f"{stage}: no baseline recorded, run --update-baseline on the reference machine")
+            continue
+        if reference["throughput_per_sec"] and current["throughput_per_sec"] < reference["throughput_per_sec"] * (1 - tolerance):
+            regressions.append(f"{stage}: throughput {current['throughput_per_sec']:.2f}/s < baseline {reference['throughput_per_sec']:.2f}/s")
+        if reference["p95_ms"] and current["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p95 {current['p95_ms']:.1f}ms > baseline {reference['p95_ms']:.1f}ms")
+        if reference["peak_rss_mb"] and current["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{stage}: peak RSS {current['peak_rss_mb']:.0f}MB > baseline {reference['peak_rss_mb']:.0f}MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--fixture-dir", type=Path, default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument("--duration", type=float, default=10.0, help="Synthetic clip duration in seconds")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate the synthetic fixture")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--output", type=Path, default=None, help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from benchmarks.synthetic import generate_synthetic_match
+
+    fixture_path = args.fixture_dir / "fixture.json"
+    if args.regenerate or not fixture_path.exists():
+        fixture = generate_synthetic_match(args.fixture_dir, duration_sec=args.duration)
+    else:
+        fixture = json.loads(fixture_path.read_text())
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for stage in args.stages:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                results[stage] = executor.submit(_run_stage, stage, fixture).result()
+            except Exception as e:
+                results[stage] = {"error": str(e)}
+                logger.error(f"{stage}: failed with {e}")
+                continue
+        stats = results[stage]
+        logger.info(
+            f"{stage:12s} n={stats['items']:5d} throughput={stats['throughput_per_sec']:9.2f}/s "
+            f"p50={stats['p50_ms']:8.2f}ms p95={stats['p95_ms']:8.2f}ms peak_rss={stats['peak_rss_mb']:7.0f}MB"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"environment": None, "stages": {}}
+    if baseline["environment"] is not None and baseline["environment"] != environment():
+        logger.warning(f"Baseline recorded on {baseline['environment']}, running on {environment()} : timings are only indicative.")
+
+    if args.update_baseline:
+        baseline["environment"] = environment()
+        baseline["stages"].update({stage: stats for stage, stats in results.items() if "error" not in stats})
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        logger.info(f"Baseline updated at {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        logger.warning(f"REGRESSION {regression}")
+    if not regressions:
+        logger.info("No regression against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
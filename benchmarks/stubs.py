@@ -0,0 +1,77 @@
+"""
+Offline stand-ins for the detection models, used by the benchmarks on synthetic footage.
+"""
+
+import cv2
+import numpy as np
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional
+
+from src.interfaces.ModelInterface import ModelInterface
+
+
+class BlobTrackerStub:
+    """
+    Tracking stub with the PlayerTracker.track_players interface.
+
+    Detects saturated, non-grass blobs and associates them with the previous frame
+    by nearest centroid.
+    """
+
+    def __init__(self, min_area :int = 30, max_distance :float = 40.0):
+        self.min_area = min_area
+        self.max_distance = max_distance
+        self._tracks : dict = {}
+        self._next_id = 1
+
+
+    def track_players(self, frame :np.ndarray, confidence_threshold :float = 0.4) -> List:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        hue, saturation, value = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+        mask = ((saturation > 120) & (value > 80) & ((hue < 35) | (hue > 85))).astype(np.uint8)
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask)
+
+        detections = []
+        tracks = {}
+        unused = dict(self._tracks)
+        for label in range(1, count):
+            x, y, w, h, area = stats[label]
+            if area < self.min_area:
+                continue
+            centroid = centroids[label]
+            track_id = None
+            if unused:
+                candidates = list(unused.items())
+                distances = [np.linalg.norm(centroid - previous) for _, previous in candidates]
+                best = int(np.argmin(distances))
+                if distances[best] < self.max_distance:
+                    track_id = candidates[best][0]
+                    del unused[track_id]
+            if track_id is None:
+                track_id = self._next_id
+                self._next_id += 1
+
+            tracks[track_id] = centroid
+            detections.append((np.array([x, y, x + w, y + h], dtype=np.float32), track_id, 1.0))
+
+        self._tracks = tracks
+        return detections
+
+
+class NoPoseModelStub(ModelInterface):
+    """Pose model stub : returns no keypoints, like the detection-only YOLO weights."""
+
+    def __init__(self, model_path :Optional[Path] = None, device :Optional[str] = "cpu"):
+        self.device = device
+        self.model = lambda frame, **kwargs: [SimpleNamespace(keypoints=None)]
+
+
+def offline_reid_model(device :str = "cpu") -> ModelInterface:
+    """
+    The real Re-ID architecture with random weights, so embedding latency is representative
+    without downloading the pretrained weights.
+    """
+    from src.components.ModelStrategies import TorchReIDModel
+
+    return TorchReIDModel(device=device, pretrained=False)
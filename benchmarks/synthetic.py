@@ -0,0 +1,150 @@
+"""
+Synthetic two-camera footage for benchmarks.
+
+Renders a top-down pitch with moving colored player blobs and projects it into two camera
+views with known homographies. The second camera starts `offset_sec` earlier than the first,
+so the expected synchronizer offset is known. Everything is generated locally (no network).
+"""
+
+import json
+import logging
+import cv2
+import numpy as np
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FIELD_SIZE = (1050, 680)
+"""Canonical top-down field in pixels (10 px per meter)."""
+
+CAMERA_SIZE = (1280, 720)
+
+"""Field corners -> image corners of each camera, in (x, y) order."""
+FIELD_CORNERS = [[0, 0], [1050, 0], [1050, 680], [0, 680]]
+BROADCAST_CORNERS = [[260, 260], [1020, 260], [1250, 700], [30, 700]]
+TACTICAM_CORNERS = [[120, 80], [1160, 80], [1240, 690], [40, 690]]
+
+TEAM_COLORS = {
+    "team_a": (40, 40, 220),
+    "team_b": (220, 80, 30),
+    "referee": (30, 220, 240),
+}
+
+
+def draw_pitch() -> np.ndarray:
+    """Renders the top-down pitch (grass stripes and white lines)."""
+    width, height = FIELD_SIZE
+    pitch = np.zeros((height, width, 3), dtype=np.uint8)
+    for stripe, x in enumerate(range(0, width, 75)):
+        pitch[:, x:x + 75] = (40, 140, 40) if stripe % 2 == 0 else (50, 160, 50)
+
+    white = (255, 255, 255)
+    cv2.rectangle(pitch, (5, 5), (width - 6, height - 6), white, 3)
+    cv2.line(pitch, (width // 2, 5), (width // 2, height - 6), white, 3)
+    cv2.circle(pitch, (width // 2, height // 2), 91, white, 3)
+    cv2.rectangle(pitch, (5, height // 2 - 200), (170, height // 2 + 200), white, 3)
+    cv2.rectangle(pitch, (width - 170, height // 2 - 200), (width - 6, height // 2 + 200), white, 3)
+    return pitch
+
+
+def player_positions(num_players :int, num_frames :int, fps :float, start_frame :int = 0, seed :int = 0) -> np.ndarray:
+    """
+    Smooth, deterministic player trajectories in field pixels.
+
+    Returns:
+        An array of shape (num_frames, num_players, 2).
+    """
+    rng = np.random.default_rng(seed)
+    width, height = FIELD_SIZE
+    base = rng.uniform([150, 100], [width - 150, height - 100], size=(num_players, 2))
+    amplitude = rng.uniform(30, 120, size=(num_players, 2))
+    frequency = rng.uniform(0.05, 0.3, size=(num_players, 2))
+    phase = rng.uniform(0, 2 * np.pi, size=(num_players, 2))
+
+    t = (np.arange(num_frames) + start_frame)[:, None, None] / fps
+    positions = base + amplitude * np.sin(2 * np.pi * frequency * t + phase)
+    return np.clip(positions, [20, 20], [width - 20, height - 20])
+
+
+def player_teams(num_players :int) -> list:
+    teams = ["team_a" if i % 2 == 0 else "team_b" for i in range(num_players)]
+    teams[-1] = "referee"
+    return teams
+
+
+def render_camera_frame(background :np.ndarray, homography :np.ndarray, positions :np.ndarray, teams :list) -> np.ndarray:
+    """Projects the players' feet into the camera and draws each player as an upright blob."""
+    frame = background.copy()
+    feet = cv2.perspectiveTransform(positions[None].astype(np.float32), homography)[0]
+    height = frame.shape[0]
+
+    order = np.argsort(feet[:, 1])
+    for index in order:
+        x, y = feet[index]
+        scale = 0.4 + 0.8 * y / height
+        box_w, box_h = int(14 * scale), int(40 * scale)
+        top_left = (int(x - box_w / 2), int(y - box_h))
+        bottom_right = (int(x + box_w / 2), int(y))
+        cv2.rectangle(frame, top_left, bottom_right, TEAM_COLORS[teams[index]], -1)
+        cv2.rectangle(frame, (top_left[0], int(y - box_h * 0.35)), bottom_right, (20, 20, 20), -1)
+    return frame
+
+
+def generate_synthetic_match(output_dir :Path, duration_sec :float = 10.0, fps :float = 30.0,
+                             num_players :int = 23, offset_sec :float = 0.9, seed :int = 0) -> dict:
+    """
+    Writes broadcast.mp4, tacticam.mp4 and fixture.json into `output_dir`.
+
+    The tacticam video starts `offset_sec` before the broadcast video, so frame
+    `k + offset_sec * fps` of the tacticam video shows the same instant as frame `k` of the broadcast video.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fixture_path = output_dir / "fixture.json"
+
+    num_frames = int(duration_sec * fps)
+    offset_frames = int(round(offset_sec * fps))
+    teams = player_teams(num_players)
+    pitch = draw_pitch()
+
+    homographies = {
+        "broadcast": cv2.getPerspectiveTransform(np.float32(FIELD_CORNERS), np.float32(BROADCAST_CORNERS)),
+        "tacticam": cv2.getPerspectiveTransform(np.float32(FIELD_CORNERS), np.float32(TACTICAM_CORNERS)),
+    }
+    start_frames = {"broadcast": 0, "tacticam": -offset_frames}
+    frame_counts = {"broadcast": num_frames, "tacticam": num_frames + offset_frames}
+
+    for view, homography in homographies.items():
+        background = cv2.warpPerspective(pitch, homography, CAMERA_SIZE, borderValue=(90, 90, 90))
+        positions = player_positions(num_players, frame_counts[view], fps, start_frames[view], seed)
+        writer = cv2.VideoWriter(str(output_dir / f"{view}.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), fps, CAMERA_SIZE)
+        for frame_positions in positions:
+            writer.write(render_camera_frame(background, homography, frame_positions, teams))
+        writer.release()
+
+    fixture = {
+        "fps": fps,
+        "num_frames": num_frames,
+        "num_players": num_players,
+        "offset_sec": offset_sec,
+        "offset_frames": offset_frames,
+        "seed": seed,
+        "teams": teams,
+        "field_size": FIELD_SIZE,
+        "camera_size": CAMERA_SIZE,
+        "videos": {view: str(output_dir / f"{view}.mp4") for view in homographies},
+        "homographies": {view: homography.tolist() for view, homography in homographies.items()},
+        "field_corners": FIELD_CORNERS,
+        "image_corners": {"broadcast": BROADCAST_CORNERS, "tacticam": TACTICAM_CORNERS},
+    }
+    fixture_path.write_text(json.dumps(fixture, indent=2))
+    logger.info(f"Generated synthetic match ({num_frames} frames, offset {offset_frames} frames) in {output_dir}")
+    return fixture
+
+
+def ground_truth_positions(fixture :dict, fps :float) -> np.ndarray:
+    """Broadcast-timeline player positions sampled at `fps`, shape (frames, players, 2)."""
+    step = fixture["fps"] / fps
+    num_frames = int(fixture["num_frames"] / step)
+    positions = player_positions(fixture["num_players"], fixture["num_frames"], fixture["fps"], 0, fixture["seed"])
+    return positions[(np.arange(num_frames) * step).astype(int)]
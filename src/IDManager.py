@@ -1,13 +1,24 @@
-import logging 
+import logging
+import numpy as np
+from collections import OrderedDict
+
+from src.config import settings
+from utils.metrics_util import metrics
 
 logger = logging.getLogger(__name__)
 
 class GlobalIdentityManager:
     """
     Manages the mapping from view-specific track IDs to a global ID.
+
+    Global IDs of two tracks that turn out to be the same player are merged (union-find).
+    New track IDs are re-attached to a dormant global ID when their appearance embedding and
+    field position are close to its last known ones, and tracks that were not seen for
+    `expiry_frames` frames are forgotten, so memory stays bounded over a full match.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, expiry_frames :int = settings.ID_EXPIRY_FRAMES, reattach_max_cost :float = settings.ID_REATTACH_MAX_COST,
+                 reattach_max_distance :float = settings.ID_REATTACH_MAX_DISTANCE, embedding_momentum :float = 0.9) -> None:
         self.next_global_id :int = 1000
         self.id_map = dict()
         """
@@ -17,22 +28,155 @@ class GlobalIdentityManager:
         """
         reverse_map = {global_id : [(view_name, track_id)]}
         """
+        self.parent = dict()
+        """
+        parent = {merged_global_id : global_id it was merged into}
+        """
+        self.merged = dict()
+        """
+        merged = {global_id : [global_ids merged into it]}, used to forget them on expiry
+        """
+        self.identities = dict()
+        """
+        identities = {global_id : {"last_seen", "views_seen", "field_coords", "embedding"}}
+        """
+        self.last_seen = OrderedDict()
+        """
+        last_seen = {(view_name, track_id) : frame}, least recently seen first
+        """
+        self.frame_index :int = 0
+        self.expiry_frames = expiry_frames
+        self.reattach_max_cost = reattach_max_cost
+        self.reattach_max_distance = reattach_max_distance
+        self.embedding_momentum = embedding_momentum
+
+
+    def resolve(self, global_id :int) -> int:
+        """Returns the global ID that `global_id` was (transitively) merged into."""
+        root = global_id
+        while root in self.parent:
+            root = self.parent[root]
+        while global_id != root:
+            self.parent[global_id], global_id = root, self.parent[global_id]
+        return root
+
+
+    def _new_identity(self, keys :list) -> int:
+        new_id = self.next_global_id
+        self.next_global_id += 1
+        self.reverse_map[new_id] = []
+        self.identities[new_id] = {"last_seen": self.frame_index, "views_seen": {}, "field_coords": None, "embedding": None}
+        for key in keys:
+            self._attach(key, new_id)
+        return new_id
+
 
-        
+    def _attach(self, key :tuple, global_id :int) -> None:
+        self.id_map[key] = global_id
+        self.reverse_map[global_id].append(key)
+        self._touch(key, global_id)
 
-    def get_global_id(self, view_name :str , track_id : int) -> int:
+
+    def _touch(self, key :tuple, global_id :int) -> None:
+        self.last_seen[key] = self.frame_index
+        self.last_seen.move_to_end(key)
+        identity = self.identities[global_id]
+        identity["last_seen"] = self.frame_index
+        identity["views_seen"][key[0]] = self.frame_index
+
+
+    def _lookup(self, key :tuple) -> int | None:
+        global_id = self.id_map.get(key)
+        if global_id is not None:
+            self._touch(key, global_id)
+        return global_id
+
+
+    def _seen_together(self, global_id_1 :int, global_id_2 :int) -> bool:
+        """Two identities seen in the same view in the current frame are different players."""
+        views_1 = self.identities[global_id_1]["views_seen"]
+        views_2 = self.identities[global_id_2]["views_seen"]
+        return any(frame == self.frame_index and views_2.get(view) == self.frame_index for view, frame in views_1.items())
+
+
+    def merge(self, global_id_1 :int, global_id_2 :int) -> int:
         """
-        Gets the global ID for a view-specific track. If not found, creates a new one.
+        Merges two global IDs into the oldest one and returns it.
         """
-        if(view_name, track_id) in self.id_map:
-            return self.id_map[(view_name, track_id)]
-        else:
-            new_id = self.next_global_id
-            self.id_map[(view_name, track_id)] = new_id
-            self.reverse_map[new_id] = [(view_name, track_id)]
-            self.next_global_id += 1
-            return new_id
-        
+        root_1, root_2 = self.resolve(global_id_1), self.resolve(global_id_2)
+        if root_1 == root_2:
+            return root_1
+        root, other = min(root_1, root_2), max(root_1, root_2)
+
+        self.parent[other] = root
+        self.merged.setdefault(root, []).extend([other] + self.merged.pop(other, []))
+        for key in self.reverse_map.pop(other):
+            self.id_map[key] = root
+            self.reverse_map[root].append(key)
+
+        identity, merged_identity = self.identities[root], self.identities.pop(other)
+        if merged_identity["last_seen"] >= identity["last_seen"]:
+            identity["field_coords"] = merged_identity["field_coords"] if merged_identity["field_coords"] is not None else identity["field_coords"]
+        identity["last_seen"] = max(identity["last_seen"], merged_identity["last_seen"])
+        for view, frame in merged_identity["views_seen"].items():
+            identity["views_seen"][view] = max(frame, identity["views_seen"].get(view, frame))
+        if identity["embedding"] is None:
+            identity["embedding"] = merged_identity["embedding"]
+        elif merged_identity["embedding"] is not None:
+            identity["embedding"] = _normalize(identity["embedding"] + merged_identity["embedding"])
+
+        metrics.increment("identity.merges")
+        logger.info(f"Merged Global_ID: {other} into Global_ID: {root}")
+        return root
+
+
+    def _find_dormant(self, view_name :str, features :dict) -> int | None:
+        """
+        Best global ID not seen in `view_name` in the current frame whose last embedding and field
+        position are within the re-attach gates.
+
+        This scans the live identities, which expire() bounds to those seen within `expiry_frames`
+        frames : the players on the pitch and the recently lost ones, a few dozen per match, not
+        the whole history. It only runs for tracks without a global ID, not for every known track.
+        """
+        embedding = features.get("appearance")
+        field_coords = features.get("field_coords")
+        if embedding is None or field_coords is None:
+            return None
+        embedding = _normalize(np.asarray(embedding, dtype=np.float32))
+
+        best_id, best_cost = None, self.reattach_max_cost
+        for global_id, identity in self.identities.items():
+            if identity["views_seen"].get(view_name) == self.frame_index or identity["embedding"] is None or identity["field_coords"] is None:
+                continue
+            distance = float(np.linalg.norm(np.asarray(field_coords) - identity["field_coords"]))
+            if distance > self.reattach_max_distance:
+                continue
+            cost = 0.5 * (1.0 - float(embedding @ identity["embedding"])) + 0.5 * distance / self.reattach_max_distance
+            if cost < best_cost:
+                best_id, best_cost = global_id, cost
+        return best_id
+
+
+    def get_global_id(self, view_name :str , track_id : int, features :dict | None = None) -> int:
+        """
+        Gets the global ID for a view-specific track. If not found, re-attaches it to a dormant
+        global ID matching its `features` or creates a new one.
+        """
+        key = (view_name, track_id)
+        global_id = self._lookup(key)
+        if global_id is not None:
+            return global_id
+
+        dormant_id = self._find_dormant(view_name, features) if features else None
+        if dormant_id is not None:
+            self._attach(key, dormant_id)
+            metrics.increment("identity.reattached")
+            logger.info(f"Re-attached Player {track_id} in {view_name} to Global_ID: {dormant_id}")
+            return dormant_id
+
+        return self._new_identity([key])
+
 
     def register(self, player1_data, player2_data) -> int:
         """
@@ -41,25 +185,113 @@ class GlobalIdentityManager:
         key_1 = (player1_data['view'], player1_data['track_id'])
         key_2 = (player2_data['view'], player2_data['track_id'])
 
-        global_id_1 = self.id_map.get(key_1)
-        global_id_2 = self.id_map.get(key_2)
+        global_id_1 = self._lookup(key_1)
+        global_id_2 = self._lookup(key_2)
 
         if global_id_1 is not None and global_id_2 is not None:
-            "This case shouldn't happen often with good tracking."
-            return global_id_1
+            if global_id_1 == global_id_2:
+                return global_id_1
+            if self._seen_together(global_id_1, global_id_2):
+                "Both identities are visible in the same view right now, so the match is not trusted."
+                logger.debug(f"Conflicting match between Global_ID: {global_id_1} and Global_ID: {global_id_2}")
+                metrics.increment("identity.conflicts")
+                return global_id_1
+            return self.merge(global_id_1, global_id_2)
         elif global_id_1 is not None:
-            self.id_map[key_2] = global_id_1
+            self._attach(key_2, global_id_1)
             return global_id_1
         elif global_id_2 is not None:
-            self.id_map[key_1] = global_id_2
+            self._attach(key_1, global_id_2)
             return global_id_2
         else:
-            new_id = self.next_global_id
-            self.id_map[key_1] = new_id
-            self.id_map[key_2] = new_id
-            self.reverse_map[new_id] = [key_1, key_2]
-            self.next_global_id += 1
+            dormant_id = self._find_dormant(key_1[0], player1_data.get('features', {}))
+            if dormant_id is not None and self.identities[dormant_id]["views_seen"].get(key_2[0]) != self.frame_index:
+                self._attach(key_1, dormant_id)
+                self._attach(key_2, dormant_id)
+                metrics.increment("identity.reattached")
+                return dormant_id
+            new_id = self._new_identity([key_1, key_2])
             logger.info(f"Assigned new Global_ID: {new_id} to Player 1:{key_1[1]} and Player 2:{key_2[1]}")
             return new_id
 
-        
\ No newline at end of file
+
+    def _observe(self, global_id :int, field_coords, embedding) -> None:
+        identity = self.identities[global_id]
+        identity["field_coords"] = np.asarray(field_coords, dtype=np.float32)
+        if embedding is None:
+            return
+        embedding = _normalize(np.asarray(embedding, dtype=np.float32))
+        if identity["embedding"] is None:
+            identity["embedding"] = embedding
+        else:
+            identity["embedding"] = _normalize(self.embedding_momentum * identity["embedding"] + (1 - self.embedding_momentum) * embedding)
+
+
+    def expire(self) -> None:
+        """Forgets the tracks not seen for `expiry_frames` frames, and global IDs left without tracks."""
+        horizon = self.frame_index - self.expiry_frames
+        while self.last_seen:
+            key, frame = next(iter(self.last_seen.items()))
+            if frame >= horizon:
+                break
+            del self.last_seen[key]
+            global_id = self.id_map.pop(key)
+            keys = self.reverse_map[global_id]
+            keys.remove(key)
+            if not keys:
+                del self.reverse_map[global_id]
+                del self.identities[global_id]
+                for merged_id in self.merged.pop(global_id, []):
+                    self.parent.pop(merged_id, None)
+                metrics.increment("identity.expired")
+
+
+    def assign(self, matched_pairs :list, unmatched1 :list, unmatched2 :list, match_costs :list | None = None) -> list:
+        """
+        Assigns global IDs to all players of a frame.
+
+        Returns:
+            A list of records, one per global player, with keys global_id, field_coords,
+            matched, match_cost (None when unmatched) and the track id of each view it was seen in
+            (broadcast_track_id / tacticam_track_id).
+        """
+        records = []
+        match_costs = match_costs if match_costs is not None else [None] * len(matched_pairs)
+
+        "Known tracks are marked as seen first, so new tracks can't be re-attached to an identity visible in this frame."
+        for p in [p for pair in matched_pairs for p in pair] + unmatched1 + unmatched2:
+            self._lookup((p['view'], p['track_id']))
+
+        for (p1, p2), cost in zip(matched_pairs, match_costs):
+            records.append({
+                "global_id": self.register(p1, p2),
+                "field_coords": (p1['features']['field_coords'] + p2['features']['field_coords']) / 2,
+                "matched": True,
+                "match_cost": cost,
+                f"{p1['view']}_track_id": p1['track_id'],
+                f"{p2['view']}_track_id": p2['track_id'],
+            })
+            embeddings = [p['features'].get('appearance') for p in (p1, p2) if p['features'].get('appearance') is not None]
+            self._observe(records[-1]["global_id"], records[-1]["field_coords"], np.mean(embeddings, axis=0) if embeddings else None)
+
+        for p in unmatched1 + unmatched2:
+            records.append({
+                "global_id": self.get_global_id(p['view'], p['track_id'], p['features']),
+                "field_coords": p['features']['field_coords'],
+                "matched": False,
+                "match_cost": None,
+                f"{p['view']}_track_id": p['track_id'],
+            })
+            self._observe(records[-1]["global_id"], records[-1]["field_coords"], p['features'].get('appearance'))
+
+        "Merges later in the frame may have replaced IDs of earlier records."
+        for record in records:
+            record["global_id"] = self.resolve(record["global_id"])
+
+        self.frame_index += 1
+        self.expire()
+        return records
+
+
+def _normalize(vector :np.ndarray, eps :float = 1e-12) -> np.ndarray:
+    return vector / max(float(np.linalg.norm(vector)), eps)
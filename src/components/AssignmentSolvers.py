@@ -0,0 +1,151 @@
+import logging
+from typing import Tuple
+import numpy as np
+
+from src.config import settings
+from src.interfaces.AssignmentSolverInterface import AssignmentSolver
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+"""
+Here we will implement the assignment solvers of the cross view matcher.
+
+All of them solve the same thresholded problem (see AssignmentSolver) : the dense and sparse
+solvers are exact, the greedy one is an approximation, and the auto solver picks the cheapest
+exact one for every cost matrix.
+"""
+
+
+def _no_match() -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+
+class HungarianSolver(AssignmentSolver):
+    """
+    Dense Hungarian algorithm (scipy linear_sum_assignment) on the candidate rows and columns,
+    costs being clipped at max_cost : a pair at max_cost is worth as much as no match.
+    """
+
+    name = "hungarian"
+
+    def solve(self, cost_matrix :np.ndarray, max_cost :float) -> Tuple[np.ndarray, np.ndarray]:
+        from scipy.optimize import linear_sum_assignment
+
+        candidates = cost_matrix < max_cost
+        rows = np.flatnonzero(candidates.any(axis=1))
+        cols = np.flatnonzero(candidates.any(axis=0))
+        if rows.size == 0:
+            return _no_match()
+
+        gated = np.minimum(cost_matrix[np.ix_(rows, cols)], max_cost)
+        row_ind, col_ind = linear_sum_assignment(gated)
+        keep = gated[row_ind, col_ind] < max_cost
+        return rows[row_ind[keep]], cols[col_ind[keep]]
+
+
+class SparseLAPJVSolver(AssignmentSolver):
+    """
+    Sparse LAPJV (scipy min_weight_full_bipartite_matching) on the gated candidate pairs only.
+
+    A full matching must exist, so every player also gets a dummy partner at max_cost / 2
+    (two unmatched players are worth max_cost, as one pair at max_cost), and the dummies are
+    paired together through the transposed candidate edges. That keeps the graph at
+    2 * candidates + M + N edges instead of the dense M x N.
+    """
+
+    name = "sparse"
+
+    def solve(self, cost_matrix :np.ndarray, max_cost :float) -> Tuple[np.ndarray, np.ndarray]:
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+        candidate_rows, candidate_cols = np.nonzero(cost_matrix < max_cost)
+        if candidate_rows.size == 0:
+            return _no_match()
+
+        m, n = cost_matrix.shape
+        costs = cost_matrix[candidate_rows, candidate_cols].astype(np.float64)
+        rows = np.concatenate([candidate_rows, np.arange(m), m + np.arange(n), m + candidate_cols])
+        cols = np.concatenate([candidate_cols, n + np.arange(m), np.arange(n), n + candidate_rows])
+        weights = np.concatenate([costs, np.full(m + n, max_cost / 2), np.zeros(candidate_rows.size)])
+        "Strictly positive weights, so no edge is read as missing. Every full matching has m + n edges, the shift doesn't change the optimum."
+        weights += 1.0 - min(weights.min(), 0.0)
+
+        graph = coo_matrix((weights, (rows, cols)), shape=(m + n, n + m)).tocsr()
+        row_ind, col_ind = min_weight_full_bipartite_matching(graph)
+        keep = (row_ind < m) & (col_ind < n)
+        return row_ind[keep], col_ind[keep]
+
+
+class GreedySolver(AssignmentSolver):
+    """
+    Matches the candidate pairs by increasing cost, skipping players already matched.
+    Approximate, but close to the optimum when the matches are clear.
+    """
+
+    name = "greedy"
+
+    def solve(self, cost_matrix :np.ndarray, max_cost :float) -> Tuple[np.ndarray, np.ndarray]:
+        candidate_rows, candidate_cols = np.nonzero(cost_matrix < max_cost)
+        order = np.argsort(cost_matrix[candidate_rows, candidate_cols], kind="stable")
+
+        used_rows, used_cols, rows, cols = set(), set(), [], []
+        for r, c in zip(candidate_rows[order].tolist(), candidate_cols[order].tolist()):
+            if r in used_rows or c in used_cols:
+                continue
+            used_rows.add(r)
+            used_cols.add(c)
+            rows.append(r)
+            cols.append(c)
+        return np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)
+
+
+class AutoAssignmentSolver(AssignmentSolver):
+    """
+    Picks an exact solver per cost matrix :
+
+    - confident frames, where the cheapest candidate of every player of view 1 is a different
+      player of view 2 : matching every row to its minimum is optimal, as no assignment can do
+      better than the row minima, so no solver runs at all.
+    - large matrices with few candidates left by the gate (e.g. team mismatches) : sparse LAPJV.
+    - otherwise the dense Hungarian algorithm.
+    """
+
+    name = "auto"
+
+    def __init__(self, sparse_min_size :int = settings.ASSIGNMENT_SPARSE_MIN_SIZE,
+                 sparse_max_density :float = settings.ASSIGNMENT_SPARSE_MAX_DENSITY):
+        self.sparse_min_size = sparse_min_size
+        self.sparse_max_density = sparse_max_density
+        self.hungarian = HungarianSolver()
+        self.sparse = SparseLAPJVSolver()
+
+
+    def solve(self, cost_matrix :np.ndarray, max_cost :float) -> Tuple[np.ndarray, np.ndarray]:
+        candidates = cost_matrix < max_cost
+        rows = np.flatnonzero(candidates.any(axis=1))
+        if rows.size == 0:
+            return _no_match()
+
+        best_cols = np.argmin(np.where(candidates[rows], cost_matrix[rows], np.inf), axis=1)
+        if np.unique(best_cols).size == best_cols.size:
+            metrics.increment("matcher.solver.row_minima")
+            return rows, best_cols
+
+        density = np.count_nonzero(candidates) / candidates.size
+        solver = self.sparse if min(cost_matrix.shape) >= self.sparse_min_size and density <= self.sparse_max_density else self.hungarian
+        metrics.increment(f"matcher.solver.{solver.name}")
+        return solver.solve(cost_matrix, max_cost)
+
+
+ASSIGNMENT_SOLVERS = {
+    solver.name: solver for solver in (AutoAssignmentSolver, HungarianSolver, SparseLAPJVSolver, GreedySolver)
+}
+
+
+def build_assignment_solver(name :str = settings.ASSIGNMENT_SOLVER) -> AssignmentSolver:
+    if name not in ASSIGNMENT_SOLVERS:
+        logger.error(f"Unknown assignment solver '{name}', expected one of {list(ASSIGNMENT_SOLVERS)}.")
+        raise ValueError(f"Unknown assignment solver '{name}'.")
+    return ASSIGNMENT_SOLVERS[name]()
@@ -1,9 +1,19 @@
-from typing import Iterator, Optional
+from typing import Callable, Iterator, Optional, Tuple
+import cv2
+import json
+import math
+import time
+import shutil
 import ffmpegcv
+import threading
+import subprocess
+import collections
 import numpy as np
 from pathlib import Path
 import logging
 
+from src.config import settings
+
 from src.interfaces.FrameExtractorInterface import FrameExtractingStrategy
 
 logger = logging.getLogger(__name__)
@@ -13,6 +23,71 @@ We will implement Stratagies for frame extraction.
 """
 
 
+def sample_by_timestamp(decoded_frames :Iterator[Tuple[float, Callable[[], Optional[np.ndarray]]]],
+                        frames_per_second :float, source_fps :float) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Selects, from the (timestamp, retrieve) pairs of every decoded frame, the first frame at or
+    after each multiple of 1 / frames_per_second past the first timestamp.
+
+    Unlike keeping every n-th frame, the output rate is exact for non-integer rate ratios
+    (e.g. 29.97 to 10 FPS) and for variable frame rate sources. `retrieve()` returns the
+    frame, it is only called for selected frames.
+    """
+    step = 1.0 / frames_per_second
+    slack = 0.5 / source_fps
+    """Half a source frame, so timestamp rounding never skips the frame on a sampling instant."""
+    target = None
+
+    for timestamp, retrieve in decoded_frames:
+        if target is None:
+            target = timestamp
+        if timestamp + slack < target:
+            continue
+
+        frame = retrieve()
+        if frame is None:
+            logger.warning(f"Could not retrieve the frame at {timestamp:.3f}s.")
+            break
+        logger.debug(f"Yielding frame at {timestamp:.3f}s")
+        yield timestamp, frame
+        "Sampling instants missed by a gap in the source are skipped, not caught up."
+        target += step * (math.floor((timestamp + slack - target) / step) + 1)
+
+
+def probe_video(video_path) -> Optional[dict]:
+    """width, height, fps and frame_count (0 when unknown) of the first video stream, from ffprobe."""
+    if shutil.which("ffprobe") is None:
+        logger.error("ffprobe was not found on PATH.")
+        return None
+    command = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height,avg_frame_rate,nb_frames",
+               "-of", "json", str(video_path)]
+    try:
+        stream = json.loads(subprocess.run(command, capture_output=True, timeout=30, check=True).stdout)["streams"][0]
+    except Exception as e:
+        logger.error(f"Could not probe '{video_path}': {e}")
+        return None
+    numerator, _, denominator = stream.get("avg_frame_rate", "0/1").partition("/")
+    denominator = float(denominator or 1)
+    return {
+        "width": int(stream["width"]),
+        "height": int(stream["height"]),
+        "fps": float(numerator) / denominator if denominator else 0.0,
+        "frame_count": int(stream.get("nb_frames") or 0),
+    }
+
+
+def read_exactly_into(stream, buffer :np.ndarray) -> bool:
+    """Fills the contiguous `buffer` from a binary stream with readinto, False on end of stream."""
+    view = memoryview(buffer).cast("B")
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+
 class FfmpegcvCPUStrategy(FrameExtractingStrategy):
     """
     Concrete frame extraction strategy using ffmpegcv with CPU decoding.
@@ -42,7 +117,12 @@ class FfmpegcvCPUStrategy(FrameExtractingStrategy):
             self._video_capture = None
     
 
-    def get_frames(self, frames_per_second: int) -> Iterator[np.ndarray]:
+    def get_timed_frames(self, frames_per_second :float) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        ffmpegcv does not expose presentation timestamps, so they are derived from the frame
+        number and the nominal frame rate (exact for constant frame rate sources).
+        Variable frame rate sources should be read with OpenCVSeekingStrategy.
+        """
         if not self.is_opened:
             logger.error("Video source is not open. Call open_video_source() first.")
             raise RuntimeError("Video source is not open. Call open_video_source() first.")
@@ -51,28 +131,135 @@ class FfmpegcvCPUStrategy(FrameExtractingStrategy):
         if source_fps == 0:
             logger.error("The FPS of source video couldn't be determined")
             raise ValueError("The FPS of source video couldn't be determined")
-        
-        frame_interval = int(source_fps/ frames_per_second)
-        frame_counter = 0
 
-        while self.is_opened:
-            ret, frame = self._video_capture.read()
+        def decoded_frames():
+            frame_counter = 0
+            while self.is_opened:
+                ret, frame = self._video_capture.read()
+                if not ret:
+                    logger.info("End of video stream reached.")
+                    break
+                yield frame_counter / source_fps, lambda frame=frame: frame
+                frame_counter += 1
+
+        yield from sample_by_timestamp(decoded_frames(), frames_per_second, source_fps)
+
+
+    def get_frames(self, frames_per_second: int) -> Iterator[np.ndarray]:
+        for _, frame in self.get_timed_frames(frames_per_second):
+            yield frame
+
+
+    @property
+    def fps(self) -> float:
+        return self._video_capture.fps if self._video_capture else 0.0
+
+
+    @property
+    def is_opened(self) -> bool:
+        return self._video_capture is not None and self._video_capture.isOpened()
+
+
+    @property
+    def frame_count(self) -> int:
+        return int(getattr(self._video_capture, "count", 0) or 0) if self._video_capture else 0
+
+
+    @property
+    def frame_size(self) -> Optional[Tuple[int, int]]:
+        return (int(self._video_capture.width), int(self._video_capture.height)) if self._video_capture else None
+
+
+class OpenCVSeekingStrategy(FrameExtractingStrategy):
+    """
+    Concrete frame extraction strategy using OpenCV decoding, able to seek directly to a frame.
+    Used by the parallel segment workers, which each start decoding at their own segment.
+    """
+
+    def __init__(self, video_path : Path):
+        self.video_path :Path = video_path
+        self._video_capture : Optional[cv2.VideoCapture] = None
+
+
+    def open_video_source(self) -> bool:
+        logger.info(f"Attempting to open '{self.video_path}' with OpenCV.")
+        self._video_capture = cv2.VideoCapture(str(self.video_path))
+        if not self._video_capture.isOpened():
+            logger.error(f"OpenCV could not open '{self.video_path}'")
+            self._video_capture = None
+            return False
+        return True
 
+
+    def close_video_source(self) -> bool:
+        if self._video_capture:
+            logger.debug("Releasing video capture source.")
+            self._video_capture.release()
+            self._video_capture = None
+
+
+    def seek(self, frame_number :int) -> bool:
+        if not self.is_opened:
+            logger.error("Video source is not open. Call open_video_source() first.")
+            raise RuntimeError("Video source is not open. Call open_video_source() first.")
+        return bool(self._video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number))
+
+
+    def get_timed_frames(self, frames_per_second :float) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Timestamps are the presentation timestamps reported by the decoder, so variable frame
+        rate sources are sampled correctly. Frames that are not selected are grabbed, not decoded.
+        """
+        if not self.is_opened:
+            logger.error("Video source is not open. Call open_video_source() first.")
+            raise RuntimeError("Video source is not open. Call open_video_source() first.")
+
+        source_fps = self.fps
+        if source_fps == 0:
+            logger.error("The FPS of source video couldn't be determined")
+            raise ValueError("The FPS of source video couldn't be determined")
+
+        yield from sample_by_timestamp(self._grabbed_frames(self._retrieve), frames_per_second, source_fps)
+
+
+    def get_timed_frames_into(self, frames_per_second :float, pool) -> Iterator[Tuple[float, int]]:
+        """Selected frames are decoded straight into a slot of `pool`, without any copy."""
+        if not self.is_opened:
+            logger.error("Video source is not open. Call open_video_source() first.")
+            raise RuntimeError("Video source is not open. Call open_video_source() first.")
+
+        def retrieve_into() -> Optional[int]:
+            slot = pool.acquire(timeout=settings.SHARED_FRAME_TIMEOUT_SEC)
+            ret, _ = self._video_capture.retrieve(pool.frame(slot))
             if not ret:
+                pool.release(slot)
+                return None
+            return slot
+
+        yield from sample_by_timestamp(self._grabbed_frames(retrieve_into), frames_per_second, self.fps)
+
+
+    def _grabbed_frames(self, retrieve :Callable) -> Iterator[Tuple[float, Callable]]:
+        while self.is_opened:
+            if not self._video_capture.grab():
                 logger.info("End of video stream reached.")
                 break
+            yield self._video_capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, retrieve
+
 
-            if frame_counter % frame_interval == 0:
-                logger.debug(f"Yeilding frame number {frame_counter}")
-                yield frame
-            
-            frame_counter += 1
+    def _retrieve(self) -> Optional[np.ndarray]:
+        ret, frame = self._video_capture.retrieve()
+        return frame if ret else None
+
+
+    def get_frames(self, frames_per_second: int) -> Iterator[np.ndarray]:
+        for _, frame in self.get_timed_frames(frames_per_second):
+            yield frame
 
-            
 
     @property
     def fps(self) -> float:
-        return self._video_capture.fps if self._video_capture else 0.0
+        return self._video_capture.get(cv2.CAP_PROP_FPS) if self._video_capture else 0.0
 
 
     @property
@@ -80,4 +267,295 @@ class FfmpegcvCPUStrategy(FrameExtractingStrategy):
         return self._video_capture is not None and self._video_capture.isOpened()
 
 
+    @property
+    def frame_count(self) -> int:
+        return int(self._video_capture.get(cv2.CAP_PROP_FRAME_COUNT)) if self._video_capture else 0
+
+
+    @property
+    def frame_size(self) -> Optional[Tuple[int, int]]:
+        if not self._video_capture:
+            return None
+        return int(self._video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self._video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+
+class FfmpegPipeStrategy(FrameExtractingStrategy):
+    """
+    Concrete frame extraction strategy decoding with an ffmpeg subprocess that writes raw BGR
+    frames to a pipe. Frames are read with readinto, straight into the destination buffer
+    (e.g. a shared memory slot). ffmpeg's fps filter resamples by timestamp, so variable frame
+    rate sources keep their timing, and seeking is a fast input seek.
+    """
+
+    def __init__(self, video_path : Path):
+        self.video_path :Path = video_path
+        self._stream : Optional[dict] = None
+        self._process : Optional[subprocess.Popen] = None
+        self._start_sec = 0.0
+
+
+    def open_video_source(self) -> bool:
+        if shutil.which("ffmpeg") is None:
+            logger.error("ffmpeg was not found on PATH.")
+            return False
+        logger.info(f"Attempting to open '{self.video_path}' with an ffmpeg pipe.")
+        self._stream = probe_video(self.video_path)
+        return self._stream is not None
+
+
+    def close_video_source(self) -> bool:
+        self._stop()
+        self._stream = None
+        self._start_sec = 0.0
+
+
+    def seek(self, frame_number :int) -> bool:
+        if not self.is_opened:
+            logger.error("Video source is not open. Call open_video_source() first.")
+            raise RuntimeError("Video source is not open. Call open_video_source() first.")
+        self._start_sec = frame_number / self.fps if self.fps else 0.0
+        return True
+
+
+    def _start(self, frames_per_second :float) -> subprocess.Popen:
+        self._stop()
+        command = ["ffmpeg", "-loglevel", "error"]
+        if self._start_sec > 0:
+            command += ["-ss", f"{self._start_sec:.6f}"]
+        command += ["-i", str(self.video_path), "-an", "-vf", f"fps={frames_per_second}",
+                    "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return self._process
+
+
+    def _stop(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+    def _timed_reads(self, frames_per_second :float, read_frame :Callable) -> Iterator[Tuple[float, object]]:
+        if not self.is_opened:
+            logger.error("Video source is not open. Call open_video_source() first.")
+            raise RuntimeError("Video source is not open. Call open_video_source() first.")
+
+        process = self._start(frames_per_second)
+        start_sec, frame_counter = self._start_sec, 0
+        try:
+            while True:
+                frame = read_frame(process.stdout)
+                if frame is None:
+                    logger.info("End of video stream reached.")
+                    break
+                yield start_sec + frame_counter / frames_per_second, frame
+                frame_counter += 1
+        finally:
+            self._stop()
+
+
+    def get_timed_frames(self, frames_per_second :float) -> Iterator[Tuple[float, np.ndarray]]:
+        width, height = self.frame_size
+
+        def read_frame(stream) -> Optional[np.ndarray]:
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            return frame if read_exactly_into(stream, frame) else None
+
+        yield from self._timed_reads(frames_per_second, read_frame)
+
+
+    def get_timed_frames_into(self, frames_per_second :float, pool) -> Iterator[Tuple[float, int]]:
+        """Frames are read from the pipe straight into a slot of `pool`, without any copy."""
+        def read_frame(stream) -> Optional[int]:
+            slot = pool.acquire(timeout=settings.SHARED_FRAME_TIMEOUT_SEC)
+            if read_exactly_into(stream, pool.frame(slot)):
+                return slot
+            pool.release(slot)
+            return None
+
+        yield from self._timed_reads(frames_per_second, read_frame)
+
+
+    def get_frames(self, frames_per_second: int) -> Iterator[np.ndarray]:
+        for _, frame in self.get_timed_frames(frames_per_second):
+            yield frame
+
+
+    @property
+    def fps(self) -> float:
+        return self._stream["fps"] if self._stream else 0.0
+
+
+    @property
+    def is_opened(self) -> bool:
+        return self._stream is not None
+
+
+    @property
+    def frame_count(self) -> int:
+        return self._stream["frame_count"] if self._stream else 0
+
+
+    @property
+    def frame_size(self) -> Optional[Tuple[int, int]]:
+        return (self._stream["width"], self._stream["height"]) if self._stream else None
 
+
+class LiveStreamStrategy(FrameExtractingStrategy):
+    """
+    Concrete frame extraction strategy for live sources (rtsp://, udp://, pipe:, or a file
+    served at native speed for local testing) decoded by an ffmpeg subprocess.
+
+    ffmpeg resamples the stream to the requested rate and a background thread keeps only the
+    `buffer_size` most recent frames, each stamped with its capture time (time.time() when it
+    arrived). When processing falls behind, older frames are dropped instead of queueing up latency.
+    A source leading the other one also keeps the frames of its lead (see hold).
+
+    `frame_size` (width, height) scales the decoded frames. It is required for pipe: sources,
+    which are not probed : ffprobe would consume the stream header from stdin. Their rate is
+    then `fps`, or the requested rate.
+    """
+
+    def __init__(self, video_path : Path | str, buffer_size :int = settings.LIVE_BUFFER_SIZE, realtime_file :bool = True,
+                 frame_size :Optional[Tuple[int, int]] = None, fps :Optional[float] = None):
+        self.video_path = video_path
+        self.buffer_size = buffer_size
+        self.realtime_file = realtime_file
+        self.output_size = tuple(frame_size) if frame_size else None
+        self._frame_size : Optional[Tuple[int, int]] = None
+        self.dropped_frames = 0
+        self.held_frames = 0
+        self._fps = fps or 0.0
+        self._process : Optional[subprocess.Popen] = None
+        self._reader : Optional[threading.Thread] = None
+        self._buffer : collections.deque = collections.deque(maxlen=buffer_size)
+        self._available = threading.Condition()
+        self._ended = False
+
+
+    def _is_pipe(self) -> bool:
+        return str(self.video_path).startswith("pipe:")
+
+
+    def _is_file(self) -> bool:
+        return "://" not in str(self.video_path) and not self._is_pipe()
+
+
+    def _probe(self) -> bool:
+        if self._is_pipe():
+            if self.output_size is None:
+                logger.error(f"'{self.video_path}' can't be probed without consuming it, its frame size must be given.")
+                return False
+            self._frame_size = self.output_size
+            return True
+
+        stream = probe_video(self.video_path)
+        if stream is None:
+            return False
+        self._frame_size = self.output_size or (stream["width"], stream["height"])
+        self._fps = self._fps or stream["fps"]
+        return True
+
+
+    def hold(self, seconds :float, frames_per_second :float) -> None:
+        self.held_frames = math.ceil(abs(seconds) * frames_per_second)
+        logger.info(f"'{self.video_path}' leads by {seconds:.3f}s, keeping {self.held_frames} more frames buffered.")
+
+
+    def open_video_source(self) -> bool:
+        """Probes the source. Decoding starts with get_frames, at the requested rate."""
+        if shutil.which("ffmpeg") is None:
+            logger.error("ffmpeg was not found on PATH.")
+            return False
+        logger.info(f"Attempting to open live source '{self.video_path}'.")
+        return self._probe()
+
+
+    def _start(self, frames_per_second :float) -> None:
+        command = ["ffmpeg", "-loglevel", "error", "-fflags", "nobuffer", "-flags", "low_delay"]
+        if self._is_file() and self.realtime_file:
+            command += ["-re"]
+        video_filter = f"fps={frames_per_second}"
+        if self.output_size is not None:
+            video_filter += f",scale={self.output_size[0]}:{self.output_size[1]}"
+        command += ["-i", str(self.video_path), "-an", "-vf", video_filter,
+                    "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        self._fps = self._fps or frames_per_second
+        self._buffer = collections.deque(maxlen=self.buffer_size + self.held_frames)
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        self._ended = False
+        self._reader = threading.Thread(target=self._read_frames, name="live-reader", daemon=True)
+        self._reader.start()
+        logger.info(f"Live ingestion of '{self.video_path}' started at {frames_per_second} FPS.")
+
+
+    def _read_frames(self) -> None:
+        width, height = self._frame_size
+        frame_bytes = width * height * 3
+        try:
+            while True:
+                data = self._process.stdout.read(frame_bytes)
+                captured_at = time.time()
+                if not data or len(data) < frame_bytes:
+                    break
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+                with self._available:
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self.dropped_frames += 1
+                    self._buffer.append((captured_at, frame))
+                    self._available.notify()
+        finally:
+            with self._available:
+                self._ended = True
+                self._available.notify_all()
+            logger.info(f"Live source '{self.video_path}' ended, {self.dropped_frames} frames dropped.")
+
+
+    def get_timed_frames(self, frames_per_second :float) -> Iterator[Tuple[float, np.ndarray]]:
+        """Yields (capture time, frame) pairs, always the oldest frame still buffered."""
+        if self._frame_size is None:
+            logger.error("Video source is not open. Call open_video_source() first.")
+            raise RuntimeError("Video source is not open. Call open_video_source() first.")
+        if self._process is None:
+            self._start(frames_per_second)
+
+        while True:
+            with self._available:
+                while not self._buffer and not self._ended:
+                    self._available.wait()
+                if not self._buffer:
+                    return
+                timed_frame = self._buffer.popleft()
+            yield timed_frame
+
+
+    def get_frames(self, frames_per_second: int) -> Iterator[np.ndarray]:
+        for _, frame in self.get_timed_frames(frames_per_second):
+            yield frame
+
+
+    def close_video_source(self) -> bool:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+        if self._reader is not None:
+            self._reader.join(timeout=5)
+            self._reader = None
+        self._buffer.clear()
+        self._frame_size = None
+
+
+    @property
+    def fps(self) -> float:
+        return self._fps
+
+
+    @property
+    def is_opened(self) -> bool:
+        return self._frame_size is not None
+
+
+    @property
+    def frame_size(self) -> Optional[Tuple[int, int]]:
+        return self._frame_size
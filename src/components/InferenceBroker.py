@@ -0,0 +1,163 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import settings
+from src.components.ModelRegistry import ModelRegistry, model_registry
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Local inference broker : collects the frames and crops of all callers (both views, several
+matches, async sessions) into dynamic batches per model, so the models run with batch sizes
+above one. Each model has a queue served by one thread, which starts a batch with the first
+waiting request, fills it for at most `max_wait_sec` and hands every result back to the
+Future of its caller.
+"""
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_WAIT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+
+
+class _ModelQueue:
+
+    _STOP = object()
+
+    def __init__(self, name :str, function :Callable[[list], list], max_batch_size :int, max_wait_sec :float, max_pending :int):
+        self.name = name
+        self.function = function
+        self.max_batch_size = max_batch_size
+        self.max_wait_sec = max_wait_sec
+        self.requests : queue.Queue = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self._serve, name=f"broker-{name}", daemon=True)
+        self.thread.start()
+
+
+    def submit(self, item :Any) -> Future:
+        """Blocks while `max_pending` requests are waiting, so callers can't outrun the model."""
+        future = Future()
+        self.requests.put((item, future, time.perf_counter()))
+        return future
+
+
+    def _next_batch(self) -> Optional[list]:
+        first = self.requests.get()
+        if first is self._STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_sec
+        while len(batch) < self.max_batch_size:
+            try:
+                request = self.requests.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if request is self._STOP:
+                self.requests.put(request)
+                break
+            batch.append(request)
+        return batch
+
+
+    def _serve(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            started = time.perf_counter()
+            batch = [(item, future, queued_at) for item, future, queued_at in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            for _, _, queued_at in batch:
+                metrics.histogram(f"broker.{self.name}.queue_wait_sec", started - queued_at, QUEUE_WAIT_BUCKETS)
+            metrics.histogram(f"broker.{self.name}.batch_size", len(batch), BATCH_SIZE_BUCKETS)
+
+            try:
+                with metrics.timer(f"broker.{self.name}"):
+                    results = self.function([item for item, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Broker batch of {len(batch)} {self.name} requests failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+    def close(self) -> None:
+        self.requests.put(self._STOP)
+        self.thread.join(timeout=5)
+
+
+class InferenceBroker:
+    """
+    Batches the inference requests of any number of callers per registered model.
+
+        broker.register("reid", feature_extractor.embed_crops)
+        embeddings = broker.infer("reid", crops)          # blocking
+        future = broker.submit("yolo", frame)             # concurrent.futures.Future
+    """
+
+    def __init__(self, max_batch_size :int = settings.BROKER_MAX_BATCH_SIZE, max_wait_sec :float = settings.BROKER_MAX_WAIT_SEC,
+                 max_pending :int = settings.BROKER_MAX_PENDING):
+        self.max_batch_size = max_batch_size
+        self.max_wait_sec = max_wait_sec
+        self.max_pending = max_pending
+        self._queues : Dict[str, _ModelQueue] = {}
+
+
+    def register(self, name :str, function :Callable[[list], list], max_batch_size :Optional[int] = None) -> None:
+        """`function` maps a list of requests to the list of their results, in order."""
+        if name in self._queues:
+            logger.error(f"Model '{name}' is already registered with the broker.")
+            raise ValueError(f"Model '{name}' is already registered with the broker.")
+        self._queues[name] = _ModelQueue(name, function, max_batch_size or self.max_batch_size, self.max_wait_sec, self.max_pending)
+        logger.info(f"Broker serving '{name}' in batches of up to {max_batch_size or self.max_batch_size}, waiting at most {self.max_wait_sec * 1000:.1f}ms")
+
+
+    def _queue(self, name :str) -> _ModelQueue:
+        if name not in self._queues:
+            logger.error(f"Model '{name}' is not registered with the broker.")
+            raise KeyError(f"Model '{name}' is not registered with the broker.")
+        return self._queues[name]
+
+
+    def submit(self, name :str, item :Any) -> Future:
+        return self._queue(name).submit(item)
+
+
+    def infer(self, name :str, items :list) -> List:
+        """Results of `items`, batched with the pending requests of other callers."""
+        model_queue = self._queue(name)
+        futures = [model_queue.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+
+    def close(self) -> None:
+        for model_queue in self._queues.values():
+            model_queue.close()
+        self._queues.clear()
+
+
+def build_inference_broker(registry :ModelRegistry = model_registry, detection_confidence :float = 0.1, **kwargs) -> InferenceBroker:
+    """
+    Broker serving 'yolo' (a frame to its ultralytics Results) and 'reid' (a BGR crop to its
+    embedding), with the models of the registry. Tracking stays with every PlayerTracker.
+    """
+    from src.steps.FeatureExtractor import FeatureExtractor
+    from src.components.ModelStrategies import UltralyticsYoloModel, QuantizedTorchReIDModel
+
+    broker = InferenceBroker(**kwargs)
+    detector = registry.get(UltralyticsYoloModel).fork()
+    feature_extractor = FeatureExtractor(QuantizedTorchReIDModel, UltralyticsYoloModel, registry)
+
+    broker.register("yolo", lambda frames: list(detector.model.predict(frames, conf=detection_confidence, verbose=False)),
+                    max_batch_size=settings.BROKER_YOLO_MAX_BATCH_SIZE)
+    broker.register("reid", lambda crops: list(feature_extractor.embed_crops(crops)))
+    return broker
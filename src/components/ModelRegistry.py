@@ -0,0 +1,117 @@
+import time
+import logging
+import threading
+from typing import Dict, Hashable, Tuple, Type, Union
+
+from src.interfaces.ModelInterface import ModelInterface
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Registry of model loaders shared across the pipeline components.
+"""
+
+
+class ModelRegistry:
+    """
+    Lazily loads every model loader once and hands out the same instance to all callers.
+
+    Loading is thread safe, so models can be warmed up in a background thread while the
+    main thread is busy (e.g. with synchronization) and picked up later without reloading.
+    """
+
+    def __init__(self):
+        self._instances : Dict[Hashable, ModelInterface] = {}
+        self._key_locks : Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.load_timings : Dict[str, Dict[str, float]] = {}
+
+
+    @staticmethod
+    def _key(model_loader : Type[ModelInterface], kwargs : dict) -> Tuple:
+        return (model_loader, tuple(sorted((name, str(value)) for name, value in kwargs.items())))
+
+
+    def get(self, model_loader : Union[Type[ModelInterface], ModelInterface], **kwargs) -> ModelInterface:
+        """
+        Returns the shared instance of `model_loader`, loading it on first use.
+        Already constructed loaders are returned unchanged.
+        """
+        if isinstance(model_loader, ModelInterface):
+            return model_loader
+
+        key = self._key(model_loader, kwargs)
+        with self._lock:
+            if key in self._instances:
+                metrics.increment("model_registry.cache_hits")
+                return self._instances[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key not in self._instances:
+                self._instances[key] = self._load(model_loader, kwargs)
+        return self._instances[key]
+
+
+    def _load(self, model_loader : Type[ModelInterface], kwargs : dict) -> ModelInterface:
+        name = model_loader.__name__
+        rss_before = _resident_memory_mb()
+        start = time.perf_counter()
+
+        instance = model_loader(**kwargs)
+
+        elapsed = time.perf_counter() - start
+        rss_after = _resident_memory_mb()
+        self.load_timings[name] = {"load_seconds": elapsed, "rss_delta_mb": rss_after - rss_before}
+        logger.info(
+            f"Loaded {name} in {elapsed:.2f}s on {threading.current_thread().name} "
+            f"(resident memory {rss_before:.0f}MB -> {rss_after:.0f}MB)"
+        )
+        return instance
+
+
+    def warmup(self, *model_loaders : Type[ModelInterface], background : bool = True) -> threading.Thread | None:
+        """
+        Loads the given model loaders, in a daemon thread when `background` is True.
+        """
+        def _warmup():
+            for model_loader in model_loaders:
+                try:
+                    self.get(model_loader)
+                except Exception as e:
+                    logger.error(f"Warm up of {model_loader.__name__} failed: {e}")
+
+        if not background:
+            _warmup()
+            return None
+
+        thread = threading.Thread(target=_warmup, name="model-warmup", daemon=True)
+        thread.start()
+        logger.info(f"Warming up {[loader.__name__ for loader in model_loaders]} in background.")
+        return thread
+
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Logs and returns the per-model load timings."""
+        for name, timing in self.load_timings.items():
+            logger.info(f"{name}: loaded in {timing['load_seconds']:.2f}s, resident memory +{timing['rss_delta_mb']:.0f}MB")
+        return dict(self.load_timings)
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._instances.clear()
+            self._key_locks.clear()
+
+
+def _resident_memory_mb() -> float:
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+model_registry = ModelRegistry()
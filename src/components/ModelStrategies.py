@@ -1,17 +1,25 @@
-import torch
+from __future__ import annotations
+
+import copy
 import numpy as np
 from pathlib import Path
 import logging
-from typing import List, Dict
-import torchreid as TRE
-
-from ultralytics import YOLO
+from typing import List, Dict, TYPE_CHECKING
 
 from src.interfaces.ModelInterface import ModelInterface
 
 from src.config import settings
+
+if TYPE_CHECKING:
+    import torch
+
 logger = logging.getLogger(__name__)
 
+"""
+torch, torchreid and ultralytics are imported inside the loaders so importing this module stays cheap.
+Use ModelRegistry to load each model once and share it across pipeline components.
+"""
+
 class UltralyticsYoloModel(ModelInterface):
     """
     It will load the provided pretrained yolo v11 model
@@ -19,6 +27,8 @@ class UltralyticsYoloModel(ModelInterface):
     """
 
     def __init__(self, model_path: Path = settings.PRETRAINED_YOLO_MODEL, device: str | None = "cpu"):
+        from ultralytics import YOLO
+
         self.model_path = model_path
         self.device = device
         try:
@@ -28,17 +38,33 @@ class UltralyticsYoloModel(ModelInterface):
             logger.critical(f"Error in loading model with path :{model_path} : {e}")
 
 
+    def fork(self) -> UltralyticsYoloModel:
+        """
+        Returns a loader sharing the same weights but with its own predictor, so the tracker
+        state registered by `model.track` does not leak into plain predictions of other components.
+        """
+        from ultralytics.utils import callbacks
+
+        forked = copy.copy(self)
+        forked.model = copy.copy(self.model)
+        forked.model.predictor = None
+        forked.model.callbacks = callbacks.get_default_callbacks()
+        return forked
+
+
 class TorchReIDModel(ModelInterface):
     """
     It will load the torchreid model.
     """
 
-    def __init__(self, reid_model_name :str = settings.TORCHREID_MODEL_NAME, device :str | None = "cpu"):
+    def __init__(self, reid_model_name :str = settings.TORCHREID_MODEL_NAME, device :str | None = "cpu", pretrained :bool = True):
+        import torchreid as TRE
+
         logger.info(f"Loading Re-Id Model :{reid_model_name}")
         self.reid_model = TRE.models.build_model(
             name=reid_model_name,
             num_classes=1,
-            pretrained=True
+            pretrained=pretrained
         )
         self.reid_model.eval()
         self.device = device
@@ -46,3 +72,148 @@ class TorchReIDModel(ModelInterface):
         _, self.ried_transfrom = TRE.data.transforms.build_transforms(is_train=False, height=256, width=128)
         logger.info(f"Re-Id Model loaded successfully with model : {reid_model_name}")
 
+
+
+def _build_half_precision_model(reid_model : torch.nn.Module) -> torch.nn.Module:
+    """
+    Wraps the Re-ID model to run in fp16 while keeping fp32 inputs and outputs,
+    so callers can keep feeding the regular torchreid transforms.
+    """
+    import torch
+
+    class HalfPrecisionReIDModel(torch.nn.Module):
+
+        def __init__(self, model : torch.nn.Module):
+            super().__init__()
+            self.reid_model = model.half()
+
+        def forward(self, x : torch.Tensor) -> torch.Tensor:
+            return self.reid_model(x.half()).float()
+
+    return HalfPrecisionReIDModel(reid_model)
+
+
+class QuantizedTorchReIDModel(TorchReIDModel):
+    """
+    It will load the torchreid model and replace it with a reduced precision variant.
+
+    Supported precisions:
+        - fp32         : no conversion, same as TorchReIDModel.
+        - fp16         : half precision weights and activations, on a CUDA device only.
+        - int8_static  : FX graph mode static quantization calibrated on cached crops.
+
+    The quantized model is compared against the float model on the calibration cache
+    (application.py calibrate-reid) and rejected, falling back to fp32, if the embedding
+    drift or the matching F1 does not hold. Without a calibration cache the quality can't
+    be checked, so reduced precisions are refused unless `verify` is False.
+    """
+
+    PRECISIONS = ("fp32", "fp16", "int8_static")
+    """
+    Dynamic int8 quantization is not offered : it only converts the linear layers, which leaves
+    a convolutional network like OSNet running in fp32.
+    """
+
+    def __init__(self, reid_model_name :str = settings.TORCHREID_MODEL_NAME, device :str | None = "cpu",
+                 precision :str = settings.REID_PRECISION, calibration_crops_path :Path = settings.REID_CALIBRATION_CROPS,
+                 verify :bool = True):
+        if precision not in self.PRECISIONS:
+            logger.error(f"Unsupported Re-Id precision '{precision}'. Expected one of {self.PRECISIONS}")
+            raise ValueError(f"Unsupported Re-Id precision '{precision}'. Expected one of {self.PRECISIONS}")
+
+        super().__init__(reid_model_name=reid_model_name, device=device)
+        self.precision = precision
+        self.float_reid_model = self.reid_model
+        self.quality_report : Dict | None = None
+
+        if precision == "fp32":
+            return
+
+        if precision == "fp16" and not self.supports_half_precision(self.device):
+            logger.error(f"Re-Id precision 'fp16' refused on device '{self.device}', half precision is only faster on CUDA. Running in fp32.")
+            self.precision = "fp32"
+            return
+
+        from utils.quantization_utils import load_calibration_crops, compare_reid_models
+
+        calibration_cache = None
+        if Path(calibration_crops_path).exists():
+            calibration_cache = load_calibration_crops(calibration_crops_path)
+            if len(calibration_cache["crops"]) == 0:
+                logger.warning(f"Calibration cache {calibration_crops_path} is empty.")
+                calibration_cache = None
+        else:
+            logger.warning(f"No calibration crops found at {calibration_crops_path}.")
+
+        if calibration_cache is None and (verify or precision == "int8_static"):
+            logger.error(
+                f"Re-Id precision '{precision}' refused, its matching quality can't be checked without calibration crops. "
+                f"Run 'application.py calibrate-reid' first. Running in fp32."
+            )
+            self.precision = "fp32"
+            return
+        if calibration_cache is None:
+            logger.warning(f"Re-Id precision '{precision}' runs WITHOUT any quality check (verify=False).")
+
+        self.reid_model = self.quantize(self.float_reid_model, precision, calibration_cache)
+        if self.reid_model is self.float_reid_model:
+            self.precision = "fp32"
+            return
+
+        if verify and calibration_cache is not None:
+            self.quality_report = compare_reid_models(self, calibration_cache)
+            if not self.quality_report["accepted"]:
+                logger.warning(
+                    f"Quantized Re-Id model ({precision}) rejected, falling back to fp32. Report : {self.quality_report}"
+                )
+                self.reid_model = self.float_reid_model
+                self.precision = "fp32"
+                return
+
+        logger.info(f"Re-Id Model running with precision : {self.precision}")
+
+
+    @staticmethod
+    def supports_half_precision(device :str | None) -> bool:
+        """fp16 kernels are only faster than fp32 on CUDA, CPU half precision is emulated."""
+        return str(device or "cpu").startswith("cuda")
+
+
+    def quantize(self, float_model : torch.nn.Module, precision :str, calibration_cache : Dict | None) -> torch.nn.Module:
+        """
+        Builds the reduced precision copy of the float Re-ID model, or returns `float_model`
+        itself when static quantization fails.
+        """
+        model = copy.deepcopy(float_model).cpu().eval()
+
+        if precision == "fp16":
+            return _build_half_precision_model(model).to(self.device).eval()
+
+        try:
+            return self._quantize_static(model, calibration_cache)
+        except Exception as e:
+            logger.error(f"Static quantization failed ({e}). Running in fp32.")
+            return float_model
+
+
+    def _quantize_static(self, model : torch.nn.Module, calibration_cache : Dict) -> torch.nn.Module:
+        """
+        Post training static quantization. Observers are calibrated on crops cached from our own videos.
+        """
+        import torch
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+        from utils.quantization_utils import crops_to_batches
+
+        torch.backends.quantized.engine = "x86" if "x86" in torch.backends.quantized.supported_engines else "qnnpack"
+        qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+        example_inputs = (torch.randn(1, 3, 256, 128),)
+
+        prepared = prepare_fx(model, qconfig_mapping, example_inputs)
+        logger.info(f"Calibrating static quantization on {len(calibration_cache['crops'])} cached crops")
+        with torch.no_grad():
+            for batch in crops_to_batches(calibration_cache["crops"], self.ried_transfrom, device="cpu"):
+                prepared(batch)
+
+        self.device = "cpu"
+        return convert_fx(prepared)
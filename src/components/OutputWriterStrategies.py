@@ -0,0 +1,303 @@
+import os
+import cv2
+import queue
+import shutil
+import logging
+import threading
+import subprocess
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from src.config import settings
+from src.interfaces.OutputWriterInterface import OutputWritingStrategy
+
+logger = logging.getLogger(__name__)
+
+"""
+We will implement Strategies for writing the pipeline output.
+"""
+
+
+class OpenCVVideoWriterStrategy(OutputWritingStrategy):
+    """
+    Concrete output strategy using cv2.VideoWriter with the mp4v codec.
+    Encoding runs on the calling thread.
+    """
+
+    def __init__(self, output_path :Path, fps :float, frame_size :Tuple[int, int]):
+        self.output_path = Path(output_path)
+        self.fps = fps
+        self.frame_size = tuple(frame_size)
+        self._video_writer : Optional[cv2.VideoWriter] = None
+
+
+    def open_output(self) -> bool:
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._video_writer = cv2.VideoWriter(str(self.output_path), cv2.VideoWriter_fourcc(*'mp4v'), self.fps, self.frame_size)
+        return self._video_writer.isOpened()
+
+
+    def write(self, frame_index :int, frame :Optional[np.ndarray], records :List[dict]) -> None:
+        self._video_writer.write(frame)
+
+
+    def close_output(self) -> None:
+        if self._video_writer:
+            self._video_writer.release()
+            self._video_writer = None
+
+
+    @property
+    def is_opened(self) -> bool:
+        return self._video_writer is not None and self._video_writer.isOpened()
+
+
+
+class FfmpegPipeWriterStrategy(OutputWritingStrategy):
+    """
+    Concrete output strategy streaming raw BGR frames into an ffmpeg subprocess.
+
+    Frames are handed to a background thread through a bounded queue, so encoding happens
+    off the main loop. When the queue is full `write` blocks, which bounds memory usage.
+    """
+
+    def __init__(self, output_path :Path, fps :float, frame_size :Tuple[int, int],
+                 codec :str = settings.FFMPEG_CODEC, preset :str = settings.FFMPEG_PRESET,
+                 crf :int = settings.FFMPEG_CRF, queue_size :int = settings.WRITER_QUEUE_SIZE):
+        self.output_path = Path(output_path)
+        self.fps = fps
+        self.frame_size = tuple(frame_size)
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self._queue : queue.Queue = queue.Queue(maxsize=queue_size)
+        self._process : Optional[subprocess.Popen] = None
+        self._thread : Optional[threading.Thread] = None
+        self._error : Optional[BaseException] = None
+
+
+    def _command(self) -> List[str]:
+        width, height = self.frame_size
+        return [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+            "-c:v", self.codec, "-preset", self.preset, "-crf", str(self.crf), "-pix_fmt", "yuv420p",
+            str(self.output_path),
+        ]
+
+
+    def open_output(self) -> bool:
+        if shutil.which("ffmpeg") is None:
+            logger.error("ffmpeg executable not found on PATH.")
+            return False
+
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._process = subprocess.Popen(self._command(), stdin=subprocess.PIPE)
+        except OSError as e:
+            logger.error(f"Error starting ffmpeg: {e}")
+            self._process = None
+            return False
+
+        self._thread = threading.Thread(target=self._encode_loop, name="ffmpeg-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"Streaming output to ffmpeg ({self.codec}, preset={self.preset}, crf={self.crf}) at '{self.output_path}'.")
+        return True
+
+
+    def _encode_loop(self) -> None:
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            if self._error is not None:
+                continue
+            try:
+                self._process.stdin.write(memoryview(frame))
+            except (BrokenPipeError, OSError) as e:
+                logger.error(f"ffmpeg encoder stopped accepting frames: {e}")
+                self._error = e
+
+
+    def write(self, frame_index :int, frame :Optional[np.ndarray], records :List[dict]) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg encoder failed: {self._error}")
+        if frame.shape[1::-1] != self.frame_size:
+            logger.error(f"Frame size {frame.shape[1::-1]} does not match output size {self.frame_size}.")
+            raise ValueError(f"Frame size {frame.shape[1::-1]} does not match output size {self.frame_size}.")
+
+        """The frame is copied because renderers reuse their canvas between frames."""
+        self._queue.put(np.ascontiguousarray(frame, dtype=np.uint8).copy())
+
+
+    def close_output(self) -> None:
+        if self._process is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._process.stdin.close()
+        return_code = self._process.wait()
+        if return_code != 0:
+            logger.error(f"ffmpeg exited with code {return_code}")
+        self._process = None
+        self._thread = None
+
+
+    @property
+    def is_opened(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+
+
+TRAJECTORY_SCHEMA = {
+    "frame_index": np.int32,
+    "timestamp": np.float64,
+    "global_id": np.int32,
+    "broadcast_track_id": np.int32,
+    "tacticam_track_id": np.int32,
+    "x": np.float32,
+    "y": np.float32,
+    "matched": np.bool_,
+    "match_cost": np.float32,
+}
+"""Columns of the trajectory output. Missing track ids are -1, missing match costs are NaN."""
+
+
+def records_to_rows(frame_index :int, timestamp :float, records :List[dict]) -> List[tuple]:
+    """Flattens the per-frame records of GlobalIdentityManager.assign into trajectory rows."""
+    rows = []
+    for record in records:
+        x, y = record["field_coords"]
+        cost = record.get("match_cost")
+        rows.append((
+            frame_index,
+            record.get("timestamp", timestamp),
+            record["global_id"],
+            record.get("broadcast_track_id", -1),
+            record.get("tacticam_track_id", -1),
+            x,
+            y,
+            record["matched"],
+            np.nan if cost is None else cost,
+        ))
+    return rows
+
+
+def rows_to_columns(rows :List[tuple]) -> dict:
+    """Converts trajectory rows into typed column arrays following TRAJECTORY_SCHEMA."""
+    columns = list(zip(*rows)) if rows else [()] * len(TRAJECTORY_SCHEMA)
+    return {
+        name: np.asarray(values, dtype=dtype)
+        for (name, dtype), values in zip(TRAJECTORY_SCHEMA.items(), columns)
+    }
+
+
+
+class TrajectoryWriterStrategy(OutputWritingStrategy):
+    """
+    Concrete output strategy writing per-frame player trajectories as data instead of video.
+
+    Rows follow TRAJECTORY_SCHEMA. They are buffered and flushed as numbered NPZ chunks into
+    the output directory every `chunk_frames` frames, so the output can be read while the
+    pipeline is still running, without decoding any video.
+
+    An output directory holds one run : chunks left by a previous run are removed on open, so
+    rerunning never duplicates rows. Chunks are written to a partial file and renamed, readers
+    only ever see complete ones.
+    """
+
+    needs_frames = False
+    FILE_SUFFIX = ".npz"
+
+    def __init__(self, output_path :Path, fps :float, frame_size :Tuple[int, int] | None = None,
+                 chunk_frames :int = settings.TRAJECTORY_CHUNK_FRAMES):
+        self.output_path = Path(output_path)
+        self.fps = fps
+        self.chunk_frames = chunk_frames
+        self._rows : List[tuple] = []
+        self._frames_in_chunk = 0
+        self._chunk_index = 0
+        self._opened = False
+
+
+    def open_output(self) -> bool:
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        stale_chunks = list(self.output_path.glob(f"chunk_*{self.FILE_SUFFIX}*"))
+        for stale_chunk in stale_chunks:
+            stale_chunk.unlink()
+        if stale_chunks:
+            logger.warning(f"Removed {len(stale_chunks)} trajectory chunks of a previous run from '{self.output_path}'.")
+
+        self._chunk_index = 0
+        self._opened = True
+        logger.info(f"Writing trajectories to '{self.output_path}'.")
+        return True
+
+
+    def _write_chunk(self, chunk_path :Path, columns :dict) -> None:
+        with open(chunk_path, "wb") as chunk_file:
+            np.savez(chunk_file, **columns)
+
+
+    def write(self, frame_index :int, frame :Optional[np.ndarray], records :List[dict]) -> None:
+        self._rows.extend(records_to_rows(frame_index, frame_index / self.fps, records))
+
+        self._frames_in_chunk += 1
+        if self._frames_in_chunk >= self.chunk_frames:
+            self._flush()
+
+
+    def _flush(self) -> None:
+        if self._frames_in_chunk == 0:
+            return
+
+        chunk_path = self.output_path / f"chunk_{self._chunk_index:05d}{self.FILE_SUFFIX}"
+        partial_path = chunk_path.with_name(chunk_path.name + ".partial")
+        self._write_chunk(partial_path, rows_to_columns(self._rows))
+        os.replace(partial_path, chunk_path)
+        logger.debug(f"Wrote {len(self._rows)} trajectory rows to {chunk_path}")
+        self._rows = []
+        self._frames_in_chunk = 0
+        self._chunk_index += 1
+
+
+    def close_output(self) -> None:
+        if self._opened:
+            self._flush()
+            self._opened = False
+
+
+    @property
+    def is_opened(self) -> bool:
+        return self._opened
+
+
+
+class ParquetTrajectoryWriterStrategy(TrajectoryWriterStrategy):
+    """
+    Concrete output strategy writing the trajectory chunks as Parquet files.
+
+    Every chunk is a complete Parquet file, its footer written when the chunk is flushed, so
+    the flushed chunks can be read while the pipeline is still writing (a single file is only
+    readable once closed). Needs the optional `pyarrow` dependency.
+    """
+
+    FILE_SUFFIX = ".parquet"
+
+    def open_output(self) -> bool:
+        try:
+            import pyarrow
+        except ImportError:
+            logger.error("pyarrow is required for Parquet trajectories. Install it or use the 'trajectory' writer.")
+            return False
+        return super().open_output()
+
+
+    def _write_chunk(self, chunk_path :Path, columns :dict) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in TRAJECTORY_SCHEMA.items()])
+        pq.write_table(pa.Table.from_pydict(columns, schema=schema), str(chunk_path))
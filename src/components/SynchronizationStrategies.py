@@ -1,7 +1,6 @@
 import logging
 from typing import Tuple, List
 import numpy as np
-from skimage.metrics import structural_similarity
 import cv2
 
 from src.interfaces.SynchronizationInterface import SynchronizationStrategy
@@ -48,6 +47,8 @@ class CrossCorrelationSynchronizationStrategy(SynchronizationStrategy):
         return frames
     
     def find_offset(self, extractor_1: FrameExtractor, extractor_2: FrameExtractor) -> Tuple[int, float]:
+        from skimage.metrics import structural_similarity
+
         logger.info("Starting visual cross-correlation to find offset.")
 
         logger.info(f"Extracting {self.sample_duration_sec}s sample from first video.")
@@ -98,4 +99,40 @@ class CrossCorrelationSynchronizationStrategy(SynchronizationStrategy):
         return int(best_match_offset_frame), float(best_confidence)
 
 
-        
+    def signature(self, frame :np.ndarray) -> np.ndarray:
+        """Zero mean, unit norm 32x18 grayscale thumbnail, so a dot product is a correlation."""
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumbnail = cv2.resize(gray_frame, (32, 18), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+        thumbnail -= thumbnail.mean()
+        return thumbnail / (np.linalg.norm(thumbnail) + 1e-6)
+
+
+    def estimate_drift(self, times_1 :np.ndarray, signatures_1 :np.ndarray, times_2 :np.ndarray, signatures_2 :np.ndarray,
+                       offset_sec :float, max_drift_sec :float, step_sec :float) -> Tuple[float, float]:
+        """
+        Correlates the signatures of video 1 with those of video 2 shifted by every multiple of
+        `step_sec` within `max_drift_sec` of the current offset. The signatures are cheap enough
+        to do this on a running stream, where SSIM on full frames is not.
+        """
+        if len(times_1) == 0 or len(times_2) < 2:
+            return 0.0, 0.0
+        order = np.argsort(times_2)
+        times_2, signatures_2 = times_2[order], signatures_2[order]
+        min_overlap = max(1, len(times_1) // 2)
+
+        best_shift, best_score = 0.0, -np.inf
+        num_steps = int(round(max_drift_sec / step_sec))
+        for shift in np.arange(-num_steps, num_steps + 1) * step_sec:
+            wanted = times_1 + offset_sec + shift
+            nearest = np.clip(np.searchsorted(times_2, wanted), 1, len(times_2) - 1)
+            nearest = np.where(np.abs(times_2[nearest - 1] - wanted) <= np.abs(times_2[nearest] - wanted), nearest - 1, nearest)
+            valid = np.abs(times_2[nearest] - wanted) <= step_sec / 2
+            if valid.sum() < min_overlap:
+                continue
+            score = float(np.mean(np.einsum("ij,ij->i", signatures_1[valid], signatures_2[nearest[valid]])))
+            if score > best_score + 1e-6 or (abs(score - best_score) <= 1e-6 and abs(shift) < abs(best_shift)):
+                best_shift, best_score = float(shift), score
+
+        if not np.isfinite(best_score):
+            return 0.0, 0.0
+        return best_shift, best_score
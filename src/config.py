@@ -3,7 +3,7 @@ from pathlib import Path
 
 from pydantic_settings import BaseSettings,SettingsConfigDict
 from pydantic import Field
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,8 @@ class Settings(BaseSettings):
     TACTICAM_VIDEO_PATH :Path = Path("artifacts/tacticam.mp4")
     FIELD_IMAGE : Path = Path("artifacts/soccer-green-field.jpg")
     OUTPUT_PATH : Path = Path("artifacts/unified_output.mp4")
+    FEATURES_CACHE_PATH : Path = Path("artifacts/player_features.pkl")
+    MATCHES_CACHE_PATH : Path = Path("artifacts/frame_matches.pkl")
 
 
     """Model Configuration"""
@@ -25,13 +27,151 @@ class Settings(BaseSettings):
     TORCHREID_MODEL_NAME  :str = "osnet_x0_25"
 
 
+    """Re-ID Quantization Configuration"""
+    REID_PRECISION :str = "fp32"
+    """One of 'fp32', 'fp16' (CUDA only) or 'int8_static'."""
+    REID_CALIBRATION_CROPS :Path = Path("artifacts/reid_calibration_crops.npz")
+    REID_MAX_COSINE_DRIFT :float = 0.05
+    REID_MIN_MATCHING_F1 :float = 0.95
+
+
+    """Rendering Configuration"""
+    RENDER_MODE :str = "headless"
+    """'headless' writes the output video without any window, 'preview' also shows a live window."""
+    PREVIEW_FPS :float = 10
+    RENDER_WIDTH :Optional[int] = None
+    RENDER_HEIGHT :Optional[int] = None
+    """Output resolution of the unified view, independent of the field resolution used for homography."""
+
+
+    """Output Configuration"""
+    OUTPUT_WRITER :str = "ffmpeg"
+    """One of 'ffmpeg', 'opencv', 'trajectory' or 'parquet'."""
+    TRAJECTORY_PATH : Path = Path("artifacts/trajectories")
+    TRAJECTORY_CHUNK_FRAMES :int = 300
+    FFMPEG_CODEC :str = "libx264"
+    FFMPEG_PRESET :str = "veryfast"
+    FFMPEG_CRF :int = 23
+    WRITER_QUEUE_SIZE :int = 32
+
+
+    """Inference Broker Configuration"""
+    BROKER_MAX_BATCH_SIZE :int = 32
+    BROKER_YOLO_MAX_BATCH_SIZE :int = 8
+    BROKER_MAX_WAIT_SEC :float = 0.005
+    """How long the first request of a batch waits for requests of other callers."""
+    BROKER_MAX_PENDING :int = 512
+
+
+    """Async Service Configuration"""
+    ASYNC_WORKERS :int = 4
+    """Threads running the blocking stages (decoding, tracking, features, matching)."""
+    ASYNC_MAX_PENDING :int = 256
+    """Inference requests in flight before the sessions are suspended."""
+    ASYNC_QUEUE_SIZE :int = 4
+    """Decoded frame pairs buffered per camera pair before its decoder is paused."""
+
+
+    """Metrics Configuration"""
+    METRICS_PATH : Path = Path("logs/metrics")
+    """Directory of the metrics.json and metrics.prom summaries."""
+    METRICS_INTERVAL_SEC :float = 30.0
+
+
+    """Evaluation Configuration"""
+    ANNOTATIONS_PATH : Path = Path("artifacts/annotations.csv")
+    """CSV of ground-truth (frame, broadcast_track, tacticam_track) correspondences."""
+    EVALUATION_PATH : Path = Path("artifacts/evaluation.json")
+    SWEEP_PATH : Path = Path("artifacts/sweep.json")
+
+
+    """Assignment Configuration"""
+    ASSIGNMENT_SOLVER :str = "auto"
+    """One of 'auto', 'hungarian', 'sparse' or 'greedy', see src/components/AssignmentSolvers.py."""
+    ASSIGNMENT_SPARSE_MIN_SIZE :int = 32
+    ASSIGNMENT_SPARSE_MAX_DENSITY :float = 0.25
+    """The auto solver switches to sparse LAPJV for matrices of at least this size and at most this share of gated candidates."""
+
+
+    """Identity Configuration"""
+    ID_EXPIRY_FRAMES :int = 300
+    """Tracks not seen for this many frames are forgotten."""
+    ID_REATTACH_MAX_COST :float = 0.4
+    ID_REATTACH_MAX_DISTANCE :float = 150
+    """Maximum field distance (field pixels) between a new track and a dormant global ID to re-attach it."""
+
+
+    """Synchronization Configuration"""
+    SYNC_TOLERANCE_SEC :Optional[float] = None
+    """Maximum timestamp difference of a frame pair, half a frame at the processing rate when None."""
+    SYNC_DRIFT_INTERVAL_SEC :float = 20.0
+    """Video seconds between re-estimations of the offset, 0 disables them."""
+    SYNC_DRIFT_WINDOW_SEC :float = 10.0
+    SYNC_MAX_DRIFT_SEC :float = 1.0
+    SYNC_DRIFT_MIN_CONFIDENCE :float = 0.6
+
+
+    """Live Ingestion Configuration"""
+    LIVE_BROADCAST_SOURCE :str = "artifacts/broadcast.mp4"
+    LIVE_TACTICAM_SOURCE :str = "artifacts/tacticam.mp4"
+    """rtsp://, udp://, pipe: or a file, which is then played at native speed."""
+    LIVE_OFFSET_SEC :float = 0.0
+    LIVE_LATENCY_BUDGET_SEC :float = 0.5
+    LIVE_BUFFER_SIZE :int = 2
+    """Most recent frames kept per source, older ones are dropped when processing falls behind."""
+    LIVE_FRAME_SIZE :Optional[Tuple[int, int]] = None
+    """(width, height) the live frames are scaled to, required for pipe: sources which are not probed."""
+
+
+    """Checkpoint Configuration"""
+    CHECKPOINT_PATH : Path = Path("artifacts/checkpoints")
+    CHUNK_SECONDS :float = 30.0
+    STITCH_BOUNDARY_FRAMES :int = 5
+    """Frames on each side of a chunk boundary used to reconcile track IDs."""
+    STITCH_MAX_COST :float = 0.5
+    EXTRACT_WORKERS :int = 1
+    """Worker processes of the parallel segment extraction, 1 extracts sequentially."""
+    SEGMENT_OVERLAP_SECONDS :float = 2.0
+    SEGMENT_LINK_TOLERANCE :float = 5.0
+    """Maximum field distance between detections of two overlapping segments to link their tracks."""
+    SHARED_FRAMES :bool = False
+    """Track each view in a worker process of its own, fed with frames through shared memory."""
+    SHARED_FRAME_SLOTS :int = 8
+    """Frames per view in the shared memory ring, decoding pauses while all of them are in use."""
+    SHARED_FRAME_TIMEOUT_SEC :float = 120.0
+    """Longest wait of the decoder for a free slot, the workers' liveness is checked meanwhile."""
+
+
+    """Team Clustering Configuration"""
+    TEAM_FILTER :bool = True
+    """Match players per team, teams being clustered online from torso color histograms."""
+    TEAM_CLUSTERS :int = 4
+    TEAM_MIN_MARGIN :float = 0.1
+    """Minimum relative distance margin between the two nearest clusters to assign a team."""
+    TEAM_WARMUP_SAMPLES :int = 64
+
+
+    """Temporal Smoothing Configuration"""
+    SMOOTHING :bool = True
+    """Kalman filter the field coordinates of every track and smooth the matching costs over time."""
+    SMOOTHING_WINDOW :int = 30
+    """Frames after which a track or a pair of tracks that was not seen starts over."""
+    SMOOTHING_PROCESS_NOISE :float = 1.0
+    SMOOTHING_MEASUREMENT_NOISE :float = 25.0
+    COST_SMOOTHING_ALPHA :float = 0.5
+
+
     """Parameters"""
     FEATURE_WEIGHTS :Dict[str, float] = Field(default_factory=lambda: {
         "appearance": 0.3,
         "color_hist": 0.2,
         "field_coords": 0.4,
-        "pose": 0.1,
+        "velocity": 0.1,
     })
+    """
+    Weights of the costed features (CrossViewMatcher.COSTED_FEATURES). 'velocity' is estimated by the
+    track smoother, without smoothing it is missing and its weight is ignored.
+    """
 
 
 
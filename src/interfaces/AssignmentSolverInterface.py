@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import Tuple
+import numpy as np
+
+"""
+abstract Class for implementing assignment solving strategies using design patterns.
+"""
+
+class AssignmentSolver(ABC):
+    """
+    Interface for a solver of the thresholded assignment problem of the cross view matcher.
+
+    Pairs costing `max_cost` or more are not candidates : they are gated out before solving, so
+    they never influence which pairs are matched. Leaving a player unmatched is worth `max_cost`,
+    i.e. the solvers minimize the sum of (cost - max_cost) over the matched pairs.
+    """
+
+    name :str = ""
+
+    @abstractmethod
+    def solve(self, cost_matrix :np.ndarray, max_cost :float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Solves the assignment of the M x N `cost_matrix`.
+
+        Returns:
+            A tuple (rows, cols) of the matched pairs, all of them costing less than `max_cost`.
+        """
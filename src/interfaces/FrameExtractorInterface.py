@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
 import numpy as np
-from typing import Iterator
+from typing import Iterator, Optional, Tuple
+
+from src.config import settings
 
 """
 abstract Class for implementing frame extraction strategies using design patterns.
@@ -35,6 +37,14 @@ class FrameExtractingStrategy(ABC):
     def get_frames(self, frames_per_second :int) -> Iterator[np.ndarray]:
         """A generator that yields frames at a specified rate."""
 
+
+    @abstractmethod
+    def get_timed_frames(self, frames_per_second :float) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        A generator that yields (timestamp in seconds, frame) pairs at a specified rate.
+        Frames are selected by timestamp, so the rate holds for any source frame rate.
+        """
+
     
     @property
     @abstractmethod
@@ -46,5 +56,47 @@ class FrameExtractingStrategy(ABC):
     @abstractmethod
     def is_opened(self) -> bool:
         """Returns True if the video source is currently open."""
+
+
+    def seek(self, frame_number :int) -> bool:
+        """
+        Positions the source so the next decoded frame is `frame_number` (in native frames).
+        Returns False when the strategy can't seek, callers then decode and skip frames instead.
+        """
+        return False
+
+
+    @property
+    def frame_count(self) -> int:
+        """Returns the number of native frames of the video source, 0 when unknown."""
+        return 0
+
+
+    @property
+    def frame_size(self) -> Optional[Tuple[int, int]]:
+        """Returns the (width, height) of the decoded frames, None when unknown."""
+        return None
+
+
+    def hold(self, seconds :float, frames_per_second :float) -> None:
+        """
+        The source leads another one by `seconds` : live sources keep that much more of their
+        frames buffered so they can still be paired. Sources read on demand ignore it.
+        """
+
+
+    def get_timed_frames_into(self, frames_per_second :float, pool) -> Iterator[Tuple[float, int]]:
+        """
+        Like get_timed_frames, but every frame is written into a buffer of `pool` (e.g. a
+        SharedFrameRing : acquire(timeout) -> slot, frame(slot) -> array, release(slot)) and the
+        slot is yielded instead. The caller owns the slot and releases it.
+
+        This default copies every decoded frame once, strategies able to decode straight
+        into the buffer override it.
+        """
+        for timestamp, frame in self.get_timed_frames(frames_per_second):
+            slot = pool.acquire(timeout=settings.SHARED_FRAME_TIMEOUT_SEC)
+            np.copyto(pool.frame(slot), frame)
+            yield timestamp, slot
         
 
@@ -21,4 +21,12 @@ class ModelInterface(ABC):
         """
         pass
 
-    
\ No newline at end of file
+
+    def fork(self) -> "ModelInterface":
+        """
+        Returns a loader that can be used by another pipeline component.
+
+        Stateless loaders are shared as is. Loaders holding per-caller state
+        (e.g. a tracker) override this to share weights but not state.
+        """
+        return self
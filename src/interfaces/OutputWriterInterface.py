@@ -0,0 +1,44 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+import numpy as np
+from typing import List, Optional, Tuple
+
+"""
+abstract Class for implementing output writing strategies using design patterns.
+"""
+
+class OutputWritingStrategy(ABC):
+    """
+    Interface for an output writing strategy.
+
+    This defines the contract that all concrete writers
+    (like video encoders or trajectory data writers) must follow.
+    """
+
+    needs_frames :bool = True
+    """False for writers that only consume the per-frame records, so rendering can be skipped."""
+
+    @abstractmethod
+    def __init__(self, output_path :Path, fps :float, frame_size :Tuple[int, int]):
+        pass
+
+
+    @abstractmethod
+    def open_output(self) -> bool:
+        """
+        Opens the output and returns True on success.
+        """
+
+    @abstractmethod
+    def write(self, frame_index :int, frame :Optional[np.ndarray], records :List[dict]) -> None:
+        """Writes one output frame and/or its per-player records."""
+
+    @abstractmethod
+    def close_output(self) -> None:
+        """Flushes and releases the output and any associated resources."""
+
+
+    @property
+    @abstractmethod
+    def is_opened(self) -> bool:
+        """Returns True if the output is currently open."""
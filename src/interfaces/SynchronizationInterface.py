@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Optional, Tuple
+import numpy as np
 from src.steps.FrameExtractor import FrameExtractor
 
 
@@ -13,6 +14,9 @@ class SynchronizationStrategy(ABC):
     
     """
 
+    fps :float = 10
+    """Frame rate at which find_offset counts its offset frames."""
+
     @abstractmethod
     def find_offset(self, extractor_1 :FrameExtractor , extractor_2 :FrameExtractor) -> Tuple[int, float]:
         """
@@ -25,4 +29,24 @@ class SynchronizationStrategy(ABC):
 
         """
 
-        pass
\ No newline at end of file
+        pass
+
+
+    def signature(self, frame :np.ndarray) -> Optional[np.ndarray]:
+        """
+        Cheap descriptor of a frame used to re-estimate the offset while streaming.
+        Returns None when the strategy can't re-estimate, the initial offset is then kept.
+        """
+        return None
+
+
+    def estimate_drift(self, times_1 :np.ndarray, signatures_1 :np.ndarray, times_2 :np.ndarray, signatures_2 :np.ndarray,
+                       offset_sec :float, max_drift_sec :float, step_sec :float) -> Tuple[float, float]:
+        """
+        Estimates how much the current `offset_sec` (seconds video_2 is ahead of video_1) is off,
+        from the timestamped signatures of recent frames of both videos.
+
+        Returns:
+            A tuple (correction in seconds to add to the offset, confidence).
+        """
+        return 0.0, 0.0
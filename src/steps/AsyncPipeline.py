@@ -0,0 +1,213 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+from src.components.InferenceBroker import InferenceBroker, build_inference_broker
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+
+"""
+asyncio facing API of the pipeline, to serve several camera pairs from one process.
+
+Blocking stages (tracking, color histograms, matching) run on a shared executor, decoding on a thread per camera pair.
+Detection frames and Re-ID crops of all concurrent requests go through an InferenceBroker, which
+runs them in dynamic batches. Backpressure : a decoder is paused while its camera pair has
+ASYNC_QUEUE_SIZE frame pairs waiting, and requests wait while ASYNC_MAX_PENDING are in flight.
+
+    pipeline = AsyncPipeline()
+    session = pipeline.session(transformer)
+    async for result in session.run(synchronizer, fps=10):
+        ...
+"""
+
+
+async def async_frame_pairs(synchronizer, fps :int, queue_size :int = settings.ASYNC_QUEUE_SIZE,
+                            **kwargs) -> AsyncIterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Async producer of synchronized frame pairs. The blocking synchronizer generator is driven
+    by a decoder thread of its own (so long-lived decoders never starve the shared executor),
+    which pauses while `queue_size` pairs are waiting.
+    `kwargs` are passed to get_synchronized_frames (start, stop, ...).
+    """
+    loop = asyncio.get_running_loop()
+    queue : asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+    end = object()
+
+    def decode() -> None:
+        try:
+            for frame_pair in synchronizer.get_synchronized_frames(fps, **kwargs):
+                if stopped.is_set():
+                    break
+                asyncio.run_coroutine_threadsafe(queue.put(frame_pair), loop).result()
+        except Exception as e:
+            logger.error(f"Decoding failed : {e}")
+            asyncio.run_coroutine_threadsafe(queue.put(e), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(end), loop).result()
+
+    decoder = threading.Thread(target=decode, name="pair-decoder", daemon=True)
+    decoder.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is end:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        "Unblocks a decoder waiting on the full queue, so it sees the stop."
+        while decoder.is_alive():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.sleep(0.01)
+
+
+class AsyncPipeline:
+    """
+    Shared part of the service : the executor, the models and the inference broker.
+    Every camera pair gets its own PairSession, holding its tracker and matching state.
+    """
+
+    def __init__(self, executor :Optional[Executor] = None, workers :int = settings.ASYNC_WORKERS,
+                 broker :Optional[InferenceBroker] = None, max_pending :int = settings.ASYNC_MAX_PENDING):
+        from src.steps.FeatureExtractor import FeatureExtractor
+        from src.components.ModelStrategies import UltralyticsYoloModel, QuantizedTorchReIDModel
+
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline")
+        self._owns_executor = executor is None
+        self.broker = broker or build_inference_broker()
+        self._owns_broker = broker is None
+        self.feature_extractor = FeatureExtractor(QuantizedTorchReIDModel, UltralyticsYoloModel)
+        self.max_pending = max_pending
+        self._in_flight : Optional[asyncio.Semaphore] = None
+
+
+    async def _infer_one(self, name :str, item):
+        async with self._in_flight:
+            return await asyncio.wrap_future(self.broker.submit(name, item))
+
+
+    async def infer(self, name :str, items :list) -> list:
+        """Broker results of `items` (see build_inference_broker), without blocking the event loop."""
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_pending)
+        return list(await asyncio.gather(*(self._infer_one(name, item) for item in items)))
+
+
+    async def run_blocking(self, function :Callable, *args):
+        """Runs a blocking pipeline call on the shared executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+
+    def session(self, transformer, smoothing :bool = settings.SMOOTHING, team_filter :bool = settings.TEAM_FILTER,
+                max_cost :float = 0.75) -> "PairSession":
+        return PairSession(self, transformer, smoothing=smoothing, team_filter=team_filter, max_cost=max_cost)
+
+
+    async def close(self) -> None:
+        if self._owns_broker:
+            self.broker.close()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
+
+class PairSession:
+    """
+    One camera pair served by an AsyncPipeline. Frames of a session are processed in order,
+    frames of different sessions concurrently.
+    """
+
+    VIEWS = ("broadcast", "tacticam")
+
+    def __init__(self, pipeline :AsyncPipeline, transformer, smoothing :bool = settings.SMOOTHING,
+                 team_filter :bool = settings.TEAM_FILTER, max_cost :float = 0.75):
+        from src.IDManager import GlobalIdentityManager
+        from src.steps.PlayerTracker import PlayerTracker
+        from src.steps.CrossViewMatcher import CrossViewMatcher
+        from src.steps.TeamClassifier import TeamClassifier
+        from src.steps.TemporalSmoother import CostSmoother, TrackSmoother
+        from src.components.ModelStrategies import UltralyticsYoloModel
+
+        self.pipeline = pipeline
+        self.transformer = transformer
+        self.trackers = {view: PlayerTracker(UltralyticsYoloModel, broker=pipeline.broker) for view in self.VIEWS}
+        self.track_smoother = TrackSmoother() if smoothing else None
+        self.cost_smoother = CostSmoother(self.track_smoother) if smoothing else None
+        self.matcher = CrossViewMatcher(settings.FEATURE_WEIGHTS, max_cost_threshold=max_cost, cost_smoother=self.cost_smoother)
+        self.team_classifier = TeamClassifier() if team_filter else None
+        self.id_manager = GlobalIdentityManager()
+        self.frame_index = 0
+
+
+    async def _view_players(self, view :str, frame :np.ndarray) -> list:
+        pipeline = self.pipeline
+        detections = (await pipeline.infer("yolo", [frame]))[0]
+        tracked_players = await pipeline.run_blocking(self.trackers[view].track_detections, frame, detections)
+        boxes = [box for box, _, _ in tracked_players]
+        appearances = await pipeline.infer("reid", pipeline.feature_extractor.crop_boxes(frame, boxes))
+        "The broker's detections carry the pose keypoints, so no YOLO call runs on the executor threads."
+        features = await pipeline.run_blocking(pipeline.feature_extractor.extract_frame_features, frame, boxes, self.transformer,
+                                               appearances, detections)
+        return [
+            {"view": view, "track_id": track_id, "features": player_features}
+            for (box, track_id, conf), player_features in zip(tracked_players, features)
+        ]
+
+
+    def _match(self, frame_data :list) -> Dict:
+        if self.track_smoother is not None:
+            self.track_smoother.update(self.frame_index, frame_data)
+            self.cost_smoother.next_frame(self.frame_index)
+        if self.team_classifier is not None:
+            self.team_classifier.assign(frame_data)
+        players_1 = [p for p in frame_data if p["view"] == "broadcast"]
+        players_2 = [p for p in frame_data if p["view"] == "tacticam"]
+
+        matched, match_costs, unmatched1, unmatched2 = self.matcher.match_players_with_costs(players_1, players_2)
+        records = self.id_manager.assign(matched, unmatched1, unmatched2, match_costs)
+        return {"frame_index": self.frame_index, "players": frame_data, "matches": (matched, match_costs, unmatched1, unmatched2), "records": records}
+
+
+    async def process(self, frame1 :np.ndarray, frame2 :np.ndarray) -> Dict:
+        """
+        Tracks, describes and matches the players of a synchronized frame pair.
+
+        Returns:
+            a dict with frame_index, players (per-frame player data), matches (as returned by
+            match_players_with_costs) and records (global IDs, see GlobalIdentityManager.assign).
+        """
+        start = time.perf_counter()
+        views = await asyncio.gather(*(self._view_players(view, frame) for view, frame in zip(self.VIEWS, (frame1, frame2))))
+        result = await self.pipeline.run_blocking(self._match, [p for view_players in views for p in view_players])
+        self.frame_index += 1
+        metrics.observe("async.process_pair", time.perf_counter() - start)
+        metrics.increment("frames")
+        return result
+
+
+    async def run(self, synchronizer, fps :int, **kwargs) -> AsyncIterator[Dict]:
+        """Processes the synchronized frame pairs of `synchronizer`, decoding ahead while processing."""
+        async for frame1, frame2 in async_frame_pairs(synchronizer, fps, **kwargs):
+            yield await self.process(frame1, frame2)
+
+
+async def serve_pairs(pipeline :AsyncPipeline, pairs :List[Tuple], fps :int) -> List[List[Dict]]:
+    """
+    Runs several (synchronizer, transformer) camera pairs concurrently on one pipeline.
+    Returns the results of every pair.
+    """
+    async def run_pair(synchronizer, transformer) -> List[Dict]:
+        return [result async for result in pipeline.session(transformer).run(synchronizer, fps)]
+
+    return list(await asyncio.gather(*(run_pair(synchronizer, transformer) for synchronizer, transformer in pairs)))
@@ -0,0 +1,173 @@
+import logging
+import numpy as np
+from typing import Dict, Iterable, List
+
+from src.config import settings
+from src.steps.CrossViewMatcher import cosine_distance_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkStitcher:
+    """
+    Reconciles track IDs across extraction chunks.
+
+    Consecutive chunks processed by the same tracker session keep their track IDs. At the start
+    of a new session (a resumed run, or a chunk processed by another worker) the tracks seen in
+    the first frames of the chunk are matched, per view, to the tracks seen in the last frames of
+    the previous chunk by field position and appearance, and take over their IDs.
+    Tracks without a counterpart get fresh IDs, so IDs never collide across sessions.
+    """
+
+    def __init__(self, boundary_frames :int = settings.STITCH_BOUNDARY_FRAMES, max_cost :float = settings.STITCH_MAX_COST,
+                 max_field_distance :float = 100, overlap_tolerance :float = settings.SEGMENT_LINK_TOLERANCE):
+        self.boundary_frames = boundary_frames
+        self.max_cost = max_cost
+        self.max_field_distance = max_field_distance
+        self.overlap_tolerance = overlap_tolerance
+
+
+    @staticmethod
+    def _track_observations(frames :Iterable[list], last :bool) -> Dict[str, Dict[int, dict]]:
+        """{view: {track_id: features}} of the last (or first) observation of every track in `frames`."""
+        observations : Dict[str, Dict[int, dict]] = {}
+        for frame_data in frames:
+            for p in frame_data:
+                view_tracks = observations.setdefault(p['view'], {})
+                if last or p['track_id'] not in view_tracks:
+                    view_tracks[p['track_id']] = p['features']
+        return observations
+
+
+    def _match_boundary(self, previous :Dict[int, dict], current :Dict[int, dict]) -> Dict[int, int]:
+        """{current track_id: previous track_id} for tracks continuing across the boundary."""
+        from scipy.optimize import linear_sum_assignment
+
+        if not previous or not current:
+            return {}
+        previous_ids, current_ids = list(previous), list(current)
+        coords1 = np.stack([previous[t]['field_coords'] for t in previous_ids]).astype(np.float64)
+        coords2 = np.stack([current[t]['field_coords'] for t in current_ids]).astype(np.float64)
+        distance_cost = np.linalg.norm(coords1[:, None, :] - coords2[None, :, :], axis=2) / self.max_field_distance
+        appearance_cost = cosine_distance_matrix(
+            np.stack([previous[t]['appearance'] for t in previous_ids]),
+            np.stack([current[t]['appearance'] for t in current_ids]),
+        )
+        cost_matrix = 0.5 * distance_cost + 0.5 * appearance_cost
+
+        row_ind, col_ind = linear_sum_assignment(cost_matrix)
+        return {
+            current_ids[c]: previous_ids[r] for r, c in zip(row_ind, col_ind) if cost_matrix[r, c] < self.max_cost
+        }
+
+
+    def stitch(self, chunks :Iterable[dict]) -> List[list]:
+        """
+        Concatenates the frames of the chunks (in order) with reconciled track IDs.
+
+        Every chunk is a dict with 'session' and 'frames' (per-frame player data lists).
+        Player dicts are updated in place.
+        """
+        frames : List[list] = []
+        id_maps : Dict[str, Dict[int, int]] = {}
+        next_id = 1
+        previous_session, previous_tail = None, None
+        continued = reattached = 0
+
+        for chunk in chunks:
+            chunk_frames = chunk['frames']
+            if chunk['session'] != previous_session:
+                "Track IDs of a new session are linked to the stitched IDs at the end of the previous chunk."
+                id_maps = {}
+                if previous_tail is not None:
+                    head = self._track_observations(chunk_frames[:self.boundary_frames], last=False)
+                    for view, current in head.items():
+                        id_maps[view] = self._match_boundary(previous_tail.get(view, {}), current)
+                        reattached += len(id_maps[view])
+            else:
+                continued += 1
+
+            for frame_data in chunk_frames:
+                for p in frame_data:
+                    view_map = id_maps.setdefault(p['view'], {})
+                    if p['track_id'] not in view_map:
+                        view_map[p['track_id']] = next_id
+                        next_id += 1
+                    p['track_id'] = view_map[p['track_id']]
+                frames.append(frame_data)
+
+            "Player track IDs are stitched IDs from here on."
+            previous_tail = self._track_observations(chunk_frames[-self.boundary_frames:], last=True)
+            previous_session = chunk['session']
+
+        logger.info(f"Stitched {len(frames)} frames, {reattached} tracks re-attached across sessions, {continued} continued chunks")
+        return frames
+
+
+    def _link_overlap(self, previous_frames :List[list], current_frames :List[list]) -> Dict[str, Dict[int, int]]:
+        """
+        {view: {current track_id: previous track_id}} from frames processed by both segments.
+
+        Both segments detect the same players on the same decoded frames, so a detection of one
+        segment lands on the same field position as a detection of the other. Every frame where two
+        tracks are mutual nearest neighbours within `overlap_tolerance` is a vote for linking them.
+        """
+        votes : Dict[tuple, int] = {}
+        for previous, current in zip(previous_frames, current_frames):
+            for view in {p['view'] for p in previous} & {p['view'] for p in current}:
+                players1 = [p for p in previous if p['view'] == view]
+                players2 = [p for p in current if p['view'] == view]
+                coords1 = np.stack([p['features']['field_coords'] for p in players1]).astype(np.float64)
+                coords2 = np.stack([p['features']['field_coords'] for p in players2]).astype(np.float64)
+                distances = np.linalg.norm(coords1[:, None, :] - coords2[None, :, :], axis=2)
+                nearest2, nearest1 = distances.argmin(axis=1), distances.argmin(axis=0)
+                for i, j in enumerate(nearest2):
+                    if nearest1[j] == i and distances[i, j] <= self.overlap_tolerance:
+                        key = (view, players2[j]['track_id'], players1[i]['track_id'])
+                        votes[key] = votes.get(key, 0) + 1
+
+        links : Dict[str, Dict[int, int]] = {}
+        used = set()
+        for (view, current_id, previous_id), _ in sorted(votes.items(), key=lambda item: -item[1]):
+            view_links = links.setdefault(view, {})
+            if current_id in view_links or (view, previous_id) in used:
+                continue
+            view_links[current_id] = previous_id
+            used.add((view, previous_id))
+        return links
+
+
+    def merge_overlapping(self, segments :Iterable[dict]) -> List[list]:
+        """
+        Merges overlapping segments (dicts with 'start_frame', 'frame_indices' and 'frames') into one timeline.
+
+        Frames are keyed by their synchronized frame index, so segments that dropped or missed
+        frames (e.g. unpaired ones) still align. Frames covered by two segments are taken from the
+        earlier one, whose tracker is already warmed up, and used to link the track IDs of the later
+        segment to the merged ones. Player dicts are updated in place.
+        """
+        merged : Dict[int, list] = {}
+        next_id = 1
+        linked = 0
+
+        for segment in sorted(segments, key=lambda segment: segment['start_frame']):
+            segment_frames = segment['frames']
+            frame_indices = segment.get('frame_indices') or range(segment['start_frame'], segment['start_frame'] + len(segment_frames))
+            overlap = [(merged[index], frame_data) for index, frame_data in zip(frame_indices, segment_frames) if index in merged]
+            id_maps = self._link_overlap(*map(list, zip(*overlap))) if overlap else {}
+            linked += sum(len(view_links) for view_links in id_maps.values())
+
+            for index, frame_data in zip(frame_indices, segment_frames):
+                if index in merged:
+                    continue
+                for p in frame_data:
+                    view_map = id_maps.setdefault(p['view'], {})
+                    if p['track_id'] not in view_map:
+                        view_map[p['track_id']] = next_id
+                        next_id += 1
+                    p['track_id'] = view_map[p['track_id']]
+                merged[index] = frame_data
+
+        frames = [merged[index] for index in sorted(merged)]
+        logger.info(f"Merged {len(frames)} frames from overlapping segments, {linked} tracks linked across segments")
+        return frames
@@ -1,7 +1,7 @@
 import logging
 import numpy as np
-from scipy.optimize import linear_sum_assignment
-from scipy.spatial.distance import cosine, euclidean
+
+from utils.metrics_util import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -9,9 +9,9 @@ logger = logging.getLogger(__name__)
 class CrossViewMatcher:
     """
     It matches player identities across two different camera views using
-    a feature-based cost matrix and the Hungarian algorithm.
+    a feature-based cost matrix and an assignment solver (the Hungarian algorithm or a faster exact path).
     """
-    def __init__(self, feature_weights: dict, max_cost_threshold: float = 0.8):
+    def __init__(self, feature_weights: dict, max_cost_threshold: float = 0.8, cost_smoother=None, solver=None):
         """
         Initializes the matcher with feature weights.
 
@@ -19,14 +19,28 @@ class CrossViewMatcher:
             feature_weights (dict): A dictionary weighting the importance of each feature.
                                     e.g., {'appearance': 0.5, 'field_coords': 0.5}
             max_cost_threshold (float): The maximum allowable cost for a match to be considered valid.
+            cost_smoother (CostSmoother): Optional temporal smoothing of the cost matrices before assignment.
+            solver (AssignmentSolver): Solver of the thresholded assignment, settings.ASSIGNMENT_SOLVER when None.
         """
+        from src.components.AssignmentSolvers import build_assignment_solver
+
         if not np.isclose(sum(feature_weights.values()), 1.0):
             logger.error("Feature weights must sum to 1.")
             raise ValueError("Feature weights must sum to 1.")
             
         self.weights = feature_weights
         self.max_cost = max_cost_threshold
-        logger.info(f"CrossViewMatcher initialized with weights: {self.weights}")
+        self.cost_smoother = cost_smoother
+        self.solver = solver or build_assignment_solver()
+        logger.info(f"CrossViewMatcher initialized with weights: {self.weights}, solver: {self.solver.name}")
+
+    COSTED_FEATURES = ("appearance", "field_coords", "color_hist", "velocity")
+    """Features that contribute to the cost matrix. Other weighted features (e.g. pose) are ignored."""
+
+    MAX_FIELD_DISTANCE = 100
+
+    MAX_VELOCITY_DIFFERENCE = 20
+    """Field pixels per frame, velocities are estimated by TrackSmoother."""
 
     def calculate_cost_matrix(self, players1: list, players2: list) -> np.ndarray:
         """
@@ -39,32 +53,57 @@ class CrossViewMatcher:
         Returns:
             np.ndarray: An M x N matrix of costs, where M=len(players1) and N=len(players2).
         """
-        num_players1 = len(players1)
-        num_players2 = len(players2)
-        cost_matrix = np.zeros((num_players1, num_players2))
-
-        for i in range(num_players1):
-            for j in range(num_players2):
-                p1_features = players1[i]['features']
-                p2_features = players2[j]['features']
-                
-                total_cost = 0
-                
-                if 'appearance' in self.weights:
-                    app_cost = cosine(p1_features['appearance'], p2_features['appearance'])
-                    total_cost += self.weights['appearance'] * app_cost
-                
-                if 'field_coords' in self.weights:
-                    max_field_dist = 100
-                    coord_cost = euclidean(p1_features['field_coords'], p2_features['field_coords']) / max_field_dist
-                    total_cost += self.weights['field_coords'] * coord_cost
-                
-                if 'color_hist' in self.weights:
-                    color_cost = chi_squared_distance(p1_features['color_hist'], p2_features['color_hist'])
-                    total_cost += self.weights['color_hist'] * color_cost
-                    
-                cost_matrix[i, j] = total_cost
-        
+        feature_costs = self.feature_cost_matrices(players1, players2, features=self.weights.keys())
+        cost_matrix = self.combine_costs(feature_costs, self.weights)
+        if self.cost_smoother is not None:
+            cost_matrix = self.cost_smoother.smooth(players1, players2, cost_matrix)
+        return cost_matrix
+
+    @classmethod
+    def feature_cost_matrices(cls, players1: list, players2: list, features=None) -> dict:
+        """
+        Calculates one M x N cost matrix per feature, vectorized over all player pairs.
+
+        The weighted total cost is a linear combination of these matrices (see combine_costs),
+        so they can be computed once and reused across weight combinations.
+        """
+        features = [f for f in (features or cls.COSTED_FEATURES) if f in cls.COSTED_FEATURES]
+        costs = {}
+
+        if 'appearance' in features:
+            costs['appearance'] = cosine_distance_matrix(
+                np.stack([p['features']['appearance'] for p in players1]),
+                np.stack([p['features']['appearance'] for p in players2]),
+            )
+
+        if 'field_coords' in features:
+            coords1 = np.stack([p['features']['field_coords'] for p in players1]).astype(np.float64)
+            coords2 = np.stack([p['features']['field_coords'] for p in players2]).astype(np.float64)
+            costs['field_coords'] = np.linalg.norm(coords1[:, None, :] - coords2[None, :, :], axis=2) / cls.MAX_FIELD_DISTANCE
+
+        if 'color_hist' in features:
+            costs['color_hist'] = chi_squared_distance_matrix(
+                np.stack([p['features']['color_hist'] for p in players1]),
+                np.stack([p['features']['color_hist'] for p in players2]),
+            )
+
+        if 'velocity' in features and all('velocity' in p['features'] for p in players1 + players2):
+            velocities1 = np.stack([p['features']['velocity'] for p in players1]).astype(np.float64)
+            velocities2 = np.stack([p['features']['velocity'] for p in players2]).astype(np.float64)
+            costs['velocity'] = np.minimum(
+                np.linalg.norm(velocities1[:, None, :] - velocities2[None, :, :], axis=2) / cls.MAX_VELOCITY_DIFFERENCE, 1.0
+            )
+
+        return costs
+
+    @staticmethod
+    def combine_costs(feature_costs: dict, weights: dict) -> np.ndarray:
+        """Weighted sum of the per-feature cost matrices."""
+        shape = next(iter(feature_costs.values())).shape if feature_costs else (0, 0)
+        cost_matrix = np.zeros(shape)
+        for feature, cost in feature_costs.items():
+            if feature in weights:
+                cost_matrix += weights[feature] * cost
         return cost_matrix
 
     def match_players_in_frame(self, players_view_1: list, players_view_2: list) -> tuple:
@@ -77,15 +116,84 @@ class CrossViewMatcher:
             - unmatched1 (list): List of unmatched players from view 1.
             - unmatched2 (list): List of unmatched players from view 2.
         """
+        matched_pairs, _, unmatched1, unmatched2 = self.match_players_with_costs(players_view_1, players_view_2)
+        return matched_pairs, unmatched1, unmatched2
+
+    @metrics.timed("matcher.match_players_in_frame")
+    def match_players_with_costs(self, players_view_1: list, players_view_2: list) -> tuple:
+        """
+        Performs the matching for a single frame and keeps the cost of every match.
+
+        Returns:
+            A tuple containing:
+            - matched_pairs (list): List of (player1_data, player2_data) tuples.
+            - match_costs (list): Cost of each matched pair, aligned with matched_pairs.
+            - unmatched1 (list): List of unmatched players from view 1.
+            - unmatched2 (list): List of unmatched players from view 2.
+        """
         if not players_view_1 or not players_view_2:
             logger.warning("One list is empty (either player_view1 or player_view2)")
-            return [], players_view_1, players_view_2
+            return [], [], players_view_1, players_view_2
         
+        if any(p.get('team') is not None for p in players_view_1 + players_view_2):
+            return self.match_players_by_team(players_view_1, players_view_2)
+
         cost_matrix = self.calculate_cost_matrix(players_view_1, players_view_2)
-        
-        row_ind, col_ind = linear_sum_assignment(cost_matrix)
+        return self.assign_from_cost_matrix(players_view_1, players_view_2, cost_matrix)
+
+    TEAM_MISMATCH_COST = 1e6
+
+    def match_players_by_team(self, players_view_1: list, players_view_2: list) -> tuple:
+        """
+        Solves one smaller assignment problem per team (players[i]['team'], see TeamClassifier),
+        so players of different teams are never matched.
+
+        Players without a team are matched in a last pass against every player left unmatched,
+        pairs of two players with known teams being excluded from it.
+
+        Returns the same tuple as match_players_with_costs.
+        """
+        matched_pairs, match_costs = [], []
+        residual1 = [p for p in players_view_1 if p.get('team') is None]
+        residual2 = [p for p in players_view_2 if p.get('team') is None]
+
+        teams = {p['team'] for p in players_view_1 + players_view_2 if p.get('team') is not None}
+        for team in sorted(teams):
+            team1 = [p for p in players_view_1 if p.get('team') == team]
+            team2 = [p for p in players_view_2 if p.get('team') == team]
+            if not team1 or not team2:
+                residual1 += team1
+                residual2 += team2
+                continue
+            matched, costs, unmatched1, unmatched2 = self.assign_from_cost_matrix(team1, team2, self.calculate_cost_matrix(team1, team2))
+            matched_pairs += matched
+            match_costs += costs
+            residual1 += unmatched1
+            residual2 += unmatched2
+
+        if residual1 and residual2:
+            cost_matrix = self.calculate_cost_matrix(residual1, residual2)
+            known1 = np.array([p.get('team') is not None for p in residual1])
+            known2 = np.array([p.get('team') is not None for p in residual2])
+            cost_matrix[known1[:, None] & known2[None, :]] = self.TEAM_MISMATCH_COST
+            matched, costs, residual1, residual2 = self.assign_from_cost_matrix(residual1, residual2, cost_matrix)
+            matched_pairs += matched
+            match_costs += costs
+
+        metrics.increment("matcher.team_groups", len(teams))
+        return matched_pairs, match_costs, residual1, residual2
+
+    def assign_from_cost_matrix(self, players_view_1: list, players_view_2: list, cost_matrix: np.ndarray) -> tuple:
+        """
+        Solves the assignment for an already computed cost matrix. Pairs above the cost threshold
+        are gated out before solving, so they don't influence the other matches.
+
+        Returns the same tuple as match_players_with_costs.
+        """
+        row_ind, col_ind = self.solver.solve(cost_matrix, self.max_cost)
         
         matched_pairs = []
+        match_costs = []
         unmatched1_indices = set(range(len(players_view_1)))
         unmatched2_indices = set(range(len(players_view_2)))
         
@@ -93,6 +201,7 @@ class CrossViewMatcher:
             cost = cost_matrix[r, c]
             if cost < self.max_cost:
                 matched_pairs.append((players_view_1[r], players_view_2[c]))
+                match_costs.append(float(cost))
                 unmatched1_indices.discard(r)
                 unmatched2_indices.discard(c)
                 logger.debug(f"Matched Player_ID {players_view_1[r]['track_id']} in View 1 with Player_ID {players_view_2[c]['track_id']} in View 2 with cost {cost:.2f}")
@@ -100,9 +209,26 @@ class CrossViewMatcher:
         unmatched1 = [players_view_1[i] for i in unmatched1_indices]
         unmatched2 = [players_view_2[i] for i in unmatched2_indices]
 
-        return matched_pairs, unmatched1, unmatched2
+        metrics.increment("matches", len(matched_pairs))
+        return matched_pairs, match_costs, unmatched1, unmatched2
     
 
 def chi_squared_distance(hist_a, hist_b, eps=1e-10):
     """Computes the Chi-Squared distance between two histograms."""
-    return 0.5 * np.sum([((a - b) ** 2) / (a + b + eps) for (a, b) in zip(hist_a, hist_b)])
\ No newline at end of file
+    return 0.5 * np.sum([((a - b) ** 2) / (a + b + eps) for (a, b) in zip(hist_a, hist_b)])
+
+
+def chi_squared_distance_matrix(hists_a: np.ndarray, hists_b: np.ndarray, eps=1e-10) -> np.ndarray:
+    """Chi-Squared distance between every row of hists_a (M x K) and every row of hists_b (N x K)."""
+    a = np.asarray(hists_a, dtype=np.float64)[:, None, :]
+    b = np.asarray(hists_b, dtype=np.float64)[None, :, :]
+    return 0.5 * np.sum((a - b) ** 2 / (a + b + eps), axis=2)
+
+
+def cosine_distance_matrix(vectors_a: np.ndarray, vectors_b: np.ndarray, eps=1e-12) -> np.ndarray:
+    """Cosine distance between every row of vectors_a (M x D) and every row of vectors_b (N x D)."""
+    a = np.asarray(vectors_a, dtype=np.float64)
+    b = np.asarray(vectors_b, dtype=np.float64)
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), eps)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), eps)
+    return 1.0 - a @ b.T
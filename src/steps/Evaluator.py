@@ -0,0 +1,241 @@
+import csv
+import os
+import time
+import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Tuple
+
+from src.IDManager import GlobalIdentityManager
+from src.steps.CrossViewMatcher import CrossViewMatcher
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Ground-truth evaluation of the cross view matching.
+
+Annotations are a CSV file with a header and one correspondence per row :
+
+    frame,broadcast_track,tacticam_track
+    0,3,12
+
+`frame` is the synchronized frame index, as stored in the extracted features cache.
+"""
+
+
+def load_annotations(path :Path) -> Dict[int, Set[Tuple[int, int]]]:
+    """Loads annotated correspondences as {frame: {(broadcast_track, tacticam_track)}}."""
+    path = Path(path)
+    if not path.exists():
+        logger.error(f"Annotation file {path} does not exist.")
+        raise FileNotFoundError(f"Annotation file {path} does not exist.")
+
+    annotations : Dict[int, Set[Tuple[int, int]]] = {}
+    with open(path, newline="") as annotation_file:
+        for row in csv.DictReader(annotation_file):
+            annotations.setdefault(int(row["frame"]), set()).add((int(row["broadcast_track"]), int(row["tacticam_track"])))
+
+    logger.info(f"Loaded {sum(map(len, annotations.values()))} correspondences over {len(annotations)} frames from {path}")
+    return annotations
+
+
+def _precision_recall_f1(true_positives :int, false_positives :int, false_negatives :int, ground_truth :int) -> Dict[str, float]:
+    precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else 0.0
+    recall = true_positives / (true_positives + false_negatives) if true_positives + false_negatives else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "tp": true_positives, "fp": false_positives, "fn": false_negatives,
+        "precision": precision, "recall": recall, "f1": f1,
+        "accuracy": true_positives / ground_truth if ground_truth else 0.0,
+    }
+
+
+class MatchingEvaluator:
+    """
+    Scores CrossViewMatcher and GlobalIdentityManager output against annotated correspondences.
+
+    Only annotated frames are scored. A predicted pair counts as a false positive when it is
+    not annotated but one of its tracks is annotated in that frame, pairs of players that
+    were not annotated at all are ignored.
+    """
+
+    def __init__(self, annotations :Dict[int, Set[Tuple[int, int]]]):
+        self.annotations = annotations
+
+
+    def _score_pairs(self, predicted_by_frame :Dict[int, Set[Tuple[int, int]]]) -> Dict[str, float]:
+        true_positives = false_positives = false_negatives = ground_truth = 0
+
+        for frame, expected in self.annotations.items():
+            predicted = predicted_by_frame.get(frame, set())
+            annotated_broadcast = {b for b, _ in expected}
+            annotated_tacticam = {t for _, t in expected}
+            relevant = {(b, t) for b, t in predicted if b in annotated_broadcast or t in annotated_tacticam}
+
+            true_positives += len(relevant & expected)
+            false_positives += len(relevant - expected)
+            false_negatives += len(expected - relevant)
+            ground_truth += len(expected)
+
+        return _precision_recall_f1(true_positives, false_positives, false_negatives, ground_truth)
+
+
+    def score_matches(self, frame_matched_pairs :List[list]) -> Dict[str, float]:
+        """Scores the matched pairs of every frame (indexed like the features cache)."""
+        predicted = {
+            frame: {(int(p1["track_id"]), int(p2["track_id"])) for p1, p2 in frame_matched_pairs[frame]}
+            for frame in self.annotations if frame < len(frame_matched_pairs)
+        }
+        return self._score_pairs(predicted)
+
+
+    def score_identities(self, frame_records :List[list]) -> Dict[str, float]:
+        """
+        Scores the global IDs : a broadcast and a tacticam track are predicted to be the same
+        player in a frame when both are present and share the same global ID.
+        """
+        predicted = {}
+        for frame in self.annotations:
+            if frame >= len(frame_records):
+                continue
+            broadcast_ids, tacticam_ids = {}, {}
+            for record in frame_records[frame]:
+                if "broadcast_track_id" in record:
+                    broadcast_ids[int(record["broadcast_track_id"])] = record["global_id"]
+                if "tacticam_track_id" in record:
+                    tacticam_ids[int(record["tacticam_track_id"])] = record["global_id"]
+            predicted[frame] = {
+                (b, t) for b, b_gid in broadcast_ids.items() for t, t_gid in tacticam_ids.items() if b_gid == t_gid
+            }
+        return self._score_pairs(predicted)
+
+
+def split_views(frame_data :list) -> Tuple[list, list]:
+    players_1 = [p for p in frame_data if p["view"] == "broadcast"]
+    players_2 = [p for p in frame_data if p["view"] == "tacticam"]
+    return players_1, players_2
+
+
+def precompute_frame_costs(frames :List[list]) -> List[Tuple[list, list, dict | None]]:
+    """
+    Splits every cached frame by view and computes its per-feature cost matrices once.
+    The weighted cost of any configuration is a linear combination of these matrices.
+    Frames where a view has no player get None.
+    """
+    frame_costs = []
+    for frame_data in frames:
+        players_1, players_2 = split_views(frame_data)
+        feature_costs = CrossViewMatcher.feature_cost_matrices(players_1, players_2) if players_1 and players_2 else None
+        frame_costs.append((players_1, players_2, feature_costs))
+    return frame_costs
+
+
+def replay(frame_costs :List[Tuple[list, list, dict | None]], feature_weights :dict, max_cost_threshold :float) -> Tuple[list, list, list]:
+    """
+    Replays precomputed frame costs through the matcher and a fresh identity manager.
+
+    Returns:
+        The matched pairs, the match costs and the global ID records of every frame.
+    """
+    matcher = CrossViewMatcher(feature_weights, max_cost_threshold=max_cost_threshold)
+    id_manager = GlobalIdentityManager()
+
+    frame_matched_pairs, frame_match_costs, frame_records = [], [], []
+    for players_1, players_2, feature_costs in frame_costs:
+        if feature_costs is None:
+            matched, costs, unmatched1, unmatched2 = [], [], players_1, players_2
+        else:
+            cost_matrix = matcher.combine_costs(feature_costs, feature_weights)
+            matched, costs, unmatched1, unmatched2 = matcher.assign_from_cost_matrix(players_1, players_2, cost_matrix)
+        frame_matched_pairs.append(matched)
+        frame_match_costs.append(costs)
+        frame_records.append(id_manager.assign(matched, unmatched1, unmatched2, costs))
+
+    return frame_matched_pairs, frame_match_costs, frame_records
+
+
+def summarize_matches(frame_costs :list, frame_match_costs :List[list], frame_records :List[list]) -> Dict[str, float]:
+    """Label free matching statistics, reported when no annotations are available."""
+    players = sum(min(len(players_1), len(players_2)) for players_1, players_2, _ in frame_costs)
+    costs = [cost for match_costs in frame_match_costs for cost in match_costs]
+    return {
+        "matches": len(costs),
+        "match_rate": len(costs) / players if players else 0.0,
+        "mean_match_cost": float(sum(costs) / len(costs)) if costs else 0.0,
+        "global_ids": len({record["global_id"] for records in frame_records for record in records}),
+    }
+
+
+def evaluate_config(frame_costs :List[Tuple[list, list, dict | None]], annotations :Dict[int, Set[Tuple[int, int]]] | None,
+                    feature_weights :dict, max_cost_threshold :float) -> Dict:
+    """
+    Scores one configuration on precomputed frame costs (see precompute_frame_costs).
+    Matching and identity scores are only reported when annotations are given.
+    """
+    start = time.perf_counter()
+    frame_matched_pairs, frame_match_costs, frame_records = replay(frame_costs, feature_weights, max_cost_threshold)
+
+    result = {
+        "feature_weights": dict(feature_weights),
+        "max_cost_threshold": max_cost_threshold,
+        "summary": summarize_matches(frame_costs, frame_match_costs, frame_records),
+    }
+    if annotations:
+        evaluator = MatchingEvaluator(annotations)
+        result["matching"] = evaluator.score_matches(frame_matched_pairs)
+        result["identity"] = evaluator.score_identities(frame_records)
+    result["runtime_sec"] = time.perf_counter() - start
+    return result
+
+
+"""Per worker process state, loaded once by the pool initializer."""
+_worker_frame_costs : List[Tuple[list, list, dict | None]] = []
+_worker_annotations : Dict[int, Set[Tuple[int, int]]] | None = None
+
+
+def _init_worker(features_path :Path, annotations_path :Path | None) -> None:
+    global _worker_frame_costs, _worker_annotations
+    from utils.feature_cache import load_cache
+
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_frame_costs = precompute_frame_costs(load_cache(features_path))
+    _worker_annotations = load_annotations(annotations_path) if annotations_path else None
+
+
+def _evaluate_in_worker(config :Tuple[dict, float]) -> Dict:
+    feature_weights, max_cost_threshold = config
+    return evaluate_config(_worker_frame_costs, _worker_annotations, feature_weights, max_cost_threshold)
+
+
+def result_score(result :Dict) -> Tuple[float, float]:
+    """Matching F1, then identity F1 to break ties."""
+    return result["matching"]["f1"], result["identity"]["f1"]
+
+
+def evaluate_grid(features_path :Path, annotations_path :Path | None, configs :List[Tuple[dict, float]],
+                  workers :int | None = None) -> List[Dict]:
+    """
+    Evaluates (feature_weights, max_cost_threshold) configurations in parallel on cached features.
+
+    Each worker loads the cache and computes the per-feature cost matrices once, then every
+    configuration only combines them and solves the assignments. Results are sorted best first.
+
+    Label free statistics (match rate, mean cost) favour the largest threshold and the weights
+    giving the lowest costs, so configurations are only ranked against annotations.
+    """
+    if annotations_path is None and len(configs) > 1:
+        logger.error("Ranking several configurations needs annotations.")
+        raise ValueError("Ranking several configurations needs annotations, pass --annotations.")
+
+    workers = min(workers or os.cpu_count() or 1, max(len(configs), 1))
+    logger.info(f"Evaluating {len(configs)} configurations on {workers} workers")
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features_path, annotations_path)) as executor:
+        results = list(executor.map(_evaluate_in_worker, configs, chunksize=max(1, len(configs) // (workers * 4))))
+
+    if annotations_path is not None:
+        results.sort(key=result_score, reverse=True)
+    logger.info(f"Evaluated {len(configs)} configurations in {time.perf_counter() - start:.2f}s")
+    return results
@@ -1,38 +1,61 @@
 import cv2
 import logging
-import torchreid as TRE
+import threading
 import numpy as np
-import torch
-from PIL import Image
 
 from src.config import settings
 from src.interfaces.ModelInterface import ModelInterface
 from src.components.ModelStrategies import UltralyticsYoloModel
 from src.components.ModelStrategies import TorchReIDModel
+from src.components.ModelRegistry import ModelRegistry, model_registry
 from src.steps.ViewTransformer import ViewTransformer
+from utils.metrics_util import metrics
+from utils.color_histogram_utils import color_histograms
 
 logger = logging.getLogger(__name__)
 
+POSE_MIN_IOU = 0.3
+"""Minimum overlap between a player box and a pose detection to take its keypoints."""
+
+
+def box_iou(boxes_a :np.ndarray, boxes_b :np.ndarray) -> np.ndarray:
+    """Intersection over union of every x1, y1, x2, y2 box of boxes_a (M x 4) with every one of boxes_b (N x 4)."""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
 
 class FeatureExtractor:
     """
     It is for extracting rich feature vector for each player detected.
     """
 
+    _pose_lock = threading.Lock()
+    """The YOLO predictor of the registry is shared by all extractors and is not thread safe."""
 
-    def __init__(self, reid_model_loader : ModelInterface , model_loader : ModelInterface ):
+
+    def __init__(self, reid_model_loader : ModelInterface , model_loader : ModelInterface, registry : ModelRegistry = model_registry, broker = None):
         """
-        Initializes the feature extractor and loads necessary models.
+        Initializes the feature extractor with models shared through the registry.
+        With an InferenceBroker, the Re-ID crops of a frame are batched with those of other callers.
         """
-        self.reid_model_loader = reid_model_loader()
-        self.model_loader = model_loader()
+        self.reid_model_loader = registry.get(reid_model_loader)
+        self.model_loader = registry.get(model_loader)
+        self.broker = broker
         logger.info("Feature Extractor Initialized succesfully.")
 
 
+    @metrics.timed("feature_extractor.appearance")
     def extract_appearance_embedding(self, frame : np.ndarray, box : np.ndarray) -> np.ndarray:
         """
         Extracts a deep learning-based Re-ID feature vector.
         """
+        import torch
+        from PIL import Image
+
         x1, y1, x2, y2 = map(int, box)
         crop = frame[y1:y2, x1:x2]
 
@@ -49,34 +72,58 @@ class FeatureExtractor:
 
         return embedding.cpu().numpy().flatten()
     
+    @staticmethod
+    def crop_boxes(frame : np.ndarray, boxes : list) -> list:
+        """Player crops of a frame (views, not copies)."""
+        crops = []
+        for box in boxes:
+            x1, y1, x2, y2 = map(int, box)
+            crops.append(frame[max(0, y1):y2, max(0, x1):x2])
+        return crops
+
+
+    @metrics.timed("feature_extractor.embed_crops")
+    def embed_crops(self, crops : list) -> np.ndarray:
+        """
+        Re-ID feature vectors of a batch of BGR crops in one forward pass, as a (N, D) matrix.
+        Crops may come from different frames and streams. Empty crops get a zero embedding.
+        """
+        import torch
+        from PIL import Image
+
+        valid = [i for i, crop in enumerate(crops) if crop.size > 0]
+        if not valid:
+            return np.zeros((len(crops), 512), dtype=np.float32)
+
+        batch = torch.stack([
+            self.reid_model_loader.ried_transfrom(Image.fromarray(cv2.cvtColor(crops[i], cv2.COLOR_BGR2RGB))) for i in valid
+        ]).to(self.reid_model_loader.device)
+        with torch.no_grad():
+            batch_embeddings = self.reid_model_loader.reid_model(batch).cpu().numpy()
+
+        embeddings = np.zeros((len(crops), batch_embeddings.shape[1]), dtype=batch_embeddings.dtype)
+        embeddings[valid] = batch_embeddings
+        return embeddings
+
+
+    @metrics.timed("feature_extractor.color_histogram")
     def extract_color_histogram(self, frame : np.ndarray, box : np.ndarray) -> np.ndarray:
         """
         Computes a color histogram for the torso region
         """
-        x1, y1, x2, y2 = map(int, box)
+        return color_histograms(frame, [box])[0]
 
-        torso_y1 = y1 + int((y2 - y1) * 0.2)
-        torso_y2 = y1 + int((y2 - y1) * 0.6)
-        torso_crop = frame[torso_y1:torso_y2, x1:x2]
 
-        if torso_crop.size == 0:
-            return np.zeros(16 + 16 + 16) 
-        
-        hsv_crop = cv2.cvtColor(torso_crop, cv2.COLOR_BGR2HSV)
-        
-        # Calculate histograms for H, S, V channels
-        h_hist = cv2.calcHist([hsv_crop], [0], None, [16], [0, 180])
-        s_hist = cv2.calcHist([hsv_crop], [1], None, [16], [0, 256])
-        v_hist = cv2.calcHist([hsv_crop], [2], None, [16], [0, 256])
-        
-        cv2.normalize(h_hist, h_hist)
-        cv2.normalize(s_hist, s_hist)
-        cv2.normalize(v_hist, v_hist)
-        
-        return np.concatenate((h_hist, s_hist, v_hist)).flatten()
-    
+    @metrics.timed("feature_extractor.color_histograms")
+    def extract_color_histograms(self, frame : np.ndarray, boxes : list) -> np.ndarray:
+        """
+        Computes the torso color histograms of all boxes of a frame in one pass, as a (N, 48) float32 matrix.
+        """
+        return color_histograms(frame, boxes)
 
 
+
+    @metrics.timed("feature_extractor.field_coordinates")
     def get_field_coordinates(self, box :np.ndarray, transformer :ViewTransformer) -> np.ndarray:
         box_center_x = (box[0] + box[2]) / 2
         box_bottom_y = box[3]
@@ -84,16 +131,55 @@ class FeatureExtractor:
         
         warped_pos = cv2.perspectiveTransform(player_pos_pixel, transformer.homography_matrix)
         return warped_pos.flatten()
+
+
+    @metrics.timed("feature_extractor.field_coordinates_batch")
+    def get_field_coordinates_batch(self, boxes :list, transformer :ViewTransformer) -> np.ndarray:
+        """Field coordinates of the bottom center of all boxes, as a (N, 2) matrix."""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if len(boxes) == 0:
+            return np.zeros((0, 2), dtype=np.float32)
+        points = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)[None]
+        return cv2.perspectiveTransform(points, transformer.homography_matrix)[0]
     
 
+    @metrics.timed("feature_extractor.pose")
     def extract_pose_keypoints(self, frame: np.ndarray, box: np.ndarray) -> np.ndarray:
-        results = self.model_loader.model(frame)
-        if results[0].keypoints and results[0].keypoints.xy.shape[1] > 0:
-            return results[0].keypoints.xyn.cpu().numpy().flatten()
-        
-        return np.zeros(17 * 2)
+        return self.extract_frame_poses(frame, [box])[0]
+
+
+    @metrics.timed("feature_extractor.poses")
+    def extract_frame_poses(self, frame: np.ndarray, boxes: list, detections=None) -> np.ndarray:
+        """
+        Normalized pose keypoints of every box from a single pose pass over the frame, as a (N, 34)
+        matrix : each box gets the keypoints of the detection it overlaps most, zeros without one.
+        `detections` (the ultralytics Results of the frame, e.g. those the tracker used) spare the pass,
+        otherwise it goes through the broker "yolo" queue when there is one, batched with the other streams.
+        """
+        poses = np.zeros((len(boxes), 17 * 2), dtype=np.float32)
+        if not len(boxes):
+            return poses
+
+        if detections is None and self.broker is not None:
+            detections = self.broker.infer("yolo", [frame])[0]
+        elif detections is None:
+            with self._pose_lock:
+                detections = self.model_loader.model(frame, verbose=False)[0]
+
+        keypoints = getattr(detections, "keypoints", None)
+        if keypoints is None or keypoints.xy.shape[1] == 0 or len(detections.boxes) == 0:
+            return poses
+
+        keypoints = keypoints.xyn.cpu().numpy().reshape(len(detections.boxes), -1)
+        overlaps = box_iou(np.asarray(boxes, dtype=np.float32).reshape(-1, 4), detections.boxes.xyxy.cpu().numpy())
+        best = overlaps.argmax(axis=1)
+        matched = overlaps[np.arange(len(boxes)), best] >= POSE_MIN_IOU
+        poses = np.zeros((len(boxes), keypoints.shape[1]), dtype=np.float32)
+        poses[matched] = keypoints[best[matched]]
+        return poses
     
 
+    @metrics.timed("feature_extractor.extract_features")
     def extract_features(self, frame: np.ndarray, box: np.ndarray, transformer: ViewTransformer) -> dict:
         """
         Runs all feature extractors for a given player box.
@@ -108,3 +194,29 @@ class FeatureExtractor:
 
         return feature_embedding
 
+
+    @metrics.timed("feature_extractor.extract_frame_features")
+    def extract_frame_features(self, frame: np.ndarray, boxes: list, transformer: ViewTransformer, appearances: list | None = None,
+                               detections=None) -> list:
+        """
+        Runs all feature extractors for every player box of a frame. Color histograms, field
+        coordinates and poses are computed for all boxes at once.
+        `appearances` are Re-ID embeddings already computed for the boxes (e.g. batched across streams),
+        `detections` the pose detections of the frame (see extract_frame_poses).
+        """
+        color_hists = self.extract_color_histograms(frame, boxes)
+        field_coords = self.get_field_coordinates_batch(boxes, transformer)
+        poses = self.extract_frame_poses(frame, boxes, detections)
+        if appearances is None and self.broker is not None:
+            appearances = self.broker.infer("reid", self.crop_boxes(frame, boxes))
+
+        return [
+            {
+                "appearance" : appearances[i] if appearances is not None else self.extract_appearance_embedding(frame,box),
+                "color_hist" : color_hists[i],
+                "field_coords" : field_coords[i],
+                "pose" : poses[i]
+            }
+            for i, box in enumerate(boxes)
+        ]
+
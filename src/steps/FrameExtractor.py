@@ -1,11 +1,13 @@
 import logging
+import itertools
 from pathlib import Path
 import numpy as np
-from typing import Iterator,Type
+from typing import Iterator, Tuple, Type
 
 
 from src.components.FrameExtractionStrategies import FfmpegcvCPUStrategy
 from src.interfaces.FrameExtractorInterface import FrameExtractingStrategy
+from utils.metrics_util import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +16,9 @@ class FrameExtractor:
     A class for implementing fram extraction
     """
 
-    def __init__(self, video_path : Path, strategy : Type[FrameExtractingStrategy]):
+    def __init__(self, video_path : Path, strategy : Type[FrameExtractingStrategy], **strategy_kwargs):
         logger.info(f"Initializing extractor for {video_path}  with primary strategy {strategy.__name__}")
-        self.strategy = strategy(video_path=video_path)
+        self.strategy = strategy(video_path=video_path, **strategy_kwargs)
     
 
     def __enter__(self):
@@ -37,11 +39,60 @@ class FrameExtractor:
             logger.error(f"Traceback to the exception : {exc_tb}")
 
     
-    def extract(self, frames_per_second : int = 15) -> Iterator[np.ndarray]:
+    def extract(self, frames_per_second : int = 15, start_index : int = 0) -> Iterator[np.ndarray]:
+        """
+        Yields frames at `frames_per_second`, starting at the `start_index`-th of them.
+        The strategy seeks to the start when it can, otherwise frames before it are decoded and skipped.
+        """
+        for _, frame in self.extract_timed(frames_per_second, start_sec=start_index / frames_per_second):
+            yield frame
+
+
+    def extract_timed(self, frames_per_second : float, start_sec : float = 0.0) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Yields (timestamp, frame) pairs at `frames_per_second`, from `start_sec` seconds into the video.
+        Timestamps are presentation timestamps in seconds for files, capture times for live sources.
+        """
         if not self.strategy.is_opened:
             logger.error("Video source is not open.")
             raise RuntimeError("Video source is not open.")
-        
 
         logger.info(f"Starting frame extraction at {frames_per_second} FPS.")
-        yield from self.strategy.get_frames(frames_per_second)
+        frames = self.strategy.get_timed_frames(frames_per_second) if start_sec <= 0 else self._frames_from(frames_per_second, start_sec)
+        yield from metrics.timed_iter("frame_extractor.extract", frames)
+
+
+    def _frames_from(self, frames_per_second : float, start_sec : float) -> Iterator[Tuple[float, np.ndarray]]:
+        self._seek(start_sec)
+        "Frames sampled before the start (all of them without seeking) are skipped by timestamp."
+        half_step = 0.5 / frames_per_second
+        return itertools.dropwhile(lambda timed_frame: timed_frame[0] + half_step < start_sec, self.strategy.get_timed_frames(frames_per_second))
+
+
+    def _seek(self, start_sec : float) -> bool:
+        start_frame = int(round(start_sec * self.strategy.fps))
+        if self.strategy.seek(start_frame):
+            logger.info(f"Seeked to frame {start_frame} ({start_sec:.3f}s).")
+            return True
+        logger.info(f"{self.strategy.__class__.__name__} can't seek, decoding and skipping {start_sec:.3f}s.")
+        return False
+
+
+    def extract_into(self, pool, frames_per_second : float, start_sec : float = 0.0) -> Iterator[Tuple[float, int]]:
+        """
+        Yields (timestamp, slot) pairs, every frame being decoded into a slot of `pool`
+        (a SharedFrameRing). The caller owns each yielded slot and releases it.
+        """
+        if not self.strategy.is_opened:
+            logger.error("Video source is not open.")
+            raise RuntimeError("Video source is not open.")
+
+        logger.info(f"Starting frame extraction into {pool.slots} shared slots at {frames_per_second} FPS.")
+        if start_sec > 0:
+            self._seek(start_sec)
+        half_step = 0.5 / frames_per_second
+        for timestamp, slot in metrics.timed_iter("frame_extractor.extract", self.strategy.get_timed_frames_into(frames_per_second, pool)):
+            if timestamp + half_step < start_sec:
+                pool.release(slot)
+                continue
+            yield timestamp, slot
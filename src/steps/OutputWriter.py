@@ -0,0 +1,52 @@
+import logging
+from pathlib import Path
+import numpy as np
+from typing import List, Optional, Tuple, Type
+
+from src.interfaces.OutputWriterInterface import OutputWritingStrategy
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+class OutputWriter:
+    """
+    A class for writing the pipeline output with a pluggable strategy.
+    """
+
+    def __init__(self, output_path : Path, strategy : Type[OutputWritingStrategy], fps : float, frame_size : Optional[Tuple[int, int]] = None, **strategy_kwargs):
+        logger.info(f"Initializing output writer for {output_path} with strategy {strategy.__name__}")
+        self.output_path = output_path
+        self.strategy = strategy(output_path=output_path, fps=fps, frame_size=frame_size, **strategy_kwargs)
+        self.frames_written = 0
+
+
+    @property
+    def needs_frames(self) -> bool:
+        return self.strategy.needs_frames
+
+
+    def __enter__(self):
+
+        if not self.strategy.open_output():
+            logger.error(f"{self.strategy.__class__.__name__} failed to open output {self.output_path}")
+            raise IOError(f"Failed to open output with path : {self.output_path}")
+
+        logger.info(f"Successfully opened output with active strategy: {self.strategy.__class__.__name__}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        logger.info(f"Closing output {self.output_path} after {self.frames_written} frames")
+        self.strategy.close_output()
+
+        if exc_type:
+            logger.error(f"Exception during output writing: {exc_val}")
+
+
+    def write(self, frame_index : int, frame : Optional[np.ndarray], records : List[dict]) -> None:
+        if not self.strategy.is_opened:
+            logger.error("Output is not open.")
+            raise RuntimeError("Output is not open.")
+
+        with metrics.timer(f"output_writer.{self.strategy.__class__.__name__}"):
+            self.strategy.write(frame_index, frame, records)
+        self.frames_written += 1
@@ -7,6 +7,8 @@ from src.config import settings
 
 from src.interfaces.ModelInterface import ModelInterface
 from src.components.ModelStrategies import UltralyticsYoloModel
+from src.components.ModelRegistry import ModelRegistry, model_registry
+from utils.metrics_util import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +17,31 @@ class PlayerTracker:
     It handles player detection and tracking within a single video view.
     """
 
-    def __init__(self, model_loader : ModelInterface):
+    def __init__(self, model_loader : ModelInterface, registry : ModelRegistry = model_registry, broker = None, tracker_config :str = "botsort.yaml"):
         """
-        Initializing tracker with yolo model
+        Initializing tracker with yolo model.
+        Weights are shared through the registry, tracker state is kept per PlayerTracker.
+        With an InferenceBroker, detection is batched with other callers and only tracking runs here.
         """
-        self.model_loader : ModelInterface = model_loader()
+        self.model_loader : ModelInterface = registry.get(model_loader).fork()
+        self.broker = broker
+        self.tracker_config = tracker_config
+        self._tracker = None
+        self.last_detections = None
+        """ultralytics Results of the last tracked frame, so its pose keypoints can be reused."""
         
 
     
+    @metrics.timed("player_tracker.track_players")
     def track_players(self, frame : np.ndarray, confidence_threshold :float = 0.4) -> List:
         """
         Performs detection and tracking in a single view.
         """
+        if self.broker is not None:
+            return self.track_detections(frame, self.broker.infer("yolo", [frame])[0], confidence_threshold)
 
         results = self.model_loader.model.track(frame)
+        self.last_detections = results[0]
 
         tracked_players = []
         if results[0].boxes.id is not None:
@@ -41,9 +54,41 @@ class PlayerTracker:
                 if confidence >= confidence_threshold:
                     tracked_players.append((box, track_id, confidence))
         
+        metrics.increment("detections", len(tracked_players))
         return tracked_players
     
 
+    def _build_tracker(self):
+        "Same tracker as model.track, which can't be used on detections made elsewhere."
+        from ultralytics.trackers.track import TRACKER_MAP
+        from ultralytics.utils import IterableSimpleNamespace, YAML
+        from ultralytics.utils.checks import check_yaml
+
+        config = IterableSimpleNamespace(**YAML.load(check_yaml(self.tracker_config)))
+        return TRACKER_MAP[config.tracker_type](args=config, frame_rate=30)
+
+
+    @metrics.timed("player_tracker.track_detections")
+    def track_detections(self, frame : np.ndarray, result, confidence_threshold :float = 0.4) -> List:
+        """
+        Tracks the detections of `frame` (an ultralytics Results, e.g. from the inference broker).
+        """
+        if self._tracker is None:
+            self._tracker = self._build_tracker()
+        self.last_detections = result
+
+        detections = result.boxes.cpu().numpy()
+        tracked_players = []
+        if len(detections):
+            "Rows of x1, y1, x2, y2, track_id, confidence, class_id, detection index."
+            for track in self._tracker.update(detections, frame):
+                if track[5] >= confidence_threshold:
+                    tracked_players.append((track[:4], int(track[4]), float(track[5])))
+
+        metrics.increment("detections", len(tracked_players))
+        return tracked_players
+
+
     @staticmethod
     def draw_tracks(frame: np.ndarray, tracked_players: list):
         """
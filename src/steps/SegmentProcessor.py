@@ -0,0 +1,116 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Parallel extraction of one match : the synchronized timeline is split into overlapping
+segments, each processed by a worker process with its own seeking decoders, tracker and
+feature extractor. Segment results are merged on their overlaps by ChunkStitcher.
+"""
+
+
+def extract_view_players(player_tracker, feature_extractor, transformer, view :str, frame) -> list:
+    """Tracks the players of one view of a frame pair and extracts their features."""
+    tracked_players = player_tracker.track_players(frame)
+    "The tracker's detections carry the pose keypoints, no second YOLO pass is needed."
+    features = feature_extractor.extract_frame_features(frame, [box for box, _, _ in tracked_players], transformer,
+                                                        detections=player_tracker.last_detections)
+    return [
+        {"view": view, "track_id": track_id, "features": player_features}
+        for (box, track_id, conf), player_features in zip(tracked_players, features)
+    ]
+
+
+def extract_frame_players(player_tracker, feature_extractor, transformer, frame1, frame2) -> list:
+    """Tracks the players of a synchronized frame pair and extracts their features."""
+    frame_players = []
+    for view, frame in (("broadcast", frame1), ("tacticam", frame2)):
+        frame_players.extend(extract_view_players(player_tracker, feature_extractor, transformer, view, frame))
+    return frame_players
+
+
+def plan_segments(total_frames :int, segment_frames :int, overlap_frames :int) -> List[Dict]:
+    """
+    Splits [0, total_frames) into segments starting every `segment_frames` frames, each one
+    extended by `overlap_frames` frames into the next segment.
+    """
+    if segment_frames <= 0:
+        logger.error("Segments must be at least one frame long.")
+        raise ValueError("Segments must be at least one frame long.")
+
+    return [
+        {"index": index, "start_frame": start, "stop_frame": min(start + segment_frames + overlap_frames, total_frames)}
+        for index, start in enumerate(range(0, total_frames, segment_frames))
+    ]
+
+
+def _init_worker(threads_per_worker :int) -> None:
+    """Limits the threads of every worker, so workers don't oversubscribe the cores."""
+    import cv2
+    import torch
+
+    cv2.setNumThreads(threads_per_worker)
+    torch.set_num_threads(threads_per_worker)
+
+
+def process_segment(segment :Dict, fps :int, offset_frames :int, confidence :float, transformer_points :Tuple) -> Dict:
+    """
+    Worker : extracts the player data of the synchronized frames [start_frame, stop_frame) of `segment`.
+    """
+    from src.steps.FrameExtractor import FrameExtractor
+    from src.steps.Synchronizer import Synchronizer
+    from src.steps.ViewTransformer import ViewTransformer
+    from src.steps.PlayerTracker import PlayerTracker
+    from src.steps.FeatureExtractor import FeatureExtractor
+    from src.components.FrameExtractionStrategies import OpenCVSeekingStrategy
+    from src.components.ModelStrategies import UltralyticsYoloModel, QuantizedTorchReIDModel
+
+    start = time.perf_counter()
+    synchronizer = Synchronizer(
+        FrameExtractor(settings.BROADCAST_VIDEO_PATH, OpenCVSeekingStrategy),
+        FrameExtractor(settings.TACTICAM_VIDEO_PATH, OpenCVSeekingStrategy),
+    )
+    synchronizer.offset_frames, synchronizer.confidence = offset_frames, confidence
+    transformer = ViewTransformer(*transformer_points)
+    player_tracker = PlayerTracker(UltralyticsYoloModel)
+    feature_extractor = FeatureExtractor(QuantizedTorchReIDModel, UltralyticsYoloModel)
+
+    frame_indices, frames = [], []
+    for frame_index, frame1, frame2 in synchronizer.get_indexed_frames(fps, start=segment["start_frame"], stop=segment["stop_frame"]):
+        frame_indices.append(frame_index)
+        frames.append(extract_frame_players(player_tracker, feature_extractor, transformer, frame1, frame2))
+
+    logger.info(f"Segment {segment['index']} : {len(frames)} frames in {time.perf_counter() - start:.1f}s on pid {os.getpid()}")
+    return {**segment, "session": f"segment-{segment['index']}", "frame_indices": frame_indices, "frames": frames}
+
+
+def extract_segments_parallel(segments :List[Dict], store, fps :int, offset_frames :int, confidence :float,
+                              transformer_points :Tuple, workers :int) -> None:
+    """
+    Processes the segments not yet checkpointed in `store` over `workers` spawned processes,
+    checkpointing every segment as soon as it completes.
+    """
+    pending = [segment for segment in segments if segment["index"] not in set(store.completed_chunks)]
+    logger.info(f"Extracting {len(pending)} of {len(segments)} segments on {workers} workers")
+    if not pending:
+        return
+
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    "Spawned workers, so no torch or decoder state is inherited from the parent."
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(threads_per_worker,)) as executor:
+        futures = [
+            executor.submit(process_segment, segment, fps, offset_frames, confidence, transformer_points)
+            for segment in pending
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            store.save_chunk(result["index"], result)
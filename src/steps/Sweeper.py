@@ -0,0 +1,107 @@
+import json
+import logging
+import itertools
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from src.steps.CrossViewMatcher import CrossViewMatcher
+from src.steps.Evaluator import evaluate_grid
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Hyperparameter sweeps of the matcher (feature weights x max cost threshold) on cached features.
+"""
+
+
+def sweep_features(frames :List[list]) -> List[str]:
+    """
+    Features of CrossViewMatcher.COSTED_FEATURES that every cached player has. Weights on any
+    other feature (e.g. pose, or velocity when the cache was not smoothed) never reach the cost
+    matrix, so they are left out of the search space.
+    """
+    players = [p for frame_data in frames for p in frame_data]
+    features = [f for f in CrossViewMatcher.COSTED_FEATURES if players and all(f in p["features"] for p in players)]
+    if not features:
+        logger.error("No costed feature is available in the features cache.")
+        raise ValueError("No costed feature is available in the features cache.")
+    logger.info(f"Sweeping the weights of {features}")
+    return features
+
+
+def weight_grid(features :Iterable[str], step :float = 0.1) -> List[dict]:
+    """All weight combinations over `features` on a grid of `step` that sum to 1."""
+    features = list(features)
+    units = int(round(1 / step)) if step > 0 else 0
+    if units < 1 or not np.isclose(units * step, 1.0):
+        logger.error(f"Grid step {step} does not divide 1, the weights could not sum to 1.")
+        raise ValueError(f"Grid step {step} must divide 1 (e.g. 0.05, 0.1, 0.25).")
+    grid = []
+    for combination in itertools.product(range(units + 1), repeat=len(features) - 1):
+        remainder = units - sum(combination)
+        if remainder < 0:
+            continue
+        grid.append({feature: round(value * step, 6) for feature, value in zip(features, combination + (remainder,))})
+    return grid
+
+
+def grid_search_space(features :Iterable[str], step :float, thresholds :Sequence[float]) -> List[Tuple[dict, float]]:
+    """Every weight combination of the grid crossed with every threshold."""
+    return [(weights, float(threshold)) for weights in weight_grid(features, step) for threshold in thresholds]
+
+
+def random_search_space(features :Iterable[str], samples :int, threshold_range :Tuple[float, float],
+                        seed :int = 0) -> List[Tuple[dict, float]]:
+    """
+    `samples` configurations with weights drawn uniformly from the simplex (Dirichlet(1))
+    and thresholds drawn uniformly from `threshold_range`.
+    """
+    features = list(features)
+    rng = np.random.default_rng(seed)
+    configs = []
+    for weights, threshold in zip(rng.dirichlet(np.ones(len(features)), size=samples),
+                                  rng.uniform(*threshold_range, size=samples)):
+        "Rounded weights can miss 1 by a few 1e-4, the largest one absorbs the difference so none goes negative."
+        weights = np.round(weights, 4)
+        weights[np.argmax(weights)] += 1.0 - weights.sum()
+        configs.append((dict(zip(features, np.round(weights, 4).tolist())), round(float(threshold), 4)))
+    return configs
+
+
+def run_sweep(features_path :Path, configs :List[Tuple[dict, float]], annotations_path :Path | None = None,
+              workers :int | None = None, output_path :Path | None = None) -> List[Dict]:
+    """
+    Evaluates every configuration over a process pool and optionally writes the results as JSON.
+    Configurations are ranked by matching F1, so comparing several of them needs annotations.
+    """
+    if not configs:
+        logger.error("The sweep search space is empty.")
+        raise ValueError("The sweep search space is empty.")
+
+    results = evaluate_grid(features_path, annotations_path, configs, workers=workers)
+
+    if output_path is not None:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(results, indent=2))
+        logger.info(f"Sweep results saved to: {output_path}")
+    return results
+
+
+def log_results(results :List[Dict], top :int = 5) -> None:
+    for result in results[:top]:
+        summary = result["summary"]
+        message = (
+            f"weights={result['feature_weights']} max_cost={result['max_cost_threshold']} : "
+            f"match rate={summary['match_rate']:.3f}, mean cost={summary['mean_match_cost']:.3f}, "
+            f"global IDs={summary['global_ids']}, runtime={result['runtime_sec']:.3f}s"
+        )
+        if "matching" in result:
+            matching, identity = result["matching"], result["identity"]
+            message += (
+                f", matching P={matching['precision']:.3f} R={matching['recall']:.3f} F1={matching['f1']:.3f}"
+                f", identity F1={identity['f1']:.3f}"
+            )
+        logger.info(message)
@@ -1,10 +1,15 @@
+import math
 import logging
-from typing import Iterator, Tuple, Type
+import collections
+from typing import Callable, Iterator, Tuple, Type
 import numpy as np
 
+from src.config import settings
+
 from src.interfaces.SynchronizationInterface import SynchronizationStrategy
 from src.components.SynchronizationStrategies import CrossCorrelationSynchronizationStrategy
 from src.steps.FrameExtractor import FrameExtractor
+from utils.metrics_util import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,7 @@ class Synchronizer:
         self.strategy = strategy()
         self.offset_frames = 0
         self.confidence = 0.0
+        self.drift_sec = 0.0
         logger.info(f"Synchronizer initialized with strategy: {strategy.__name__}")
 
     def sync(self):
@@ -29,47 +35,267 @@ class Synchronizer:
 
     
 
-    def get_synchronized_frames(self, fps :int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    @property
+    def offset_sec(self) -> float:
+        """Seconds video 2 is ahead of video 1, including the drift corrected while streaming."""
+        return self.offset_frames / self.strategy.fps + self.drift_sec
+
+
+    def get_synchronized_frames(self, fps :int, start :int = 0, stop :int | None = None,
+                                tolerance_sec :float | None = settings.SYNC_TOLERANCE_SEC,
+                                drift_interval_sec :float = settings.SYNC_DRIFT_INTERVAL_SEC) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
         """
         A generator that yields synchronized frame pairs from both videos.
         Assumes video 1 is the reference.
-        The offset determines how many frames to skip in video 2 at the start.
+
+        Frames are paired by presentation timestamp, video 2 being shifted by the offset, so both
+        streams stay aligned over a whole match whatever their frame rates. Every `drift_interval_sec`
+        seconds of video the offset is re-estimated from cheap signatures of the recent frames.
+
+        `start` and `stop` select a range of synchronized frame indices, both videos
+        seeking to the start when their extraction strategy can.
 
         Yields:
             a tuple (frame_from_video_1, frame_from_video_2)
         """
 
+        for _, frame_1, frame_2 in self.get_indexed_frames(fps, start, stop, tolerance_sec, drift_interval_sec):
+            yield frame_1, frame_2
+
+
+    def get_indexed_frames(self, fps :int, start :int = 0, stop :int | None = None,
+                           tolerance_sec :float | None = settings.SYNC_TOLERANCE_SEC,
+                           drift_interval_sec :float = settings.SYNC_DRIFT_INTERVAL_SEC) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Same pairs as get_synchronized_frames, with the synchronized frame index of every pair :
+        its timestamp on video 1 times `fps`. Indices skip the frames left unpaired, so processes
+        reading different ranges of the timeline (e.g. overlapping segments) can align their frames.
+
+        Yields:
+            a tuple (frame_index, frame_from_video_1, frame_from_video_2)
+        """
+        for timestamp, frame_1, frame_2 in self._paired(
+            fps, start, stop, tolerance_sec, drift_interval_sec,
+            lambda start_sec: self.extractor_1.extract_timed(frames_per_second=fps, start_sec=start_sec),
+            lambda start_sec: self.extractor_2.extract_timed(frames_per_second=fps, start_sec=start_sec),
+        ):
+            yield int(round(timestamp * fps)), frame_1, frame_2
+
+
+    def get_synchronized_slots(self, fps :int, pool_1, pool_2, start :int = 0, stop :int | None = None,
+                               tolerance_sec :float | None = settings.SYNC_TOLERANCE_SEC,
+                               drift_interval_sec :float = settings.SYNC_DRIFT_INTERVAL_SEC) -> Iterator[Tuple[float, int, int]]:
+        """
+        Same pairing as get_synchronized_frames, but the frames of video 1 and video 2 are decoded
+        into slots of `pool_1` and `pool_2` (SharedFrameRing) and only the slots are yielded.
+        The caller owns both slots of every pair, frames left unpaired are released here.
+
+        Yields:
+            a tuple (timestamp, slot_of_video_1, slot_of_video_2)
+        """
+        pools = (pool_1, pool_2)
+        yield from self._paired(
+            fps, start, stop, tolerance_sec, drift_interval_sec,
+            lambda start_sec: self.extractor_1.extract_into(pool_1, fps, start_sec=start_sec),
+            lambda start_sec: self.extractor_2.extract_into(pool_2, fps, start_sec=start_sec),
+            frames_of=(pool_1.frame, pool_2.frame),
+            on_unpaired=lambda stream_index, slot: pools[stream_index].release(slot),
+        )
+
+
+    def _paired(self, fps :int, start :int, stop :int | None, tolerance_sec :float | None, drift_interval_sec :float,
+                extract_1 :Callable, extract_2 :Callable, frames_of :Tuple[Callable, Callable] | None = None,
+                on_unpaired :Callable | None = None) -> Iterator[Tuple[float, object, object]]:
         if self.confidence < 0.5:
             logger.warning(
                 f"Sync confidence is low ({self.confidence:.2f}). "
             )
 
-        logger.info(f"Starting synchronized frame stream at {fps} FPS, with frame offset {self.offset_frames}.")
+        offset_sec = self.offset_sec
+        tolerance_sec = tolerance_sec if tolerance_sec is not None else 0.5 / fps
+        logger.info(f"Starting synchronized frame stream at {fps} FPS, with offset {offset_sec:.3f}s.")
+
+        with self.extractor_1, self.extractor_2:
+            if start:
+                logger.info(f"Starting at synchronized frame {start}.")
+            stream_1 = extract_1(start / fps)
+            stream_2 = extract_2(start / fps + offset_sec)
+
+            drift = None
+            if drift_interval_sec > 0:
+                drift = DriftTracker(self.strategy, offset_sec, fps, interval_sec=drift_interval_sec)
+                frame_of_1, frame_of_2 = frames_of or (None, None)
+                stream_1 = drift.watch(stream_1, drift.history_1, frame_of_1)
+                stream_2 = drift.watch(stream_2, drift.history_2, frame_of_2)
+
+            pairs = pair_by_timestamp(stream_1, stream_2, offset_sec, tolerance_sec, drift=drift, on_unpaired=on_unpaired)
+            try:
+                for pair in pairs:
+                    "The synchronized index comes from the timestamp on video 1, so unpaired frames don't shift it."
+                    if stop is not None and int(round(pair[0] * fps)) >= stop:
+                        if on_unpaired is not None:
+                            on_unpaired(0, pair[1])
+                            on_unpaired(1, pair[2])
+                        break
+                    yield pair
+            finally:
+                if drift is not None:
+                    "Later calls (e.g. the next chunk) start from the corrected offset."
+                    self.drift_sec += drift.offset_sec - offset_sec
+
+
+    def frame_shapes(self) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        """(height, width, 3) of the decoded frames of both videos, e.g. to size shared frame slots."""
+        shapes = []
+        with self.extractor_1, self.extractor_2:
+            for extractor in (self.extractor_1, self.extractor_2):
+                frame_size = extractor.strategy.frame_size
+                if frame_size is None:
+                    logger.error(f"{extractor.strategy.__class__.__name__} can't tell the frame size of {extractor.strategy.video_path}")
+                    raise ValueError(f"Frame size of {extractor.strategy.video_path} is unknown.")
+                width, height = frame_size
+                shapes.append((height, width, 3))
+        return shapes[0], shapes[1]
+
+
+    def count_synchronized_frames(self, fps :int) -> int:
+        """
+        Number of synchronized frame pairs at `fps`, from the durations of both videos.
+        """
+        counts = []
+        with self.extractor_1, self.extractor_2:
+            for extractor, skipped_sec in ((self.extractor_1, 0.0), (self.extractor_2, self.offset_sec)):
+                strategy = extractor.strategy
+                if strategy.frame_count <= 0:
+                    logger.error(f"{strategy.__class__.__name__} can't tell the frame count of {strategy.video_path}")
+                    raise ValueError(f"Frame count of {strategy.video_path} is unknown.")
+                counts.append(math.ceil((strategy.frame_count / strategy.fps - skipped_sec) * fps))
+        return max(0, min(counts))
+
+
+    def get_live_frames(self, fps :float, offset_sec :float = 0.0, tolerance_sec :float | None = None) -> Iterator[Tuple[float, np.ndarray, np.ndarray]]:
+        """
+        Pairs the frames of two timestamped (live) sources by time instead of by frame count,
+        so no read-ahead synchronization is needed. `offset_sec` is how much video 2 lags video 1,
+        the leading source keeps that much of its frames buffered until their partners arrive.
+
+        Yields:
+            a tuple (timestamp, frame_from_video_1, frame_from_video_2), the timestamp being
+            the latest capture time of the pair : the pair can't be processed any earlier.
+        """
+        tolerance_sec = tolerance_sec if tolerance_sec is not None else 0.5 / fps
+        logger.info(f"Starting live synchronized stream at {fps} FPS, offset {offset_sec:.3f}s, tolerance {tolerance_sec:.3f}s.")
+
+        def with_capture_time(stream :Iterator[Tuple[float, np.ndarray]]) -> Iterator[Tuple[float, tuple]]:
+            for timestamp, frame in stream:
+                yield timestamp, (timestamp, frame)
+
+        if offset_sec:
+            leading = self.extractor_1 if offset_sec > 0 else self.extractor_2
+            leading.strategy.hold(offset_sec, fps)
 
         with self.extractor_1, self.extractor_2:
-            iterator_1 = self.extractor_1.extract(frames_per_second=fps)
-            iterator_2 = self.extractor_2.extract(frames_per_second=fps)
+            pairs = pair_by_timestamp(
+                with_capture_time(self.extractor_1.extract_timed(fps)), with_capture_time(self.extractor_2.extract_timed(fps)),
+                offset_sec, tolerance_sec
+            )
+            for _, (timestamp_1, frame_1), (timestamp_2, frame_2) in pairs:
+                yield max(timestamp_1, timestamp_2), frame_1, frame_2
 
-            for _ in range(self.offset_frames):
-                try:
-                    next(iterator_2)
-                except StopIteration:
-                    logger.warning("Offset is larger than the number of frames in video 2. No frames to yield.")
-                    return
-                
-            while True:
-                try:
-                    frame_1 = next(iterator_1)
-                    frame_2 = next(iterator_2)
 
-                    yield frame_1, frame_2
-                except StopIteration:
-                    logger.info("End of one or both video streams reached.")
-                    break
+class DriftTracker:
+    """
+    Re-estimates the offset between two timestamped streams every `interval_sec` seconds of video,
+    with the cheap frame signatures of the synchronization strategy over the last `window_sec` seconds.
+    Corrections below `min_confidence` are ignored.
+    """
 
+    def __init__(self, strategy :SynchronizationStrategy, offset_sec :float, fps :float,
+                 interval_sec :float = settings.SYNC_DRIFT_INTERVAL_SEC, window_sec :float = settings.SYNC_DRIFT_WINDOW_SEC,
+                 max_drift_sec :float = settings.SYNC_MAX_DRIFT_SEC, min_confidence :float = settings.SYNC_DRIFT_MIN_CONFIDENCE):
+        self.strategy = strategy
+        self.offset_sec = offset_sec
+        self.step_sec = 1.0 / fps
+        self.interval_sec = interval_sec
+        self.max_drift_sec = max_drift_sec
+        self.min_confidence = min_confidence
+        self.history_1 : collections.deque = collections.deque(maxlen=max(2, int(window_sec * fps)))
+        self.history_2 : collections.deque = collections.deque(maxlen=max(2, int((window_sec + 2 * max_drift_sec) * fps)))
+        """
+        history = deque of (timestamp, signature), video 2 keeps enough to cover every candidate shift.
+        """
+        self.next_check : float | None = None
 
-        
 
-            
+    def watch(self, stream :Iterator[Tuple[float, object]], history :collections.deque,
+              frame_of :Callable | None = None) -> Iterator[Tuple[float, object]]:
+        """
+        Passes `stream` through, recording the signature of every frame in `history`.
+        `frame_of` maps the stream items to their frame (e.g. a shared memory slot to its frame).
+        """
+        for timestamp, frame in stream:
+            signature = self.strategy.signature(frame_of(frame) if frame_of is not None else frame)
+            if signature is not None:
+                history.append((timestamp, signature))
+            yield timestamp, frame
 
 
+    @metrics.timed("synchronizer.drift")
+    def update(self, timestamp :float) -> None:
+        """Called with the timestamp of every pair, re-estimates the offset when a check is due."""
+        if self.next_check is None:
+            self.next_check = timestamp + self.interval_sec
+        if timestamp < self.next_check:
+            return
+        self.next_check = timestamp + self.interval_sec
+        if len(self.history_1) < self.history_1.maxlen // 2 or len(self.history_2) < 2:
+            return
+
+        times_1, signatures_1 = (np.asarray(values) for values in zip(*self.history_1))
+        times_2, signatures_2 = (np.asarray(values) for values in zip(*self.history_2))
+        correction, confidence = self.strategy.estimate_drift(
+            times_1, signatures_1, times_2, signatures_2, self.offset_sec, self.max_drift_sec, self.step_sec
+        )
+        if confidence < self.min_confidence or correction == 0:
+            return
+
+        self.offset_sec += correction
+        metrics.increment("synchronizer.drift_corrections")
+        logger.info(f"Drift of {correction:+.3f}s at {timestamp:.1f}s (confidence {confidence:.2f}), offset is now {self.offset_sec:.3f}s.")
+
+
+def pair_by_timestamp(stream_1 :Iterator[Tuple[float, np.ndarray]], stream_2 :Iterator[Tuple[float, np.ndarray]],
+                      offset_sec :float, tolerance_sec :float, drift :DriftTracker | None = None,
+                      on_unpaired :Callable | None = None) -> Iterator[Tuple[float, np.ndarray, np.ndarray]]:
+    """
+    Merges two (timestamp, frame) streams into pairs whose timestamps, after removing
+    `offset_sec` from stream 2, are within `tolerance_sec`. Pairs carry the timestamp of stream 1,
+    the reference timeline. Frames without a partner are dropped, after calling
+    on_unpaired(stream index, frame) when given.
+    With a `drift` tracker, its current offset is used instead and it is updated on every pair.
+    """
+    try:
+        timestamp_1, frame_1 = next(stream_1)
+        timestamp_2, frame_2 = next(stream_2)
+        while True:
+            if drift is not None:
+                offset_sec = drift.offset_sec
+            delta = timestamp_1 - (timestamp_2 - offset_sec)
+            if abs(delta) <= tolerance_sec:
+                yield timestamp_1, frame_1, frame_2
+                if drift is not None:
+                    drift.update(timestamp_1)
+                timestamp_1, frame_1 = next(stream_1)
+                timestamp_2, frame_2 = next(stream_2)
+            elif delta < 0:
+                metrics.increment("synchronizer.unpaired_frames")
+                if on_unpaired is not None:
+                    on_unpaired(0, frame_1)
+                timestamp_1, frame_1 = next(stream_1)
+            else:
+                metrics.increment("synchronizer.unpaired_frames")
+                if on_unpaired is not None:
+                    on_unpaired(1, frame_2)
+                timestamp_2, frame_2 = next(stream_2)
+    except StopIteration:
+        logger.info("End of one or both timestamped streams reached.")
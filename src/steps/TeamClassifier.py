@@ -0,0 +1,118 @@
+import logging
+import numpy as np
+
+from src.config import settings
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TeamClassifier:
+    """
+    Online team assignment from torso color histograms.
+
+    Histograms are clustered with incremental (mini-batch) k-means : the centroids are seeded
+    with k-means++ once enough players were seen, then every frame moves each centroid towards
+    the mean of the players assigned to it, with a per-centroid learning rate of 1 / count.
+
+    Clusters are named by size : the two largest are team_a and team_b, the smaller ones
+    referee and goalkeeper. Players too close to two centroids are left unassigned (None).
+    """
+
+    TEAM_LABELS = ("team_a", "team_b", "referee", "goalkeeper")
+
+    def __init__(self, num_clusters :int = settings.TEAM_CLUSTERS, min_margin :float = settings.TEAM_MIN_MARGIN,
+                 warmup_samples :int = settings.TEAM_WARMUP_SAMPLES, seed :int = 0):
+        if not 1 <= num_clusters <= len(self.TEAM_LABELS):
+            logger.error(f"num_clusters must be between 1 and {len(self.TEAM_LABELS)}, got {num_clusters}")
+            raise ValueError(f"num_clusters must be between 1 and {len(self.TEAM_LABELS)}, got {num_clusters}")
+
+        self.num_clusters = num_clusters
+        self.min_margin = min_margin
+        self.warmup_samples = max(warmup_samples, num_clusters)
+        self.rng = np.random.default_rng(seed)
+        self.centroids : np.ndarray | None = None
+        self.counts = np.zeros(num_clusters, dtype=np.int64)
+        self._warmup : list = []
+        logger.info(f"TeamClassifier initialized with {num_clusters} clusters")
+
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.centroids is not None
+
+
+    def _seed_centroids(self, samples :np.ndarray) -> None:
+        """k-means++ seeding followed by a few Lloyd iterations on the warm up samples."""
+        centroids = [samples[self.rng.integers(len(samples))]]
+        for _ in range(1, self.num_clusters):
+            distances = np.min(((samples[:, None, :] - np.asarray(centroids)[None]) ** 2).sum(axis=2), axis=1).astype(np.float64)
+            probabilities = distances / distances.sum() if distances.sum() > 0 else None
+            centroids.append(samples[self.rng.choice(len(samples), p=probabilities)])
+        centroids = np.asarray(centroids, dtype=np.float32)
+
+        for _ in range(10):
+            labels = self._nearest(samples, centroids)[0]
+            for cluster in range(self.num_clusters):
+                members = samples[labels == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+
+        self.centroids = centroids
+        self.counts = np.bincount(self._nearest(samples, centroids)[0], minlength=self.num_clusters)
+        logger.info(f"Team clusters seeded from {len(samples)} players, sizes {self.counts.tolist()}")
+
+
+    @staticmethod
+    def _nearest(histograms :np.ndarray, centroids :np.ndarray) -> tuple:
+        """Nearest centroid and the relative margin to the second nearest, per histogram."""
+        distances = np.sqrt(((histograms[:, None, :] - centroids[None]) ** 2).sum(axis=2))
+        order = np.argsort(distances, axis=1)
+        nearest = distances[np.arange(len(histograms)), order[:, 0]]
+        if centroids.shape[0] > 1:
+            second = distances[np.arange(len(histograms)), order[:, 1]]
+            margins = (second - nearest) / np.maximum(second, 1e-12)
+        else:
+            margins = np.ones(len(histograms))
+        return order[:, 0], margins
+
+
+    def cluster_labels(self) -> dict:
+        """Cluster index -> team label, the largest clusters being the teams."""
+        ranking = np.argsort(-self.counts, kind="stable")
+        return {int(cluster): self.TEAM_LABELS[rank] for rank, cluster in enumerate(ranking)}
+
+
+    @metrics.timed("team_classifier.assign")
+    def assign(self, players :list) -> list:
+        """
+        Predicts the team of every player, stores it under players[i]["team"], updates the
+        clusters and returns the labels. Labels are None until the clusters are seeded.
+        """
+        if not players:
+            return []
+        histograms = np.asarray([p['features']['color_hist'] for p in players], dtype=np.float32)
+
+        if not self.is_fitted:
+            self._warmup.extend(histograms)
+            if len(self._warmup) < self.warmup_samples:
+                for p in players:
+                    p["team"] = None
+                return [None] * len(players)
+            self._seed_centroids(np.asarray(self._warmup, dtype=np.float32))
+            self._warmup = []
+
+        clusters, margins = self._nearest(histograms, self.centroids)
+
+        for cluster in np.unique(clusters):
+            members = histograms[clusters == cluster]
+            self.counts[cluster] += len(members)
+            self.centroids[cluster] += len(members) / self.counts[cluster] * (members.mean(axis=0) - self.centroids[cluster])
+
+        names = self.cluster_labels()
+        labels = [names[int(cluster)] if margin >= self.min_margin else None for cluster, margin in zip(clusters, margins)]
+        for p, label in zip(players, labels):
+            p["team"] = label
+
+        metrics.increment("team_classifier.unassigned", labels.count(None))
+        return labels
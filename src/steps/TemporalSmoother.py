@@ -0,0 +1,202 @@
+import logging
+import numpy as np
+
+from src.config import settings
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Temporal smoothing of the per-frame matching inputs.
+
+TrackSmoother runs a constant velocity Kalman filter per (view, track_id) on the projected
+field coordinates, vectorized over all tracks of a frame. CostSmoother keeps an exponential
+moving average of the matching cost of every (broadcast track, tacticam track) pair, indexed
+by the TrackSmoother slots.
+Both forget what was not updated within `window` frames.
+"""
+
+
+class TrackSmoother:
+    """
+    Constant velocity Kalman filter over the field coordinates of every track.
+
+    The state of each track (position, velocity and covariance) lives in one slot of
+    preallocated arrays, so updating a frame is a handful of vectorized operations.
+    Slots of tracks not seen for `window` frames are released and reused.
+    """
+
+    def __init__(self, window :int = settings.SMOOTHING_WINDOW, process_noise :float = settings.SMOOTHING_PROCESS_NOISE,
+                 measurement_noise :float = settings.SMOOTHING_MEASUREMENT_NOISE, capacity :int = 64):
+        self.window = window
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+        self.state = np.zeros((capacity, 4))
+        """Per slot state : x, y, vx, vy (field pixels and field pixels per frame)."""
+        self.covariance = np.zeros((capacity, 4, 4))
+        self.last_frame = np.full(capacity, -1, dtype=np.int64)
+        self.slots : dict = {}
+        """
+        slots = {(view_name, track_id) : slot index}
+        """
+        self.free_slots = list(range(capacity - 1, -1, -1))
+
+
+    @property
+    def capacity(self) -> int:
+        return len(self.last_frame)
+
+
+    def _grow(self) -> None:
+        capacity = self.capacity
+        self.state = np.concatenate([self.state, np.zeros((capacity, 4))])
+        self.covariance = np.concatenate([self.covariance, np.zeros((capacity, 4, 4))])
+        self.last_frame = np.concatenate([self.last_frame, np.full(capacity, -1, dtype=np.int64)])
+        self.free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+        logger.debug(f"TrackSmoother capacity grown to {self.capacity} tracks")
+
+
+    def _slot(self, key :tuple) -> tuple:
+        """Slot of `key` and whether it was just allocated."""
+        slot = self.slots.get(key)
+        if slot is not None:
+            return slot, False
+        if not self.free_slots:
+            self._grow()
+        slot = self.free_slots.pop()
+        self.slots[key] = slot
+        return slot, True
+
+
+    def _expire(self, frame_index :int) -> None:
+        stale = [key for key, slot in self.slots.items() if frame_index - self.last_frame[slot] > self.window]
+        for key in stale:
+            slot = self.slots.pop(key)
+            self.last_frame[slot] = -1
+            self.free_slots.append(slot)
+
+
+    @metrics.timed("smoother.update_tracks")
+    def update(self, frame_index :int, players :list) -> None:
+        """
+        Filters the field coordinates of the players of a frame in place.
+
+        Each player's features get the filtered 'field_coords', the measured ones under
+        'raw_field_coords' and the estimated 'velocity' (field pixels per frame).
+        """
+        if not players:
+            self._expire(frame_index)
+            return
+
+        slots, new = zip(*(self._slot((p['view'], p['track_id'])) for p in players))
+        slots, new = np.asarray(slots), np.asarray(new)
+        measurements = np.asarray([p['features'].get('raw_field_coords', p['features']['field_coords']) for p in players], dtype=np.float64)
+
+        "Tracks seen for the first time, or again after the window, start at rest on their measurement."
+        reset = new | (frame_index - self.last_frame[slots] > self.window)
+        if reset.any():
+            self.state[slots[reset]] = np.concatenate([measurements[reset], np.zeros((int(reset.sum()), 2))], axis=1)
+            self.covariance[slots[reset]] = np.diag([self.measurement_noise, self.measurement_noise, 1e3, 1e3])
+
+        tracked = ~reset
+        if tracked.any():
+            self._predict_and_correct(slots[tracked], frame_index - self.last_frame[slots[tracked]], measurements[tracked])
+
+        self.last_frame[slots] = frame_index
+        for p, slot, measurement in zip(players, slots, measurements):
+            p['features']['raw_field_coords'] = measurement.astype(np.float32)
+            p['features']['field_coords'] = self.state[slot, :2].astype(np.float32)
+            p['features']['velocity'] = self.state[slot, 2:].astype(np.float32)
+
+        self._expire(frame_index)
+
+
+    def _predict_and_correct(self, slots :np.ndarray, dt :np.ndarray, measurements :np.ndarray) -> None:
+        count = len(slots)
+        dt = dt.astype(np.float64)
+
+        transition = np.tile(np.eye(4), (count, 1, 1))
+        transition[:, 0, 2] = dt
+        transition[:, 1, 3] = dt
+
+        "White acceleration process noise."
+        noise = np.zeros((count, 4, 4))
+        for axis in (0, 1):
+            noise[:, axis, axis] = dt ** 4 / 4
+            noise[:, axis, axis + 2] = noise[:, axis + 2, axis] = dt ** 3 / 2
+            noise[:, axis + 2, axis + 2] = dt ** 2
+        noise *= self.process_noise
+
+        state = np.einsum("nij,nj->ni", transition, self.state[slots])
+        covariance = transition @ self.covariance[slots] @ transition.transpose(0, 2, 1) + noise
+
+        innovation_covariance = covariance[:, :2, :2] + self.measurement_noise * np.eye(2)
+        gain = covariance[:, :, :2] @ np.linalg.inv(innovation_covariance)
+        state += np.einsum("nij,nj->ni", gain, measurements - state[:, :2])
+        covariance -= gain @ covariance[:, :2, :]
+
+        self.state[slots] = state
+        self.covariance[slots] = covariance
+
+
+class CostSmoother:
+    """
+    Exponential moving average of the matching cost of every (broadcast track, tacticam track) pair,
+    so a single noisy frame does not flip an established match. Pairs not seen for `window`
+    frames start over from their current cost.
+
+    The smoothed costs live in a preallocated matrix indexed by the slots of `track_smoother`
+    (rows for the tracks of view 1, columns for view 2), so smoothing a frame is a gather and a
+    scatter. A slot is only reused once its track expired, after which its pairs are stale anyway.
+    """
+
+    def __init__(self, track_smoother :TrackSmoother, alpha :float = settings.COST_SMOOTHING_ALPHA,
+                 window :int = settings.SMOOTHING_WINDOW):
+        self.track_smoother = track_smoother
+        self.alpha = alpha
+        self.window = window
+        self.frame_index = 0
+        self.costs = np.zeros((track_smoother.capacity, track_smoother.capacity))
+        self.last_frame = np.full((track_smoother.capacity, track_smoother.capacity), -1, dtype=np.int64)
+        """Smoothed cost and last frame of every (slot of view 1, slot of view 2) pair, -1 when never seen."""
+
+
+    def next_frame(self, frame_index :int) -> None:
+        self.frame_index = frame_index
+
+
+    def _grow(self) -> None:
+        capacity, previous = self.track_smoother.capacity, len(self.last_frame)
+        costs = np.zeros((capacity, capacity))
+        last_frame = np.full((capacity, capacity), -1, dtype=np.int64)
+        costs[:previous, :previous] = self.costs
+        last_frame[:previous, :previous] = self.last_frame
+        self.costs, self.last_frame = costs, last_frame
+
+
+    def _slots(self, players :list) -> np.ndarray:
+        """TrackSmoother slot of every player, -1 for players it does not track."""
+        return np.asarray([self.track_smoother.slots.get((p['view'], p['track_id']), -1) for p in players], dtype=np.intp)
+
+
+    @metrics.timed("smoother.smooth_costs")
+    def smooth(self, players1 :list, players2 :list, cost_matrix :np.ndarray) -> np.ndarray:
+        if len(self.last_frame) < self.track_smoother.capacity:
+            self._grow()
+
+        rows, cols = self._slots(players1), self._slots(players2)
+        tracked = (rows[:, None] >= 0) & (cols[None, :] >= 0)
+        previous = self.costs[np.ix_(rows, cols)]
+        seen = np.where(tracked, self.last_frame[np.ix_(rows, cols)], -1)
+
+        recent = (seen >= 0) & (seen >= self.frame_index - self.window)
+        smoothed = np.where(recent, self.alpha * cost_matrix + (1 - self.alpha) * previous, cost_matrix)
+        "Pairs already smoothed in this frame (e.g. solved again in a residual pass) keep their value."
+        smoothed = np.where(seen == self.frame_index, previous, smoothed)
+
+        i, j = np.nonzero(tracked)
+        self.costs[rows[i], cols[j]] = smoothed[i, j]
+        self.last_frame[rows[i], cols[j]] = self.frame_index
+        return smoothed
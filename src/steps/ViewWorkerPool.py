@@ -0,0 +1,159 @@
+import os
+import queue
+import logging
+import multiprocessing
+from typing import Dict, Iterator, Tuple
+
+from src.config import settings
+from utils.shared_memory_utils import SharedFrameRing
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Tracking and feature extraction of the two views in one worker process per view, fed through
+shared memory. The parent decodes the synchronized frames straight into a SharedFrameRing per
+view and sends only (frame index, slot) to the workers, which release the slot when done.
+No frame is pickled, the decoder is throttled by the free slots of the rings.
+"""
+
+VIEWS = ("broadcast", "tacticam")
+
+
+def _view_worker(view :str, ring_handle :Dict, transformer_points :Tuple, requests, results, threads_per_worker :int) -> None:
+    """Worker : extracts the player data of every (frame index, slot) request of one view."""
+    from src.steps.SegmentProcessor import _init_worker, extract_view_players
+    from src.steps.ViewTransformer import ViewTransformer
+    from src.steps.PlayerTracker import PlayerTracker
+    from src.steps.FeatureExtractor import FeatureExtractor
+    from src.components.ModelStrategies import UltralyticsYoloModel, QuantizedTorchReIDModel
+
+    _init_worker(threads_per_worker)
+    ring = SharedFrameRing.attach(ring_handle)
+    transformer = ViewTransformer(*transformer_points)
+    player_tracker = PlayerTracker(UltralyticsYoloModel)
+    feature_extractor = FeatureExtractor(QuantizedTorchReIDModel, UltralyticsYoloModel)
+
+    try:
+        while (request := requests.get()) is not None:
+            frame_index, slot = request
+            try:
+                players = extract_view_players(player_tracker, feature_extractor, transformer, view, ring.frame(slot))
+            except Exception as e:
+                results.put((frame_index, view, RuntimeError(f"{view} worker failed on frame {frame_index}: {e}")))
+                return
+            finally:
+                ring.release(slot)
+            results.put((frame_index, view, players))
+    finally:
+        ring.close()
+
+
+class ViewWorkerPool:
+    """
+    One worker process per view, fed with shared memory frames of `synchronizer`.
+
+        with ViewWorkerPool(synchronizer, transformer_points) as pool:
+            for frame_data in pool.extract(fps):
+                ...
+    """
+
+    def __init__(self, synchronizer, transformer_points :Tuple, slots :int = settings.SHARED_FRAME_SLOTS,
+                 result_timeout_sec :float = 1.0):
+        self.synchronizer = synchronizer
+        self.transformer_points = transformer_points
+        self.slots = slots
+        self.result_timeout_sec = result_timeout_sec
+        self.rings = []
+        self.workers = []
+        self.requests = []
+        self.results = None
+
+
+    def __enter__(self):
+        "Spawned workers, so no torch or decoder state is inherited from the parent."
+        context = multiprocessing.get_context("spawn")
+        self.rings = [SharedFrameRing.create(self.slots, shape, context=context) for shape in self.synchronizer.frame_shapes()]
+        "A worker dying with slots in use would block the decoder in acquire forever."
+        for ring in self.rings:
+            ring.watchdog = self._check_workers
+        self.requests = [context.Queue() for _ in VIEWS]
+        self.results = context.Queue()
+
+        threads_per_worker = max(1, (os.cpu_count() or 1) // len(VIEWS))
+        self.workers = [
+            context.Process(target=_view_worker, name=f"{view}-worker", daemon=True,
+                            args=(view, ring.handle, self.transformer_points, requests, self.results, threads_per_worker))
+            for view, ring, requests in zip(VIEWS, self.rings, self.requests)
+        ]
+        for worker in self.workers:
+            worker.start()
+        logger.info(f"Started {len(self.workers)} view workers on {self.slots} shared frame slots per view")
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for requests in self.requests:
+            requests.put(None)
+        for worker in self.workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                logger.warning(f"{worker.name} did not stop, terminating it.")
+                worker.terminate()
+        for ring in self.rings:
+            ring.close()
+        self.rings, self.workers, self.requests = [], [], []
+
+
+    def _check_workers(self) -> None:
+        dead = [worker.name for worker in self.workers if not worker.is_alive()]
+        if dead:
+            logger.error(f"View workers {dead} exited.")
+            raise RuntimeError(f"View workers {dead} exited.")
+
+
+    def _collect(self, pending :Dict[int, dict], block :bool) -> bool:
+        """Moves one result into `pending`, False when none was available without blocking."""
+        while True:
+            try:
+                frame_index, view, players = self.results.get(timeout=self.result_timeout_sec) if block else self.results.get_nowait()
+                break
+            except queue.Empty:
+                if not block:
+                    return False
+                self._check_workers()
+
+        if isinstance(players, Exception):
+            logger.error(str(players))
+            raise players
+        pending.setdefault(frame_index, {})[view] = players
+        return True
+
+
+    def extract(self, fps :int, start :int = 0, stop :int | None = None) -> Iterator[list]:
+        """
+        Yields the per-frame player data of the synchronized frames [start, stop), in order,
+        as extract_frame_players would.
+        """
+        pending : Dict[int, dict] = {}
+        next_frame = sent = start
+
+        def completed() -> Iterator[list]:
+            nonlocal next_frame
+            while len(pending.get(next_frame, ())) == len(VIEWS):
+                views = pending.pop(next_frame)
+                next_frame += 1
+                yield [p for view in VIEWS for p in views[view]]
+
+        pairs = self.synchronizer.get_synchronized_slots(fps, *self.rings, start=start, stop=stop)
+        for frame_index, (_, *slots) in enumerate(pairs, start=start):
+            for requests, slot in zip(self.requests, slots):
+                requests.put((frame_index, slot))
+            sent = frame_index + 1
+            while self._collect(pending, block=False):
+                pass
+            yield from completed()
+
+        while next_frame < sent:
+            self._collect(pending, block=True)
+            yield from completed()
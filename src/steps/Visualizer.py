@@ -0,0 +1,179 @@
+import cv2
+import time
+import logging
+import numpy as np
+
+from utils.metrics_util import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LivePreview:
+    """
+    Optional live preview window for the rendered frames.
+
+    Display is throttled to a target fps and frames are dropped (not shown) when the
+    caller falls behind, so the preview never slows down the rendering loop.
+    """
+
+    def __init__(self, window_name :str = "Unified Top-Down View", target_fps :float = 10):
+        if target_fps <= 0:
+            logger.error("Preview target fps must be positive.")
+            raise ValueError("Preview target fps must be positive.")
+
+        self.window_name = window_name
+        self.frame_interval = 1.0 / target_fps
+        self.shown_frames = 0
+        self.dropped_frames = 0
+        self._due :float | None = None
+        logger.info(f"Live preview enabled at {target_fps} FPS.")
+
+
+    def show(self, frame :np.ndarray) -> bool:
+        """
+        Shows the frame if it is on time, otherwise drops it.
+
+        Returns:
+            False when the user asked to quit by pressing 'q'.
+        """
+        now = time.perf_counter()
+        if self._due is None:
+            self._due = now
+
+        if now - self._due > self.frame_interval:
+            self.dropped_frames += 1
+            self._due = now + self.frame_interval
+            return True
+
+        cv2.imshow(self.window_name, frame)
+        wait_ms = max(1, int((self._due - now) * 1000))
+        key = cv2.waitKey(wait_ms) & 0xFF
+        self._due += self.frame_interval
+        self.shown_frames += 1
+        return key != ord('q')
+
+
+    def close(self) -> None:
+        logger.info(f"Live preview closed. Shown frames: {self.shown_frames}, dropped frames: {self.dropped_frames}")
+        cv2.destroyAllWindows()
+
+
+class UnifiedViewRenderer:
+    """
+    Draws all players on a single top-down map with their global IDs.
+
+    The field background is rendered once and each global ID label is rasterized once as a
+    small sprite. Every frame only the regions touched in the previous frame are restored
+    from the background and the current sprites are blitted, instead of copying the whole
+    map and calling cv2.putText for every player.
+
+    The output resolution can be lower than the field resolution used for homography,
+    field coordinates are scaled accordingly.
+    """
+
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    MATCHED_STYLE = {"radius": 10, "color": (0, 255, 0), "text_color": (255, 255, 255), "font_scale": 0.6, "thickness": 2}
+    UNMATCHED_STYLE = {"radius": 8, "color": (0, 0, 255), "text_color": (200, 200, 200), "font_scale": 0.5, "thickness": 1}
+
+    def __init__(self, background_img :np.ndarray, field_resolution :tuple, output_resolution :tuple | None = None):
+        if background_img is None or background_img.size == 0:
+            logger.error("Background image is empty or None.")
+            raise ValueError("Background image is empty or None.")
+
+        self.field_resolution = tuple(field_resolution)
+        self.output_resolution = tuple(output_resolution or field_resolution)
+        self.scale = np.array(self.output_resolution, dtype=np.float32) / np.array(self.field_resolution, dtype=np.float32)
+        self.sprite_scale = float(self.scale.min())
+
+        if background_img.shape[1::-1] != self.output_resolution:
+            background_img = cv2.resize(background_img, self.output_resolution, interpolation=cv2.INTER_AREA)
+        self.background = np.ascontiguousarray(background_img)
+        self.canvas = self.background.copy()
+
+        self._dirty_regions :list = []
+        self._sprites :dict = {}
+        logger.info(f"Renderer initialized with field resolution {self.field_resolution} and output resolution {self.output_resolution}.")
+
+
+    def _sprite(self, global_id :int, matched :bool) -> tuple:
+        """
+        Returns the pre-rasterized (patch, mask, offset) of a player marker with its label.
+        The offset is the top-left corner of the patch relative to the player position.
+        """
+        key = (global_id, matched)
+        if key in self._sprites:
+            metrics.increment("renderer.sprite_cache_hits")
+            return self._sprites[key]
+
+        metrics.increment("renderer.sprite_cache_misses")
+        style = self.MATCHED_STYLE if matched else self.UNMATCHED_STYLE
+        s = self.sprite_scale
+        radius = max(2, round(style["radius"] * s))
+        font_scale = style["font_scale"] * s
+        thickness = max(1, round(style["thickness"] * s))
+        text = str(global_id)
+        (text_w, text_h), baseline = cv2.getTextSize(text, self.FONT, font_scale, thickness)
+        text_x, text_y = round(-5 * s), round(-15 * s)
+
+        left = min(-radius, text_x) - thickness
+        top = min(-radius, text_y - text_h) - thickness
+        right = max(radius, text_x + text_w) + thickness + 1
+        bottom = max(radius, text_y + baseline) + thickness + 1
+
+        patch = np.zeros((bottom - top, right - left, 3), dtype=np.uint8)
+        mask = np.zeros((bottom - top, right - left), dtype=np.uint8)
+        center = (-left, -top)
+        origin = (text_x - left, text_y - top)
+
+        cv2.circle(patch, center, radius, style["color"], -1)
+        cv2.circle(mask, center, radius, 255, -1)
+        cv2.putText(patch, text, origin, self.FONT, font_scale, style["text_color"], thickness)
+        cv2.putText(mask, text, origin, self.FONT, font_scale, 255, thickness)
+
+        sprite = (patch, mask.astype(bool)[..., None], (left, top))
+        self._sprites[key] = sprite
+        return sprite
+
+
+    def _blit(self, sprite :tuple, field_coords :np.ndarray) -> None:
+        patch, mask, (offset_x, offset_y) = sprite
+        x, y = (np.asarray(field_coords) * self.scale).astype(int)
+        height, width = self.canvas.shape[:2]
+
+        x1, y1 = x + offset_x, y + offset_y
+        x2, y2 = x1 + patch.shape[1], y1 + patch.shape[0]
+        cx1, cy1, cx2, cy2 = max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+        if cx1 >= cx2 or cy1 >= cy2:
+            return
+
+        np.copyto(
+            self.canvas[cy1:cy2, cx1:cx2],
+            patch[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1],
+            where=mask[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1],
+        )
+        self._dirty_regions.append((cx1, cy1, cx2, cy2))
+
+
+    def render(self, matched_pairs :list, unmatched1 :list, unmatched2 :list, id_manager) -> np.ndarray:
+        """
+        Renders one frame and registers global IDs with the identity manager.
+        """
+        return self.render_records(id_manager.assign(matched_pairs, unmatched1, unmatched2))
+
+
+    @metrics.timed("renderer.render")
+    def render_records(self, records :list) -> np.ndarray:
+        """
+        Renders one frame from the records produced by GlobalIdentityManager.assign.
+
+        The returned array is the renderer's canvas and is reused by the next call,
+        copy it if it has to outlive the next render.
+        """
+        for x1, y1, x2, y2 in self._dirty_regions:
+            self.canvas[y1:y2, x1:x2] = self.background[y1:y2, x1:x2]
+        self._dirty_regions = []
+
+        for record in records:
+            self._blit(self._sprite(record["global_id"], matched=record["matched"]), record["field_coords"])
+
+        return self.canvas
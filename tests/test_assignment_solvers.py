@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+from src.components.AssignmentSolvers import (
+    AutoAssignmentSolver, GreedySolver, HungarianSolver, SparseLAPJVSolver, build_assignment_solver
+)
+
+"""
+Correctness of the assignment solvers against scipy linear_sum_assignment on the clipped matrix.
+"""
+
+MAX_COST = 0.6
+EXACT_SOLVERS = [HungarianSolver, SparseLAPJVSolver, AutoAssignmentSolver]
+
+
+def reference_matching(cost_matrix :np.ndarray, max_cost :float) -> set:
+    """Optimal thresholded matching : a pair at max_cost or more is worth as much as no match."""
+    gated = np.minimum(cost_matrix, max_cost)
+    row_ind, col_ind = linear_sum_assignment(gated)
+    return {(int(r), int(c)) for r, c in zip(row_ind, col_ind) if gated[r, c] < max_cost}
+
+
+def objective(cost_matrix :np.ndarray, pairs :set, max_cost :float) -> float:
+    return float(sum(cost_matrix[r, c] - max_cost for r, c in pairs))
+
+
+def solve(solver, cost_matrix :np.ndarray, max_cost :float = MAX_COST) -> set:
+    rows, cols = solver.solve(cost_matrix, max_cost)
+    assert len(rows) == len(cols)
+    assert len(set(rows.tolist())) == len(rows) and len(set(cols.tolist())) == len(cols)
+    return {(int(r), int(c)) for r, c in zip(rows, cols)}
+
+
+def random_cost_matrix(shape :tuple, seed :int, infeasible :float = 0.3) -> np.ndarray:
+    """Costs in [0, 1), a share of them infeasible (far above max_cost, some infinite)."""
+    rng = np.random.default_rng(seed)
+    cost_matrix = rng.random(shape)
+    mask = rng.random(shape) < infeasible
+    cost_matrix[mask] = rng.choice([5.0, np.inf], size=int(mask.sum()))
+    return cost_matrix
+
+
+CASES = {
+    "square": np.array([
+        [0.10, 0.50, 0.90],
+        [0.20, 0.15, 0.70],
+        [0.80, 0.30, 0.25],
+    ]),
+    "infeasible_entries": np.array([
+        [0.10, np.inf, 5.00],
+        [0.05, 0.40, 9.00],
+        [np.inf, 0.55, 0.59],
+    ]),
+    "wide": np.array([
+        [0.30, 0.10, 0.70, 0.20, 0.95],
+        [0.25, 0.12, 0.80, 0.90, 0.40],
+    ]),
+    "tall": np.array([
+        [0.30, 0.25],
+        [0.10, 0.12],
+        [0.70, 0.80],
+        [0.20, 0.90],
+        [0.95, 0.40],
+    ]),
+    "gated_row": np.array([
+        [0.10, 0.20, 0.30],
+        [0.90, 0.70, np.inf],
+        [0.20, 0.10, 0.50],
+    ]),
+    "gated_column": np.array([
+        [0.10, 0.80, 0.30],
+        [0.20, 0.90, 0.10],
+    ]),
+    "contested": np.array([
+        [0.10, 0.11, 0.90],
+        [0.12, 0.50, 0.90],
+        [0.13, 0.14, 0.20],
+    ]),
+    "negative": np.array([
+        [-0.20, 0.10],
+        [0.30, -0.50],
+        [-0.10, 0.40],
+    ]),
+}
+
+
+@pytest.mark.parametrize("solver_class", EXACT_SOLVERS)
+@pytest.mark.parametrize("case", list(CASES))
+def test_exact_solvers_match_reference(solver_class, case):
+    cost_matrix = CASES[case]
+    expected = reference_matching(cost_matrix, MAX_COST)
+    pairs = solve(solver_class(), cost_matrix)
+    assert pairs == expected
+    assert objective(cost_matrix, pairs, MAX_COST) == pytest.approx(objective(cost_matrix, expected, MAX_COST))
+
+
+@pytest.mark.parametrize("solver_class", EXACT_SOLVERS)
+@pytest.mark.parametrize("shape", [(1, 1), (4, 4), (3, 7), (7, 3), (12, 12)])
+@pytest.mark.parametrize("seed", range(5))
+def test_exact_solvers_match_reference_on_random_matrices(solver_class, shape, seed):
+    cost_matrix = random_cost_matrix(shape, seed)
+    expected = reference_matching(cost_matrix, MAX_COST)
+    pairs = solve(solver_class(), cost_matrix)
+    assert objective(cost_matrix, pairs, MAX_COST) == pytest.approx(objective(cost_matrix, expected, MAX_COST))
+    assert pairs == expected
+
+
+@pytest.mark.parametrize("solver_class", EXACT_SOLVERS + [GreedySolver])
+def test_fully_gated_matrix_matches_nothing(solver_class):
+    rows, cols = solver_class().solve(np.full((3, 4), 0.9), MAX_COST)
+    assert rows.size == 0 and cols.size == 0
+
+
+@pytest.mark.parametrize("case", ["square", "gated_row", "gated_column"])
+def test_greedy_solver_is_optimal_on_clear_matches(case):
+    cost_matrix = CASES[case]
+    expected = reference_matching(cost_matrix, MAX_COST)
+    assert solve(GreedySolver(), cost_matrix) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_greedy_solver_returns_a_valid_matching(seed):
+    cost_matrix = random_cost_matrix((8, 6), seed)
+    pairs = solve(GreedySolver(), cost_matrix)
+    assert all(cost_matrix[r, c] < MAX_COST for r, c in pairs)
+    assert objective(cost_matrix, pairs, MAX_COST) >= objective(cost_matrix, reference_matching(cost_matrix, MAX_COST), MAX_COST) - 1e-9
+
+
+def _refuse(cost_matrix, max_cost):
+    raise AssertionError("no solver should run")
+
+
+def test_auto_solver_row_minima_skip_the_solvers(monkeypatch):
+    solver = AutoAssignmentSolver()
+    monkeypatch.setattr(solver.hungarian, "solve", _refuse)
+    monkeypatch.setattr(solver.sparse, "solve", _refuse)
+    cost_matrix = CASES["gated_row"]
+    assert solve(solver, cost_matrix) == reference_matching(cost_matrix, MAX_COST)
+
+
+def test_auto_solver_uses_sparse_on_sparse_candidates(monkeypatch):
+    solver = AutoAssignmentSolver(sparse_min_size=2, sparse_max_density=1.0)
+    monkeypatch.setattr(solver.hungarian, "solve", _refuse)
+    cost_matrix = CASES["contested"]
+    assert solve(solver, cost_matrix) == reference_matching(cost_matrix, MAX_COST)
+
+
+def test_build_assignment_solver_rejects_unknown_names():
+    assert isinstance(build_assignment_solver("greedy"), GreedySolver)
+    with pytest.raises(ValueError):
+        build_assignment_solver("simplex")
@@ -0,0 +1,88 @@
+import numpy as np
+
+from src.IDManager import GlobalIdentityManager
+
+"""
+Global identity bookkeeping : merges, re-attachment of dormant IDs and bounded memory.
+"""
+
+
+def player(view :str, track_id :int, field_coords :tuple, embedding :list) -> dict:
+    return {
+        "view": view,
+        "track_id": track_id,
+        "features": {"field_coords": np.asarray(field_coords, dtype=np.float32), "appearance": np.asarray(embedding, dtype=np.float32)},
+    }
+
+
+def test_match_merges_two_global_ids():
+    manager = GlobalIdentityManager()
+    broadcast = player("broadcast", 1, (100, 100), [1, 0, 0])
+    tacticam = player("tacticam", 7, (900, 500), [0, 1, 0])
+
+    records = manager.assign([], [broadcast], [tacticam])
+    broadcast_id, tacticam_id = (record["global_id"] for record in records)
+    assert broadcast_id != tacticam_id
+
+    records = manager.assign([(broadcast, tacticam)], [], [])
+    assert [record["global_id"] for record in records] == [broadcast_id]
+    assert manager.resolve(tacticam_id) == broadcast_id
+    assert manager.id_map[("broadcast", 1)] == manager.id_map[("tacticam", 7)] == broadcast_id
+    assert sorted(manager.reverse_map[broadcast_id]) == [("broadcast", 1), ("tacticam", 7)]
+    assert tacticam_id not in manager.identities and tacticam_id not in manager.reverse_map
+
+
+def test_new_track_reattaches_to_dormant_id():
+    manager = GlobalIdentityManager()
+    global_id = manager.assign([], [player("broadcast", 1, (100, 100), [1, 0, 0])], [])[0]["global_id"]
+    manager.assign([], [], [])
+
+    records = manager.assign([], [player("broadcast", 2, (105, 100), [1, 0, 0])], [])
+    assert records[0]["global_id"] == global_id
+    assert manager.id_map[("broadcast", 2)] == global_id
+
+
+def test_new_track_does_not_reattach_to_an_identity_visible_in_the_frame():
+    manager = GlobalIdentityManager()
+    records = manager.assign([], [player("broadcast", 1, (100, 100), [1, 0, 0]), player("broadcast", 2, (100, 100), [1, 0, 0])], [])
+    assert records[0]["global_id"] != records[1]["global_id"]
+
+
+def test_far_new_track_gets_a_new_id():
+    manager = GlobalIdentityManager()
+    global_id = manager.assign([], [player("broadcast", 1, (100, 100), [1, 0, 0])], [])[0]["global_id"]
+    manager.assign([], [], [])
+
+    records = manager.assign([], [player("broadcast", 2, (800, 600), [1, 0, 0])], [])
+    assert records[0]["global_id"] != global_id
+
+
+def test_expired_tracks_are_forgotten():
+    manager = GlobalIdentityManager(expiry_frames=5)
+    staying = player("broadcast", 1, (100, 100), [1, 0, 0])
+    leaving_1 = player("broadcast", 2, (400, 300), [0, 1, 0])
+    leaving_2 = player("tacticam", 8, (400, 300), [0, 1, 0])
+
+    manager.assign([(leaving_1, leaving_2)], [staying], [])
+    leaving_id = manager.id_map[("broadcast", 2)]
+    for _ in range(10):
+        manager.assign([], [staying], [])
+
+    assert set(manager.id_map) == set(manager.last_seen) == {("broadcast", 1)}
+    assert leaving_id not in manager.identities and leaving_id not in manager.reverse_map
+    assert set(manager.identities) == set(manager.reverse_map) == {manager.id_map[("broadcast", 1)]}
+
+
+def test_expiry_forgets_merged_ids():
+    manager = GlobalIdentityManager(expiry_frames=5)
+    broadcast = player("broadcast", 1, (100, 100), [1, 0, 0])
+    tacticam = player("tacticam", 7, (900, 500), [0, 1, 0])
+    manager.assign([], [broadcast], [tacticam])
+    manager.assign([(broadcast, tacticam)], [], [])
+    assert manager.parent
+
+    for _ in range(10):
+        manager.assign([], [], [])
+
+    assert not manager.id_map and not manager.last_seen and not manager.identities
+    assert not manager.reverse_map and not manager.parent and not manager.merged
@@ -0,0 +1,124 @@
+import os
+import json
+import hashlib
+import pickle
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Checkpoints of the chunked extraction.
+
+A checkpoint directory holds a manifest.json describing the run (videos, fps, chunk size,
+models, homography, synchronization offset) and one chunk_XXXXX.pkl file per completed chunk.
+Files are written to a temporary name and renamed, so a crash never leaves a partial chunk behind.
+"""
+
+
+def file_digest(path :Path) -> str | None:
+    """SHA-256 of a file (e.g. model weights), None when it does not exist."""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as digest_file:
+        for block in iter(lambda: digest_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def value_digest(value :Any) -> str:
+    """SHA-256 of a JSON serializable value (e.g. homography points)."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+class CheckpointStore:
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory :Path):
+        self.directory = Path(directory)
+        self.manifest : Dict[str, Any] = {}
+
+
+    def _atomic_write(self, path :Path, data :bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+
+
+    def chunk_path(self, chunk_index :int) -> Path:
+        return self.directory / f"chunk_{chunk_index:05d}.pkl"
+
+
+    def open(self, run_config :Dict[str, Any], resume :bool = True) -> Dict[str, Any]:
+        """
+        Loads the manifest of a previous run with the same `run_config` when resuming,
+        otherwise starts a new manifest. Returns the manifest.
+        """
+        manifest_path = self.directory / self.MANIFEST
+        if resume and manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+            if manifest["run_config"] != run_config:
+                logger.error(f"Checkpoints in {self.directory} were written with {manifest['run_config']}, not {run_config}.")
+                raise ValueError(f"Checkpoints in {self.directory} belong to a different run. Use another directory or disable resume.")
+            self.manifest = manifest
+            logger.info(f"Resuming from {len(self.completed_chunks)} completed chunks in {self.directory}")
+        else:
+            for stale_chunk in self.directory.glob("chunk_*.pkl"):
+                stale_chunk.unlink()
+            self.manifest = {"run_config": run_config, "completed_chunks": [], "sync": None}
+            self._write_manifest()
+        return self.manifest
+
+
+    def _write_manifest(self) -> None:
+        self._atomic_write(self.directory / self.MANIFEST, json.dumps(self.manifest, indent=2).encode())
+
+
+    @property
+    def completed_chunks(self) -> List[int]:
+        return sorted(self.manifest.get("completed_chunks", []))
+
+
+    def next_chunk(self) -> int:
+        """Index of the first chunk after the contiguous run of completed chunks."""
+        completed = set(self.completed_chunks)
+        chunk_index = 0
+        while chunk_index in completed:
+            chunk_index += 1
+        return chunk_index
+
+
+    def save_sync(self, offset_frames :int, confidence :float) -> None:
+        self.manifest["sync"] = {"offset_frames": int(offset_frames), "confidence": float(confidence)}
+        self._write_manifest()
+
+
+    def save_chunk(self, chunk_index :int, chunk :Dict[str, Any]) -> None:
+        self._atomic_write(self.chunk_path(chunk_index), pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL))
+        if chunk_index not in self.manifest["completed_chunks"]:
+            self.manifest["completed_chunks"].append(chunk_index)
+        self._write_manifest()
+        logger.info(f"Checkpointed chunk {chunk_index} ({len(chunk['frames'])} frames) to {self.chunk_path(chunk_index)}")
+
+
+    def load_chunk(self, chunk_index :int) -> Dict[str, Any]:
+        path = self.chunk_path(chunk_index)
+        if not path.exists():
+            logger.error(f"Chunk checkpoint {path} does not exist.")
+            raise FileNotFoundError(f"Chunk checkpoint {path} does not exist.")
+        with open(path, "rb") as chunk_file:
+            return pickle.load(chunk_file)
+
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        for chunk_index in self.completed_chunks:
+            yield self.load_chunk(chunk_index)
@@ -0,0 +1,74 @@
+"""
+Per-frame HSV color histograms of the players' torso regions.
+
+The region covering all torsos is converted to HSV once, every pixel is quantized to a
+joint bin code (H bins, then S bins, then V bins) and the histograms of all boxes are
+counted with a single np.bincount.
+"""
+
+import cv2
+import numpy as np
+
+HISTOGRAM_BINS = 16
+HISTOGRAM_SIZE = 3 * HISTOGRAM_BINS
+TORSO_RANGE = (0.2, 0.6)
+"""Vertical extent of the torso, as fractions of the box height from its top."""
+
+
+def torso_regions(boxes :np.ndarray, frame_shape :tuple) -> np.ndarray:
+    """Integer (x1, y1, x2, y2) torso regions of the boxes, clipped to the frame."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4).astype(int)
+    x1, y1, x2, y2 = boxes.T
+    height = y2 - y1
+    regions = np.stack([x1, y1 + (height * TORSO_RANGE[0]).astype(int), x2, y1 + (height * TORSO_RANGE[1]).astype(int)], axis=1)
+    frame_height, frame_width = frame_shape[:2]
+    regions[:, [0, 2]] = np.clip(regions[:, [0, 2]], 0, frame_width)
+    regions[:, [1, 3]] = np.clip(regions[:, [1, 3]], 0, frame_height)
+    return regions
+
+
+def quantize_hsv(bgr :np.ndarray, bins :int = HISTOGRAM_BINS) -> np.ndarray:
+    """
+    Converts a BGR image to HSV and returns joint bin codes of shape (3, H, W) :
+    hue bins in [0, bins), saturation bins in [bins, 2 * bins) and value bins in [2 * bins, 3 * bins).
+    Bin edges are the ones of cv2.calcHist with ranges [0, 180] and [0, 256].
+    """
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV).astype(np.uint16)
+    codes = np.empty((3,) + hsv.shape[:2], dtype=np.uint16)
+    codes[0] = hsv[..., 0] * bins // 180
+    codes[1] = hsv[..., 1] * bins // 256 + bins
+    codes[2] = hsv[..., 2] * bins // 256 + 2 * bins
+    return codes
+
+
+def color_histograms(frame :np.ndarray, boxes :np.ndarray, bins :int = HISTOGRAM_BINS) -> np.ndarray:
+    """
+    Torso color histograms of all boxes of a frame.
+
+    Returns:
+        A (N, 3 * bins) float32 matrix, each channel L2 normalized like cv2.normalize.
+        Boxes with an empty torso region get a zero row.
+    """
+    regions = torso_regions(boxes, frame.shape)
+    histogram_size = 3 * bins
+    histograms = np.zeros((len(regions), histogram_size), dtype=np.float32)
+
+    valid = np.flatnonzero((regions[:, 2] > regions[:, 0]) & (regions[:, 3] > regions[:, 1]))
+    if valid.size == 0:
+        return histograms
+
+    "Only the area covering every torso is converted."
+    roi_x1, roi_y1 = regions[valid, 0].min(), regions[valid, 1].min()
+    roi_x2, roi_y2 = regions[valid, 2].max(), regions[valid, 3].max()
+    codes = quantize_hsv(frame[roi_y1:roi_y2, roi_x1:roi_x2], bins)
+
+    labelled_codes = []
+    for row in valid:
+        x1, y1, x2, y2 = regions[row] - (roi_x1, roi_y1, roi_x1, roi_y1)
+        labelled_codes.append(codes[:, y1:y2, x1:x2].ravel().astype(np.int64) + row * histogram_size)
+
+    counts = np.bincount(np.concatenate(labelled_codes), minlength=len(regions) * histogram_size)
+    histograms = counts.reshape(len(regions), 3, bins).astype(np.float32)
+    norms = np.linalg.norm(histograms, axis=2, keepdims=True)
+    np.divide(histograms, norms, out=histograms, where=norms > 0)
+    return histograms.reshape(len(regions), histogram_size)
@@ -0,0 +1,32 @@
+import pickle
+import logging
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Persistence of intermediate pipeline results, so CLI subcommands can run independently
+(extract -> match -> render) without re-running the models.
+"""
+
+
+def save_cache(path :Path, data :Any) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as cache_file:
+        pickle.dump(data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    logger.info(f"Saved cache to {path}")
+
+
+def load_cache(path :Path) -> Any:
+    path = Path(path)
+    if not path.exists():
+        logger.error(f"Cache file {path} does not exist. Run the previous pipeline step first.")
+        raise FileNotFoundError(f"Cache file {path} does not exist.")
+
+    with open(path, "rb") as cache_file:
+        data = pickle.load(cache_file)
+    logger.info(f"Loaded cache from {path}")
+    return data
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import logging
+import functools
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRegistry:
+    """
+    Lightweight instrumentation for the pipeline stages.
+
+    - Timers (context manager, decorator or iterator wrapper) keep a bounded window of
+      latencies per stage, summarized as p50/p95 latency and throughput.
+    - Counters track frames, detections, matches, cache hits, etc.
+    - Histograms count values (e.g. batch sizes, queue waits) in fixed buckets.
+
+    The summary is logged periodically and written as JSON and as a Prometheus textfile
+    that can be scraped locally (e.g. by the node exporter textfile collector).
+    """
+
+    def __init__(self, window :int = 2048, report_interval_sec :float = 30.0, output_dir :Optional[Path] = None):
+        self.window = window
+        self.report_interval_sec = report_interval_sec
+        self.output_dir = Path(output_dir) if output_dir else None
+        self._latencies : Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals : Dict[str, list] = defaultdict(lambda: [0, 0.0])
+        self._counters : Dict[str, int] = defaultdict(int)
+        self._histograms : Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._last_report = self._started
+
+
+    def observe(self, stage :str, seconds :float) -> None:
+        with self._lock:
+            self._latencies[stage].append(seconds)
+            totals = self._totals[stage]
+            totals[0] += 1
+            totals[1] += seconds
+
+
+    def increment(self, name :str, value :int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+
+    def histogram(self, name :str, value :float, buckets :Sequence[float]) -> None:
+        """Counts `value` in the cumulative `buckets` (upper bounds) of histogram `name`, set on first use."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = {"buckets": list(buckets), "counts": [0] * len(buckets), "count": 0, "sum": 0.0}
+            for index, upper_bound in enumerate(histogram["buckets"]):
+                if value <= upper_bound:
+                    histogram["counts"][index] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+
+
+    @contextmanager
+    def timer(self, stage :str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+
+    def timed(self, stage :str) -> Callable:
+        """Decorator timing every call of the wrapped function."""
+        def decorator(function :Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+
+    def timed_iter(self, stage :str, iterator :Iterator) -> Iterator:
+        """Times how long the wrapped iterator takes to produce each item."""
+        iterator = iter(iterator)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, time.perf_counter() - start)
+            yield item
+
+
+    def summary(self) -> Dict:
+        """Returns per-stage latency percentiles and throughput, the counters and the histograms."""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            stages = {}
+            for stage, latencies in self._latencies.items():
+                ordered = sorted(latencies)
+                count, total = self._totals[stage]
+                stages[stage] = {
+                    "count": count,
+                    "total_sec": total,
+                    "p50_ms": _percentile(ordered, 0.50) * 1000,
+                    "p95_ms": _percentile(ordered, 0.95) * 1000,
+                    "throughput_per_sec": count / elapsed if elapsed > 0 else 0.0,
+                }
+            histograms = {
+                name: {**histogram, "buckets": list(histogram["buckets"]), "counts": list(histogram["counts"])}
+                for name, histogram in self._histograms.items()
+            }
+            return {"elapsed_sec": elapsed, "stages": stages, "counters": dict(self._counters), "histograms": histograms}
+
+
+    def maybe_report(self) -> None:
+        """Reports the summary if the report interval has passed since the last report."""
+        if time.perf_counter() - self._last_report >= self.report_interval_sec:
+            self.report()
+
+
+    def report(self) -> Dict:
+        summary = self.summary()
+        self._last_report = time.perf_counter()
+
+        for stage, stats in sorted(summary["stages"].items()):
+            logger.info(
+                f"[metrics] {stage}: n={stats['count']} p50={stats['p50_ms']:.1f}ms "
+                f"p95={stats['p95_ms']:.1f}ms throughput={stats['throughput_per_sec']:.2f}/s"
+            )
+        if summary["counters"]:
+            logger.info(f"[metrics] counters: {summary['counters']}")
+        for name, histogram in sorted(summary["histograms"].items()):
+            mean = histogram["sum"] / histogram["count"] if histogram["count"] else 0.0
+            logger.info(f"[metrics] {name}: n={histogram['count']} mean={mean:.4g} buckets={dict(zip(histogram['buckets'], histogram['counts']))}")
+
+        if self.output_dir is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self.output_dir / "metrics.json", json.dumps(summary, indent=2))
+            _atomic_write(self.output_dir / "metrics.prom", to_prometheus(summary))
+        return summary
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self._totals.clear()
+            self._counters.clear()
+            self._histograms.clear()
+            self._started = self._last_report = time.perf_counter()
+
+
+def _percentile(ordered :list, quantile :float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(quantile * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _atomic_write(path :Path, content :str) -> None:
+    """Writes through a temporary file so scrapers never read a partial file."""
+    temporary_path = path.with_suffix(path.suffix + ".tmp")
+    temporary_path.write_text(content)
+    os.replace(temporary_path, path)
+
+
+def to_prometheus(summary :Dict, prefix :str = "ccpm") -> str:
+    """Formats a summary in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {prefix}_stage_latency_seconds Latency of the pipeline stages.",
+        f"# TYPE {prefix}_stage_latency_seconds summary",
+    ]
+    for stage, stats in sorted(summary["stages"].items()):
+        lines.append(f'{prefix}_stage_latency_seconds{{stage="{stage}",quantile="0.5"}} {stats["p50_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_stage_latency_seconds{{stage="{stage}",quantile="0.95"}} {stats["p95_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{stage}"}} {stats["total_sec"]:.6f}')
+        lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{stage}"}} {stats["count"]}')
+
+    lines.append(f"# HELP {prefix}_stage_throughput_per_second Processed items per second since start.")
+    lines.append(f"# TYPE {prefix}_stage_throughput_per_second gauge")
+    for stage, stats in sorted(summary["stages"].items()):
+        lines.append(f'{prefix}_stage_throughput_per_second{{stage="{stage}"}} {stats["throughput_per_sec"]:.6f}')
+
+    lines.append(f"# HELP {prefix}_events_total Pipeline event counters.")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for name, value in sorted(summary["counters"].items()):
+        lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+
+    for name, histogram in sorted(summary.get("histograms", {}).items()):
+        metric = f"{prefix}_{name.replace('.', '_')}"
+        lines.append(f"# TYPE {metric} histogram")
+        for upper_bound, count in zip(histogram["buckets"], histogram["counts"]):
+            lines.append(f'{metric}_bucket{{le="{upper_bound}"}} {count}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram["count"]}')
+        lines.append(f"{metric}_sum {histogram['sum']:.6f}")
+        lines.append(f"{metric}_count {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _default_registry() -> MetricsRegistry:
+    from src.config import settings
+
+    return MetricsRegistry(report_interval_sec=settings.METRICS_INTERVAL_SEC, output_dir=settings.METRICS_PATH)
+
+
+metrics = _default_registry()
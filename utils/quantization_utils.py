@@ -0,0 +1,201 @@
+import cv2
+import time
+import logging
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Helpers for calibrating and validating the quantized Re-ID model.
+
+Crops are cached from our own videos (together with the cheap features of each player)
+so the quantized model can be calibrated and compared against the float model without
+re-running detection.
+"""
+
+REID_CROP_SIZE = (128, 256)
+
+
+def crop_for_reid(frame :np.ndarray, box :np.ndarray) -> Optional[np.ndarray]:
+    """
+    Cuts the player box out of a BGR frame and returns an RGB crop resized to the Re-ID input size.
+    """
+    x1, y1, x2, y2 = map(int, box)
+    crop = frame[max(y1, 0):y2, max(x1, 0):x2]
+    if crop.size == 0:
+        return None
+
+    crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+    return cv2.resize(crop_rgb, REID_CROP_SIZE)
+
+
+def collect_calibration_crops(synchronizer, player_tracker, feature_extractor, transformer,
+                              max_frames :int = 50, fps :int = 10) -> Dict[str, np.ndarray]:
+    """
+    Collects player crops and their cheap features from the first synchronized frames.
+
+    Returns:
+        A dictionary of aligned arrays : crops, frame_ids, views, track_ids, field_coords and color_hists.
+    """
+    crops, frame_ids, views, track_ids, field_coords, color_hists = [], [], [], [], [], []
+    frames_seen = 0
+
+    for frame_index, (frame1, frame2) in enumerate(synchronizer.get_synchronized_frames(fps=fps)):
+        if frame_index >= max_frames:
+            break
+        frames_seen += 1
+
+        for view, frame in (("broadcast", frame1), ("tacticam", frame2)):
+            for box, track_id, conf in player_tracker.track_players(frame):
+                crop = crop_for_reid(frame, box)
+                if crop is None:
+                    continue
+                crops.append(crop)
+                frame_ids.append(frame_index)
+                views.append(view)
+                track_ids.append(track_id)
+                field_coords.append(feature_extractor.get_field_coordinates(box, transformer))
+                color_hists.append(feature_extractor.extract_color_histogram(frame, box))
+
+    logger.info(f"Collected {len(crops)} calibration crops from {frames_seen} frames")
+
+    return {
+        "crops": np.asarray(crops, dtype=np.uint8),
+        "frame_ids": np.asarray(frame_ids, dtype=np.int32),
+        "views": np.asarray(views),
+        "track_ids": np.asarray(track_ids, dtype=np.int64),
+        "field_coords": np.asarray(field_coords, dtype=np.float32),
+        "color_hists": np.asarray(color_hists, dtype=np.float32),
+    }
+
+
+def save_calibration_crops(path :Path, calibration_cache :Dict[str, np.ndarray]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **calibration_cache)
+    logger.info(f"Saved {len(calibration_cache['crops'])} calibration crops to {path}")
+
+
+def load_calibration_crops(path :Path) -> Dict[str, np.ndarray]:
+    with np.load(path) as data:
+        calibration_cache = {key: data[key] for key in data.files}
+    logger.info(f"Loaded {len(calibration_cache['crops'])} calibration crops from {path}")
+    return calibration_cache
+
+
+def crops_to_batches(crops :np.ndarray, transform, device :str = "cpu", batch_size :int = 32) -> Iterator:
+    """
+    Applies the torchreid test transform to cached RGB crops and yields batched tensors.
+    """
+    import torch
+    from PIL import Image
+
+    for start in range(0, len(crops), batch_size):
+        batch = [transform(Image.fromarray(crop)) for crop in crops[start:start + batch_size]]
+        yield torch.stack(batch).to(device)
+
+
+def embed_crops(reid_model, crops :np.ndarray, transform, device :str = "cpu") -> tuple:
+    """
+    Runs a Re-ID model over cached crops.
+
+    Returns:
+        (embeddings of shape (N, D), average seconds per crop)
+    """
+    import torch
+
+    embeddings = []
+    elapsed = 0.0
+    with torch.no_grad():
+        for batch in crops_to_batches(crops, transform, device=device):
+            start = time.perf_counter()
+            output = reid_model(batch)
+            elapsed += time.perf_counter() - start
+            embeddings.append(output.float().cpu().numpy())
+
+    return np.concatenate(embeddings), elapsed / max(len(crops), 1)
+
+
+def _match_cached_frames(calibration_cache :Dict[str, np.ndarray], embeddings :np.ndarray, matcher) -> set:
+    """
+    Replays the cross view matcher over the cached frames with the given appearance embeddings.
+    """
+    matches = set()
+    frame_ids = calibration_cache["frame_ids"]
+
+    for frame_id in np.unique(frame_ids):
+        players_1, players_2 = [], []
+        for idx in np.flatnonzero(frame_ids == frame_id):
+            player = {
+                "view": str(calibration_cache["views"][idx]),
+                "track_id": int(calibration_cache["track_ids"][idx]),
+                "features": {
+                    "appearance": embeddings[idx],
+                    "color_hist": calibration_cache["color_hists"][idx],
+                    "field_coords": calibration_cache["field_coords"][idx],
+                },
+            }
+            (players_1 if player["view"] == "broadcast" else players_2).append(player)
+
+        matched, _, _ = matcher.match_players_in_frame(players_1, players_2)
+        matches.update((int(frame_id), p1["track_id"], p2["track_id"]) for p1, p2 in matched)
+
+    return matches
+
+
+def compare_reid_models(reid_model_loader, calibration_cache :Dict[str, np.ndarray], matcher=None) -> Dict:
+    """
+    Compares a QuantizedTorchReIDModel against its float model on cached crops.
+
+    Reports the cosine drift between float and quantized embeddings, the per crop latency of
+    both models and the F1 of the quantized matches, using the float model's matches as reference.
+    """
+    from src.steps.CrossViewMatcher import CrossViewMatcher
+
+    if matcher is None:
+        matcher = CrossViewMatcher(settings.FEATURE_WEIGHTS, max_cost_threshold=0.75)
+
+    crops = calibration_cache["crops"]
+    float_device = next(reid_model_loader.float_reid_model.parameters()).device
+    float_embeddings, float_latency = embed_crops(
+        reid_model_loader.float_reid_model, crops, reid_model_loader.ried_transfrom, device=float_device
+    )
+    quant_embeddings, quant_latency = embed_crops(
+        reid_model_loader.reid_model, crops, reid_model_loader.ried_transfrom, device=reid_model_loader.device
+    )
+
+    norms = np.linalg.norm(float_embeddings, axis=1) * np.linalg.norm(quant_embeddings, axis=1)
+    cosine_similarity = np.sum(float_embeddings * quant_embeddings, axis=1) / np.maximum(norms, 1e-12)
+    cosine_drift = 1.0 - cosine_similarity
+
+    float_matches = _match_cached_frames(calibration_cache, float_embeddings, matcher)
+    quant_matches = _match_cached_frames(calibration_cache, quant_embeddings, matcher)
+    true_positives = len(float_matches & quant_matches)
+    denominator = len(float_matches) + len(quant_matches)
+    matching_f1 = 2 * true_positives / denominator if denominator else 1.0
+
+    report = {
+        "precision": reid_model_loader.precision,
+        "num_crops": int(len(crops)),
+        "mean_cosine_drift": float(np.mean(cosine_drift)),
+        "max_cosine_drift": float(np.max(cosine_drift)),
+        "float_matches": len(float_matches),
+        "quantized_matches": len(quant_matches),
+        "matching_f1": float(matching_f1),
+        "matching_f1_change": float(matching_f1 - 1.0),
+        "float_ms_per_crop": float_latency * 1000,
+        "quantized_ms_per_crop": quant_latency * 1000,
+        "speedup": float_latency / quant_latency if quant_latency else 0.0,
+    }
+    report["accepted"] = (
+        report["mean_cosine_drift"] <= settings.REID_MAX_COSINE_DRIFT
+        and report["matching_f1"] >= settings.REID_MIN_MATCHING_F1
+    )
+
+    logger.info(f"Re-Id quantization report : {report}")
+    return report
@@ -0,0 +1,143 @@
+import time
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Shared memory ring of frame slots, to move decoded frames between processes without pickling.
+
+The producer decodes into a free slot and sends only the slot index (and its metadata) to the
+consumers. Every slot has a reference count in the same shared block : the producer owns a new
+slot with one reference, adds one per additional consumer (retain) and every consumer releases
+its reference when done. A slot is reused once its count drops to zero. When all slots are in
+use the producer blocks in acquire, which also throttles decoding to the consumers' pace.
+"""
+
+HEADER_BYTES = 64
+WATCHDOG_INTERVAL_SEC = 1.0
+
+
+class SharedFrameRing:
+
+    def __init__(self, handle :Dict, create :bool = False):
+        """Use SharedFrameRing.create in the producer and SharedFrameRing.attach in the consumers."""
+        self.handle = handle
+        self.slots :int = handle["slots"]
+        self.frame_shape :Tuple[int, ...] = tuple(handle["frame_shape"])
+        self.dtype = np.dtype(handle["dtype"])
+        self.frame_bytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        self._lock = handle["lock"]
+        self._free = handle["free"]
+        self._owner = create
+        self.watchdog : Optional[Callable[[], None]] = None
+        """Called about every WATCHDOG_INTERVAL_SEC while acquire waits, e.g. to raise when the consumers died."""
+
+        header_bytes = -(-self.slots * 4 // HEADER_BYTES) * HEADER_BYTES
+        if create:
+            self._memory = shared_memory.SharedMemory(create=True, size=header_bytes + self.slots * self.frame_bytes)
+            self.handle["name"] = self._memory.name
+        else:
+            self._memory = shared_memory.SharedMemory(name=handle["name"])
+
+        self._refcounts = np.ndarray((self.slots,), dtype=np.int32, buffer=self._memory.buf)
+        self._frames = np.ndarray((self.slots, *self.frame_shape), dtype=self.dtype, buffer=self._memory.buf, offset=header_bytes)
+        if create:
+            self._refcounts[:] = 0
+        self._next_slot = 0
+
+
+    @classmethod
+    def create(cls, slots :int, frame_shape :Tuple[int, ...], dtype=np.uint8, context=None) -> "SharedFrameRing":
+        """
+        Allocates a ring of `slots` frames of `frame_shape`. The lock and semaphore come from
+        `context` (the multiprocessing context of the consumers), so the handle can be passed
+        to processes started from it.
+        """
+        context = context or multiprocessing.get_context("spawn")
+        handle = {
+            "name": None, "slots": slots, "frame_shape": tuple(frame_shape), "dtype": np.dtype(dtype).str,
+            "lock": context.Lock(), "free": context.BoundedSemaphore(slots),
+        }
+        ring = cls(handle, create=True)
+        logger.info(f"Shared frame ring '{ring.handle['name']}' : {slots} slots of {frame_shape} ({slots * ring.frame_bytes / 2 ** 20:.0f}MB)")
+        return ring
+
+
+    @classmethod
+    def attach(cls, handle :Dict) -> "SharedFrameRing":
+        return cls(handle, create=False)
+
+
+    def acquire(self, timeout :Optional[float] = None) -> int:
+        """
+        A free slot, owned by the caller with one reference. Blocks until a slot is free, at most
+        `timeout` seconds, running the watchdog while waiting.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = WATCHDOG_INTERVAL_SEC if deadline is None else min(WATCHDOG_INTERVAL_SEC, max(0.0, deadline - time.monotonic()))
+            if self._free.acquire(timeout=wait):
+                break
+            if self.watchdog is not None:
+                self.watchdog()
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.error(f"No free slot in the shared frame ring after {timeout}s.")
+                raise TimeoutError(f"No free slot in the shared frame ring after {timeout}s.")
+        with self._lock:
+            for offset in range(self.slots):
+                slot = (self._next_slot + offset) % self.slots
+                if self._refcounts[slot] == 0:
+                    self._refcounts[slot] = 1
+                    self._next_slot = (slot + 1) % self.slots
+                    return slot
+        "The semaphore counts the free slots, so one was free."
+        logger.error("Shared frame ring reference counts are out of sync with its free slots.")
+        raise RuntimeError("Shared frame ring reference counts are out of sync with its free slots.")
+
+
+    def retain(self, slot :int, count :int = 1) -> None:
+        """Adds references to a slot in use, one per additional consumer."""
+        with self._lock:
+            if self._refcounts[slot] <= 0:
+                logger.error(f"Slot {slot} is not in use.")
+                raise ValueError(f"Slot {slot} is not in use.")
+            self._refcounts[slot] += count
+
+
+    def release(self, slot :int) -> None:
+        """Drops a reference to a slot, the slot is free again after its last reference."""
+        with self._lock:
+            if self._refcounts[slot] <= 0:
+                logger.error(f"Slot {slot} released more often than acquired.")
+                raise ValueError(f"Slot {slot} released more often than acquired.")
+            self._refcounts[slot] -= 1
+            freed = self._refcounts[slot] == 0
+        if freed:
+            self._free.release()
+
+
+    def frame(self, slot :int) -> np.ndarray:
+        """The frame of a slot, a view on the shared memory (valid until the slot is released)."""
+        return self._frames[slot]
+
+
+    def close(self) -> None:
+        """Detaches from the shared memory, the creator also frees it."""
+        self._refcounts = self._frames = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,43 @@
+import logging
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Readers for the trajectory output written by TrajectoryWriterStrategy (NPZ chunks)
+and ParquetTrajectoryWriterStrategy, so analytics can consume positions without decoding video.
+"""
+
+
+def iter_trajectory_chunks(path :Path) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yields the trajectory output chunk by chunk (NPZ or Parquet chunk files) as column arrays.
+    Every chunk file is complete once it appears, so the flushed chunks can be read while the
+    pipeline is still writing.
+    """
+    path = Path(path)
+    chunk_paths = [path] if path.is_file() else sorted(path.glob("chunk_*.npz")) + sorted(path.glob("chunk_*.parquet"))
+    if not chunk_paths:
+        logger.warning(f"No trajectory output found at {path}")
+
+    for chunk_path in chunk_paths:
+        if chunk_path.suffix == ".parquet":
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(str(chunk_path))
+            yield {name: table.column(name).to_numpy() for name in table.column_names}
+            continue
+
+        with np.load(chunk_path) as chunk:
+            yield {name: chunk[name] for name in chunk.files}
+
+
+def load_trajectories(path :Path) -> Dict[str, np.ndarray]:
+    """Loads the whole trajectory output as a dictionary of column arrays."""
+    chunks = list(iter_trajectory_chunks(path))
+    if not chunks:
+        return {}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}